@@ -1,17 +1,21 @@
 import streamlit as st
 import pandas as pd
+# Feature modules (history, scenarios, exports, PDF, calendar, jobs) are imported by the
+# views that use them, so the first render loads little beyond the parsing pipeline
 from modules import calculations
-from modules import validation
+from modules import pipeline
+from modules import instrumentation
+from modules.exceptions import QueueFullError
+from modules.time_utils import get_schedule
 import time
 import json
 import os
+import uuid
+from contextlib import nullcontext
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# from modules import pdf_report
-from modules import calendar_ui as custom_calendar
-
 CONFIG_FILE = "config.json"
 def load_config():
     if os.path.exists(CONFIG_FILE):
@@ -29,13 +33,135 @@ def load_config():
     }
 
 def save_config(config):
-    with open(CONFIG_FILE, 'w') as f:
+    # Replace the file atomically: other sessions may be reading it right now
+    tmp_path = f"{CONFIG_FILE}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_path, 'w') as f:
         json.dump(config, f)
+    os.replace(tmp_path, CONFIG_FILE)
+
+def profiling_on():
+    # cProfile capture is opt-in: ATTENDANCE_PROFILE=1, or the toggle revealed by ?profile=1
+    from modules import profiling
+    return st.session_state.get('profile_enabled', profiling.profile_enabled())
+
+def session_profiler():
+    from modules import profiling
+    return st.session_state.setdefault('profiler', profiling.Profiler())
+
+def read_file_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+# Parsed uploads are shared across sessions: identical files are parsed once.
+# Finished results are kept briefly (each session also holds them in its session store), since this memory is not budgeted.
+PIPELINE_CACHE_TTL = 10 * 60
+PIPELINE_CACHE_MAX_ENTRIES = 4
+ANALYSIS_POLL_SECONDS = 0.5
+
+@st.cache_resource
+def analysis_jobs():
+    # Background parse jobs keyed on file contents + schedule; finished jobs double as the parse cache
+    from modules import jobs
+    return jobs.JobRegistry(max_entries=PIPELINE_CACHE_MAX_ENTRIES, ttl=PIPELINE_CACHE_TTL)
+
+# Heavy work from every session shares one bounded pool: interactive views first, then analyses, then bulk exports.
+# One of the workers is kept for interactive views, so analyses and exports never hold up an employee switch.
+WORKER_POOL_SIZE = int(os.getenv("ATTENDANCE_WORKERS", "2"))
+WORKER_QUEUE_SIZE = int(os.getenv("ATTENDANCE_WORKER_QUEUE", "16"))
+QUEUE_POLL_SECONDS = 0.2
+
+@st.cache_resource
+def worker_pool():
+    from modules import jobs
+    return jobs.WorkerPool(max_workers=WORKER_POOL_SIZE, max_queue=WORKER_QUEUE_SIZE)
+
+def run_on_pool(func, *args, **kwargs):
+    # Block this run until a worker has called func, showing the queue position while waiting
+    from modules import jobs
+    job = worker_pool().submit_call(func, *args, priority=jobs.INTERACTIVE, **kwargs)
+    status = st.empty()
+    try:
+        while not job.wait(QUEUE_POLL_SECONDS):
+            position = job.queue_position
+            if position:
+                status.caption(f"Waiting for a free worker (position {position} in queue)...")
+            else:
+                status.empty()
+    except BaseException:
+        # Rerun interrupted: drop the call if it has not started yet
+        job.cancel()
+        raise
+    status.empty()
+    return job.result()
+
+# Parsed frames and bulk ZIPs live outside st.session_state in one store that spills idle sessions to disk
+SESSION_BUDGET_MB = int(os.getenv("ATTENDANCE_SESSION_BUDGET_MB", "512"))
+SESSION_IDLE_SECONDS = 10 * 60
+SESSION_TTL = 6 * 60 * 60
+
+@st.cache_resource
+def session_data():
+    from modules import session_store
+    return session_store.SessionStore(
+        os.getenv("ATTENDANCE_SPILL_DIR"), SESSION_BUDGET_MB * 1024 * 1024, SESSION_IDLE_SECONDS, SESSION_TTL,
+    )
+
+def session_id():
+    return st.session_state.setdefault('session_id', uuid.uuid4().hex)
+
+def session_value(key, default=None):
+    return session_data().get(session_id(), key, default)
+
+def set_session_value(key, value):
+    session_data().put(session_id(), key, value)
+
+def period_attendance(metadata):
+    # Period adjustment is cheap, so only the frame for the current data and metadata is kept, in the session store
+    key = f"{st.session_state['data_hash']}:{pipeline.metadata_key(metadata)}"
+    stored = session_value('attendance')
+    if stored is not None and stored[0] == key:
+        return stored[1]
+    attendance = calculations.apply_period_config(session_value('raw_swipes'), metadata)
+    set_session_value('attendance', (key, attendance))
+    return attendance
+
+# Excel workbooks are only built when a download is clicked, then reused
+EXCEL_CACHE_TTL = 60 * 60
+EXCEL_CACHE_MAX_ENTRIES = 32
+
+@st.cache_data(ttl=EXCEL_CACHE_TTL, max_entries=EXCEL_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_excel_report(employee, data_key, _summary_data):
+    return calculations.generate_excel_download(employee, _summary_data).getvalue()
+
+@st.cache_data(ttl=EXCEL_CACHE_TTL, max_entries=EXCEL_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_pdf_report(employee, data_key, _summary_data):
+    from modules import pdf_report
+    return pdf_report.generate_pdf_report(employee, _summary_data)
+
+@st.cache_data(ttl=EXCEL_CACHE_TTL, max_entries=EXCEL_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_export_tables(data_key, _attendance, _report, _shifts, _metadata, _employees, _aggregate_table, _months):
+    from modules import aggregates
+    from modules import export
+    from modules import history
+    summaries = calculations.generate_all_summaries(_attendance, _report, _metadata, _shifts, _employees)
+    if _aggregate_table is None:
+        # The stored aggregates were built with other metadata: recompute this upload's months
+        _aggregate_table = history.compute_monthly_aggregates(_attendance, _report, _metadata)
+    # The stored table holds every upload's employees: keep this upload's only
+    tables = {"Clinic Monthly": aggregates.clinic_monthly_table(_aggregate_table, _months, _employees)}
+    tables.update(export.combine_detail_tables(summaries))
+    return tables
 
 st.set_page_config(page_title="Employee Attendance System", layout="wide")
 
 st.title("Employee Attendance System")
 
+# Spill idle sessions / drop abandoned ones; this session's data may have expired meanwhile
+session_data().maintain(current=session_id())
+if st.session_state.get('data_loaded') and not session_data().has(session_id(), 'raw_swipes'):
+    st.session_state['data_loaded'] = False
+    st.info("This session's data expired after a long idle period. Please analyze the files again.")
+
 # Google Sheet Link on top of Sidebar
 google_sheet_url = os.getenv("GOOGLE_SHEET_URL")
 if google_sheet_url:
@@ -49,27 +175,26 @@ st.sidebar.header("Metadata")
 
 config = load_config()
 
+# Period inputs are generated from the schedule (config.json may declare extra periods under "periods")
+period_schedule = get_schedule(config)
+period_time_labels = {
+    'start': "Start Time",
+    'end': "End Time",
+    'ot_start': "Overtime Start Time",
+    'late': "Late Start Time",
+}
+
 with st.sidebar.expander("Metadata"):
-    m_start = st.text_input("Morning Period Start Time", value=config.get('morning_start', '08:00'))
-    m_end = st.text_input("Morning Period End Time", value=config.get('morning_end', '12:00'))
-    m_ot_start = st.text_input("Morning Period Overtime Start Time", value=config.get('morning_ot_start', '12:10'))
-    m_late = st.text_input("Morning Period Late Start Time", value=config.get('morning_late', '08:05'))
-    
-    n_start = st.text_input("Night Period Start Time", value=config.get('night_start', '16:00'))
-    n_end = st.text_input("Night Period End Time", value=config.get('night_end', '20:00'))
-    n_ot_start = st.text_input("Night Period Overtime Start Time", value=config.get('night_ot_start', '20:10'))
-    n_late = st.text_input("Night Period Late Start Time", value=config.get('night_late', '16:05'))
-    
-    metadata = {
-        'morning_start': m_start,
-        'morning_end': m_end,
-        'morning_ot_start': m_ot_start,
-        'morning_late': m_late,
-        'night_start': n_start,
-        'night_end': n_end,
-        'night_ot_start': n_ot_start,
-        'night_late': n_late
-    }
+    metadata = {}
+    for spec in period_schedule:
+        for field, field_label in period_time_labels.items():
+            meta_key = f"{spec['key']}_{field}"
+            metadata[meta_key] = st.text_input(
+                f"{spec['label']} Period {field_label}",
+                value=config.get(meta_key, spec['defaults'][field]),
+            )
+    if config.get('periods'):
+        metadata['periods'] = config['periods']
 
 
 # Sidebar for File Uploads
@@ -81,6 +206,22 @@ report_file = st.sidebar.file_uploader("2. Overtime Report (加班報表)", type
 
 analyze_clicked = st.sidebar.button("Analyze Data")
 calendar_clicked = st.sidebar.button("Show Calendar")
+history_clicked = st.sidebar.button("Show History")
+scenarios_clicked = st.sidebar.button("What-if Scenarios")
+
+if history_clicked:
+    st.session_state['view_mode'] = 'history'
+if scenarios_clicked:
+    st.session_state['view_mode'] = 'scenarios'
+
+def release_analysis_job():
+    # Detach this session; the job itself only stops if no other session is waiting for the same files
+    data_hash, job = st.session_state.pop('analysis_job')
+    if analysis_jobs().get(data_hash) is job:
+        analysis_jobs().release(data_hash, session_id())
+    else:
+        # A profiled run is private to this session
+        job.cancel()
 
 if analyze_clicked or calendar_clicked:
     if analyze_clicked:
@@ -94,175 +235,460 @@ if analyze_clicked or calendar_clicked:
     elif not (attendance_file and report_file):
         st.error("Please upload Attendance Report and Overtime Report to proceed.")
     else:
-        with st.spinner("Processing files..."):
-            try:
-                # 1. Read files
-                attendance_file.seek(0)
-                # abnormal_file.seek(0)
-                report_file.seek(0)
-                
-                attendance_df = calculations.read_file_by_extension(attendance_file)
-                # abnormal_df = calculations.read_file_by_extension(abnormal_file)
-                report_df = calculations.read_file_by_extension(report_file)
-                
-
-                # 2. Validate structures and columns
-                # Swipe validation
-                validation.validate_attendance_report(attendance_df, attendance_file.name)
-                
-                # Preprocess abnormal stats to fix headers, then validate
-                # abnormal_df = calculations.preprocess_abnormal_stats(abnormal_df)
-                # validation.validate_abnormal_stats(abnormal_df, abnormal_file.name)
-                
-                # Overtime Report validation
-                validation.validate_overtime_report(report_df, report_file.name)
-
-                # 3. Parse Data
-                parsed_attendance = calculations.parse_attendance_report(attendance_df, metadata)
-                # parsed_abnormal = calculations.parse_abnormal_stats(abnormal_df)
-                parsed_report = calculations.parse_overtime_leave_report(report_df)
-                
-                # Parse Shift Entries explicitly
-                try:
-                    if isinstance(attendance_df, dict) and '排班記錄表' in attendance_df:
-                        parsed_shifts = calculations.parse_shift_report(attendance_df['排班記錄表'])
-                    else:
-                        parsed_shifts = pd.DataFrame()
-                except Exception as e:
-                    st.warning(f"Could not parse Shift Entries (排班記錄表): {e}")
-                    parsed_shifts = pd.DataFrame()
-                
-                # =========================== Test ===========================
-
-                # print("attendance_file: ")
-                # print(attendance_file)
-
-                # print("attendance_df:")
-                # print(attendance_df)
-
-                # print("parsed_attendance:")
-                # print(parsed_attendance.head())
-                # =========================== Test ===========================
-
-
-                # 4. Validate parsed data
-                if parsed_attendance.empty:
-                    st.warning("No valid attendance records found.")
-                
-                # Cache data
-                st.session_state['data_loaded'] = True
-                st.session_state['attendance'] = parsed_attendance
-                # st.session_state['abnormal'] = parsed_abnormal
-                st.session_state['report'] = parsed_report
-                st.session_state['shifts'] = parsed_shifts
-                
-                # Get employee list
-                employees = sorted(list(set(parsed_attendance['Employee'].dropna().unique()) | set(parsed_report['Employee'].dropna().unique())))
-                st.session_state['employees'] = employees
-                st.success("Data processed successfully!")
-                
-            except ValueError as ve:
-                st.error(str(ve))
-            except Exception as e:
-                st.error(f"An unexpected error occurred: {e}")
-                # st.exception(e) # For debug
+        # 1-3. Read, validate and parse in a background job (shared on file contents + period schedule)
+        from modules import jobs
+        attendance_bytes = attendance_file.getvalue()
+        report_bytes = report_file.getvalue()
+        attendance_hash = pipeline.content_hash(attendance_bytes)
+        report_hash = pipeline.content_hash(report_bytes)
+        schedule_key = json.dumps(get_schedule(metadata), sort_keys=True, ensure_ascii=False)
+        data_hash = pipeline.content_hash(f"{attendance_hash}:{report_hash}:{schedule_key}".encode("utf-8"))
+        job_args = (attendance_bytes, attendance_file.name, report_bytes, report_file.name, get_schedule(metadata))
+        record = st.session_state.get('perf_enabled', False)
+        try:
+            if profiling_on():
+                # A profile must measure a real run, so bypass the shared job cache
+                job = worker_pool().submit(
+                    jobs.BackgroundJob(session_profiler().wrap(pipeline.process_uploads, "analysis", data_hash), *job_args, record=record),
+                    jobs.ANALYSIS,
+                )
+            else:
+                job = analysis_jobs().get_or_start(
+                    data_hash, pipeline.process_uploads, *job_args, record=record, pool=worker_pool(), priority=jobs.ANALYSIS,
+                    subscriber=session_id(),
+                )
+        except QueueFullError as e:
+            st.warning(str(e))
+        else:
+            if 'analysis_job' in st.session_state and st.session_state['analysis_job'][1] is not job:
+                release_analysis_job()
+            st.session_state['analysis_job'] = (data_hash, job)
+
+def collect_analysis_job(metadata):
+    # Pick up a finished job's result; messages are shown by the next full run
+    from modules import aggregates
+    from modules import history
+    from modules import jobs
+    data_hash, job = st.session_state['analysis_job']
+    release_analysis_job()
+    messages = []
+    try:
+        if job.state == jobs.CANCELLED:
+            messages.append(('warning', "Analysis cancelled."))
+        else:
+            parsed = job.result()
+            messages.extend(('warning', w) for w in parsed.warnings)
+
+            parsed_report = parsed.report
+
+            # Cache data
+            st.session_state['data_loaded'] = True
+            st.session_state['data_hash'] = data_hash
+            set_session_value('raw_swipes', parsed.raw_swipes)
+            set_session_value('report', parsed_report)
+            set_session_value('shifts', parsed.shifts)
+            st.session_state['employees'] = parsed.employees
+            st.session_state['analyzed_months'] = aggregates.input_months(parsed.raw_swipes)
+
+            # 4. Period adjustment is re-applied whenever the metadata changes, from the metadata-independent raw swipes
+            parsed_attendance = period_attendance(metadata)
+
+            # Refresh the materialized monthly aggregates (only changed months are recomputed)
+            aggregate_table, _ = history.refresh_history(parsed_attendance, parsed_report, metadata)
+            set_session_value('aggregates', aggregate_table)
+            st.session_state['aggregates_metadata'] = dict(metadata)
+            if job.stage_records:
+                st.session_state.setdefault('perf_records', {})['Analysis'] = job.stage_records
+            messages.append(('success', "Data processed successfully!"))
+
+    except ValueError as ve:
+        messages.append(('error', str(ve)))
+    except Exception as e:
+        messages.append(('error', f"An unexpected error occurred: {e}"))
+    st.session_state['analysis_messages'] = messages
+
+@st.fragment(run_every=ANALYSIS_POLL_SECONDS)
+def analysis_progress_view(metadata):
+    if 'analysis_job' not in st.session_state:
+        return
+    job = st.session_state['analysis_job'][1]
+    if job.finished:
+        collect_analysis_job(metadata)
+        st.rerun()
+
+    st.markdown("#### Processing files...")
+    stages = job.stages
+    for stage in pipeline.STAGES:
+        done, total = stages.get(stage, (0, 0))
+        st.progress(done / total if total else 0.0, text=f"{stage} ({done}/{total})")
+    position = job.queue_position
+    if position:
+        st.caption(f"Waiting for a free worker (position {position} in queue)...")
+    else:
+        st.caption(f"Elapsed: {job.elapsed:.1f}s")
+    if st.button("Cancel", disabled=job.cancel_requested):
+        release_analysis_job()
+        st.session_state['analysis_messages'] = [('warning', "Analysis cancelled.")]
+        st.rerun()
+
+# Analysis runs in the background: collect it straight away when it was already cached, otherwise poll
+if 'analysis_job' in st.session_state:
+    if st.session_state['analysis_job'][1].finished:
+        collect_analysis_job(metadata)
+    else:
+        analysis_progress_view(metadata)
+
+for level, message in st.session_state.pop('analysis_messages', []):
+    getattr(st, level)(message)
+
+def stored_aggregates(metadata):
+    # The materialized aggregate table, if it was built with the current metadata
+    aggregate_table = session_value('aggregates')
+    if aggregate_table is not None and st.session_state.get('aggregates_metadata') == dict(metadata):
+        return aggregate_table
+    return None
+
+
+# Report views run as fragments: their widgets (employee selectbox, downloads,
+# calendar interactions) rerun only the fragment, not the sidebar and uploads.
+@st.fragment
+def calendar_view(metadata):
+    from modules import calendar_ui as custom_calendar
+    st.markdown("### Employee Leave Calendar")
+    custom_calendar.render_calendar(session_value('report'), metadata)
+
+@st.fragment
+def report_downloads(selected_emp, summary_data, metadata):
+    from modules import pdf_report
+    # Monthly Report may come from stored history, so it is part of the key
+    data_key = f"{st.session_state['data_hash']}:{pipeline.metadata_key(metadata)}:{pipeline.frame_hash(summary_data['Monthly Report'])}"
+
+    # Use st.columns to put both buttons on the same row
+    btn_col1, btn_col2 = st.columns(2)
+
+    with btn_col1:
+        st.download_button(
+            label="Download Excel Report",
+            data=lambda: cached_excel_report(selected_emp, data_key, summary_data),
+            on_click="ignore",
+            file_name=f"{selected_emp}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+
+    # PDF export needs the optional markdown-pdf package
+    if pdf_report.pdf_available():
+        with btn_col2:
+            st.download_button(
+                label="Download PDF Report",
+                data=lambda: cached_pdf_report(selected_emp, data_key, summary_data),
+                on_click="ignore",
+                file_name=f"{selected_emp}.pdf",
+                mime="application/pdf"
+            )
+
+@st.fragment
+def employee_report_view(metadata):
+    from modules import aggregates
+    employees = st.session_state.get('employees', [])
+
+    if not employees:
+        st.warning("No employees found in the data.")
+        return
+
+    selected_emp = st.selectbox("Select Employee", employees)
+    if not selected_emp:
+        return
+
+    # Generate Summary (period adjustment follows the current sidebar metadata)
+    recorder = instrumentation.recording() if st.session_state.get('perf_enabled') else nullcontext()
+    summary_hash = pipeline.content_hash(f"{st.session_state['data_hash']}:{pipeline.metadata_key(metadata)}:{selected_emp}".encode("utf-8"))
+    summarize = calculations.generate_employee_summary
+    if profiling_on():
+        # The summary runs on a pool worker, which is the thread cProfile has to watch
+        summarize = session_profiler().wrap(summarize, "summary", summary_hash)
+    with recorder as perf_records:
+        attendance = period_attendance(metadata)
+        report = session_value('report')
+        summary_data = run_on_pool(summarize, selected_emp, attendance, report, metadata, session_value('shifts', pd.DataFrame()))
+
+        # Monthly totals come from the materialized aggregate table, for the analyzed months only
+        summary_data = aggregates.with_monthly_report(summary_data, stored_aggregates(metadata), selected_emp, st.session_state.get('analyzed_months', []))
+    if perf_records:
+        st.session_state.setdefault('perf_records', {})['Employee report'] = perf_records
+
+    # Display Warnings
+    if 'Warnings' in summary_data and summary_data['Warnings']:
+        for w in summary_data['Warnings']:
+            st.warning(w)
+
+    # Display Tables
+    st.markdown("### Monthly Report")
+    st.dataframe(summary_data['Monthly Report'], hide_index=True)
+
+    row1_col1, row1_col2 = st.columns(2)
+    with row1_col1:
+         st.markdown("### Overtime Detail")
+         st.dataframe(summary_data['Overtime Detail'], hide_index=True)
+    with row1_col2:
+         st.markdown("### Leave Details")
+         st.dataframe(summary_data['Leave Details'], hide_index=True)
+
+    st.markdown("### Duty Time Entries")
+    st.dataframe(summary_data['Duty Time Entries'], hide_index=True)
+
+    st.markdown("### Shift Entries")
+    st.dataframe(summary_data.get('Shift Entries', pd.DataFrame()), hide_index=True)
+
+    row2_col1, row2_col2 = st.columns(2)
+    with row2_col1:
+        st.markdown("### Visit Entries")
+        st.dataframe(summary_data['Visit Entries'], hide_index=True)
+    with row2_col2:
+        st.markdown("### Visit Weekly Summary")
+        st.dataframe(summary_data['Visit Weekly Summary'], hide_index=True)
+
+    # Download Button
+    report_downloads(selected_emp, summary_data, metadata)
+
+def build_bulk_zip(attendance, report, shifts, metadata, employees, aggregate_table, months, report_format, progress):
+    # Runs on a pool worker, so everything from the session is passed in.
+    # Reports render in-process: the pool worker is this export's share of the CPU.
+    from modules import aggregates
+    from modules import pdf_report
+    summaries = calculations.generate_all_summaries(attendance, report, metadata, shifts, employees)
+    build_zip = pdf_report.generate_pdf_zip_download if report_format == "PDF" else calculations.generate_zip_download
+    zip_data = build_zip(
+        ((emp, aggregates.with_monthly_report(summary, aggregate_table, emp, months)) for emp, summary in summaries),
+        total=len(employees),
+        max_workers=1,
+        progress=lambda done, total, emp: progress("Rendering reports", done, total),
+    )
+    return zip_data.getvalue()
+
+@st.fragment(run_every=ANALYSIS_POLL_SECONDS)
+def bulk_progress_view():
+    from modules import jobs
+    if 'bulk_job' not in st.session_state:
+        return
+    bulk_key, job = st.session_state['bulk_job']
+    if job.finished:
+        del st.session_state['bulk_job']
+        if job.state == jobs.DONE:
+            set_session_value('bulk_export', (bulk_key, job.result()))
+        elif job.state == jobs.FAILED:
+            st.session_state['bulk_message'] = f"Could not build the reports: {job.error}"
+        st.rerun()
+
+    done, total = job.stages.get("Rendering reports", (0, 0))
+    position = job.queue_position
+    if position:
+        st.caption(f"Bulk export queued behind interactive work (position {position})...")
+    else:
+        st.progress(done / total if total else 0.0, text=f"Rendering reports ({done}/{total})")
+    st.button("Cancel", on_click=job.cancel, disabled=job.cancel_requested, key="bulk_cancel")
+
+@st.fragment
+def bulk_download_view(metadata):
+    from modules import jobs
+    from modules import pdf_report
+    st.markdown("### Download All Reports")
+    employees = st.session_state.get('employees', [])
+    report_format = st.radio("Format", ["Excel", "PDF"], horizontal=True) if pdf_report.pdf_available() else "Excel"
+    bulk_key = f"{st.session_state['data_hash']}:{pipeline.metadata_key(metadata)}:{report_format}"
+
+    if st.button("Prepare All Reports (ZIP)", disabled='bulk_job' in st.session_state):
+        attendance = period_attendance(metadata)
+        job = jobs.BackgroundJob(
+            build_bulk_zip, attendance, session_value('report'), session_value('shifts', pd.DataFrame()),
+            dict(metadata), employees, stored_aggregates(metadata), st.session_state.get('analyzed_months', []), report_format, name="bulk-export",
+        )
+        try:
+            st.session_state['bulk_job'] = (bulk_key, worker_pool().submit(job, jobs.BULK))
+        except QueueFullError as e:
+            st.warning(str(e))
+
+    if 'bulk_job' in st.session_state:
+        bulk_progress_view()
+    if 'bulk_message' in st.session_state:
+        st.error(st.session_state.pop('bulk_message'))
+
+    # Only offer an archive built from the current data and metadata
+    bulk_export = session_value('bulk_export')
+    if bulk_export and bulk_export[0] == bulk_key:
+        st.download_button(
+            label="Download All Reports (ZIP)",
+            data=bulk_export[1],
+            file_name="attendance_reports.zip",
+            mime="application/zip",
+            on_click="ignore",
+        )
+
+@st.fragment
+def table_exports_view(metadata):
+    from modules import export
+    st.markdown("### Export Tables")
+    # The clinic table covers the analyzed months, from aggregates matching the current metadata
+    aggregate_table = stored_aggregates(metadata)
+    months = st.session_state.get('analyzed_months', [])
+    aggregates_key = pipeline.frame_hash(aggregate_table) if aggregate_table is not None else "recomputed"
+    data_key = f"{st.session_state['data_hash']}:{pipeline.metadata_key(metadata)}:{','.join(months)}:{aggregates_key}"
+    table_name = st.selectbox("Table", ["Clinic Monthly"] + export.DETAIL_TABLES)
+
+    # Deferred downloads run outside the script run, without access to st.session_state, so capture the inputs now
+    attendance = period_attendance(metadata)
+    report, shifts = session_value('report'), session_value('shifts', pd.DataFrame())
+    employees = st.session_state['employees']
+
+    def table_bytes(fmt):
+        tables = cached_export_tables(data_key, attendance, report, shifts, metadata, employees, aggregate_table, months)
+        return export.export_table(tables[table_name], fmt)
+
+    file_stem = table_name.lower().replace(" ", "_")
+    format_cols = st.columns(len(export.TABLE_FORMATS))
+    for col, (fmt, (extension, mime)) in zip(format_cols, export.TABLE_FORMATS.items()):
+        with col:
+            st.download_button(
+                label=f"Download {fmt.upper()}",
+                data=lambda fmt=fmt: table_bytes(fmt),
+                file_name=f"{file_stem}{extension}",
+                mime=mime,
+                on_click="ignore",
+                key=f"table_export_{fmt}",
+            )
 
 # Main Area
-if st.session_state.get('data_loaded'):
+if st.session_state.get('view_mode') == 'history':
+    from modules import aggregates
+    from modules import history
+    st.markdown("### Multi-Month Report")
+    stored = history.load_history()
+
+    if stored.empty:
+        st.warning("No stored history yet. Analyze at least one month of data first.")
+    else:
+        stored_months = sorted(stored['Month'].unique())
+        hist_col1, hist_col2, hist_col3 = st.columns(3)
+        with hist_col1:
+            hist_emp = st.selectbox("Select Employee", sorted(stored['Employee'].unique()), key='history_employee')
+        with hist_col2:
+            start_month = st.selectbox("Start Month", stored_months, index=0)
+        with hist_col3:
+            end_month = st.selectbox("End Month", stored_months, index=len(stored_months) - 1)
+
+        try:
+            range_report = history.build_range_report(stored, hist_emp, start_month, end_month)
+        except ValueError as ve:
+            st.error(str(ve))
+        else:
+            st.markdown("### Monthly Totals")
+            st.dataframe(range_report['Monthly Report'], hide_index=True)
+            st.markdown("### Range Totals")
+            st.dataframe(range_report['Totals'], hide_index=True)
+            st.markdown("### Year-to-Date Totals")
+            ytd_report = history.build_year_to_date_report(stored, hist_emp, end_month)
+            range_report['Year-to-Date'] = ytd_report['Totals']
+            st.dataframe(ytd_report['Totals'], hide_index=True)
+
+            st.markdown("### Clinic Monthly Overview")
+            st.dataframe(aggregates.clinic_monthly_table(stored, end_month), hide_index=True)
+
+            history_key = f"{pipeline.frame_hash(stored)}:{start_month}:{end_month}"
+            st.download_button(
+                label="Download Excel Report",
+                data=lambda: cached_excel_report(hist_emp, history_key, range_report),
+                on_click="ignore",
+                file_name=f"{hist_emp}_{start_month}_{end_month}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
+
+elif st.session_state.get('data_loaded'):
     view_mode = st.session_state.get('view_mode', 'report')
     
     if view_mode == 'calendar':
-        st.markdown("### Employee Leave Calendar")
-        report = st.session_state['report']
-        
-        custom_calendar.render_calendar(report, metadata)
+        calendar_view(metadata)
 
-    elif view_mode == 'report':
-        employees = st.session_state.get('employees', [])
-        
-        if not employees:
-            st.warning("No employees found in the data.")
+    elif view_mode == 'scenarios':
+        from modules import scenarios
+        st.markdown("### What-if Scenarios")
+        sc_col1, sc_col2 = st.columns(2)
+        with sc_col1:
+            late_grace_text = st.text_input("Late grace periods (minutes after period start)", value="0, 5, 10, 15")
+        with sc_col2:
+            ot_grace_text = st.text_input("Overtime grace periods (minutes after period end)", value="10")
+
+        try:
+            variants = scenarios.build_variants(
+                metadata,
+                scenarios.parse_minutes_list(late_grace_text),
+                scenarios.parse_minutes_list(ot_grace_text),
+            )
+            sweep = scenarios.run_threshold_sweep(session_value('raw_swipes'), variants)
+        except ValueError as ve:
+            st.error(str(ve))
         else:
-            selected_emp = st.selectbox("Select Employee", employees)
-            
-            if selected_emp:
-                # Generate Summary
-                attendance = st.session_state['attendance']
-                # abnormal = st.session_state['abnormal']
-                report = st.session_state['report']
-    
-                # =========================== Test ===========================
-    
-                # print("attendance: ")
-                # print(attendance.head())
-    
-                # print("abnormal:")
-                # print(abnormal.head())
-    
-                # print("report:")
-                # print(report.head())
-    
-                # =========================== Test ===========================
-                
-                # summary_data = calculations.generate_employee_summary(selected_emp, attendance, abnormal, report)
-                summary_data = calculations.generate_employee_summary(selected_emp, attendance, report, metadata, st.session_state.get('shifts', pd.DataFrame()))
-                
-                # Display Warnings
-                if 'Warnings' in summary_data and summary_data['Warnings']:
-                    for w in summary_data['Warnings']:
-                        st.warning(w)
-
-                # Display Tables
-                st.markdown("### Monthly Report")
-                st.dataframe(summary_data['Monthly Report'], hide_index=True)
-                
-                row1_col1, row1_col2 = st.columns(2)
-                with row1_col1:
-                     st.markdown("### Overtime Detail")
-                     st.dataframe(summary_data['Overtime Detail'], hide_index=True)
-                with row1_col2:
-                     st.markdown("### Leave Details")
-                     st.dataframe(summary_data['Leave Details'], hide_index=True)
-                
-                st.markdown("### Duty Time Entries")
-                st.dataframe(summary_data['Duty Time Entries'], hide_index=True)
-                
-                st.markdown("### Shift Entries")
-                st.dataframe(summary_data.get('Shift Entries', pd.DataFrame()), hide_index=True)
-                
-                row2_col1, row2_col2 = st.columns(2)
-                with row2_col1:
-                    st.markdown("### Visit Entries")
-                    st.dataframe(summary_data['Visit Entries'], hide_index=True)
-                with row2_col2:
-                    st.markdown("### Visit Weekly Summary")
-                    st.dataframe(summary_data['Visit Weekly Summary'], hide_index=True)
-                
-                # Download Button
-                excel_data = calculations.generate_excel_download(selected_emp, summary_data)
+            st.markdown("### Clinic-wide Comparison")
+            st.dataframe(sweep['Clinic'], hide_index=True)
+
+            st.markdown("### Per-Employee Comparison")
+            sc_metric = st.selectbox("Metric", scenarios.SCENARIO_TOTAL_COLUMNS)
+            per_emp_table = sweep['Per Employee'].pivot(index='Employee', columns='Scenario', values=sc_metric)[list(variants)]
+            st.dataframe(per_emp_table)
+            st.caption("Overtime here is swipe-based (minutes past the overtime start on each duty entry), before matching against overtime form entries.")
+
+    elif view_mode == 'report':
+        employee_report_view(metadata)
+        if st.session_state.get('employees'):
+            bulk_download_view(metadata)
+            table_exports_view(metadata)
+
+# Performance panel last, so it shows the stages recorded during this run
+with st.sidebar.expander("Performance"):
+    st.toggle("Record stage timings", key='perf_enabled', help="Time, row counts and peak memory per pipeline stage (slows analysis slightly)")
+    own_stats = session_data().session_stats(session_id())
+    st.caption(
+        f"This session's data: {own_stats['resident_bytes'] / 2**20:.1f} MiB resident, "
+        f"{own_stats['spilled_bytes'] / 2**20:.1f} MiB spilled"
+    )
+    # Server-wide load and other sessions are only shown to operators running with ATTENDANCE_PERF_LOG=1
+    if instrumentation.log_enabled():
+        from modules import session_store
+        pool_stats = worker_pool().stats()
+        st.caption(
+            f"Worker pool: {pool_stats['running']}/{pool_stats['max_workers']} busy "
+            f"({pool_stats['background_running']}/{pool_stats['max_background']} on analyses and exports), "
+            f"{pool_stats['queued']} queued"
+        )
+        store_stats = session_data().stats()
+        st.caption(
+            f"Session data: {store_stats['resident_bytes'] / 2**20:.1f} MiB resident, {store_stats['spilled_bytes'] / 2**20:.1f} MiB spilled "
+            f"across {store_stats['sessions']} sessions (budget {store_stats['budget_bytes'] / 2**20:.0f} MiB)"
+        )
+        st.dataframe(session_data().sessions_frame(), hide_index=True)
+        shared_bytes = sum(session_store.value_nbytes(result) for result in analysis_jobs().results())
+        st.caption(
+            f"Outside the budget: {shared_bytes / 2**20:.1f} MiB of shared analysis results "
+            f"(up to {PIPELINE_CACHE_MAX_ENTRIES} uploads for {PIPELINE_CACHE_TTL // 60} min) and cached downloads "
+            f"(up to {EXCEL_CACHE_MAX_ENTRIES} files of each kind for {EXCEL_CACHE_TTL // 60} min)"
+        )
+    for perf_label, perf_records in st.session_state.get('perf_records', {}).items():
+        st.markdown(f"**{perf_label}**")
+        st.dataframe(instrumentation.records_frame(perf_records), hide_index=True)
+
+    from modules import profiling
+    if profiling.profile_enabled() or st.query_params.get("profile") == "1":
+        st.toggle("Profile with cProfile", key='profile_enabled', value=profiling_on(), help=f"Saves .pstats files to {profiling.profile_dir()}/")
+        for capture in reversed(session_profiler().captures):
+            st.markdown(f"**{capture.label}** · {capture.timestamp} · `{capture.input_hash[:12]}` · {capture.seconds:.2f}s")
+            st.dataframe(capture.hotspots, hide_index=True)
+            stem = os.path.basename(capture.pstats_path)[:-len(".pstats")]
+            prof_col1, prof_col2 = st.columns(2)
+            with prof_col1:
+                st.download_button(
+                    label=".pstats", data=lambda path=capture.pstats_path: read_file_bytes(path),
+                    file_name=f"{stem}.pstats", mime="application/octet-stream", on_click="ignore", key=f"pstats_{stem}",
+                )
+            with prof_col2:
                 st.download_button(
-                    label="Download Excel Report",
-                    data=excel_data,
-                    file_name=f"{selected_emp}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                    label="Hotspots", data=lambda path=capture.report_path: read_file_bytes(path),
+                    file_name=f"{stem}.txt", mime="text/plain", on_click="ignore", key=f"hotspots_{stem}",
                 )
-                # # Use st.columns to put both buttons on the same row
-                # btn_col1, btn_col2 = st.columns(2)
-                
-                # with btn_col1:
-                #     st.download_button(
-                #         label="Download Excel Report",
-                #         data=excel_data,
-                #         file_name=f"{selected_emp}.xlsx",
-                #         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                #     )
-                
-                # with btn_col2:
-                #     # Generate PDF data
-                #     pdf_bytes = pdf_report.generate_pdf_report(selected_emp, summary_data)
-                #     st.download_button(
-                #         label="Download PDF Report",
-                #         data=pdf_bytes,
-                #         file_name=f"{selected_emp}.pdf",
-                #         mime="application/pdf"
-                #     )
@@ -0,0 +1 @@
+"""Performance benchmarks for the Attendance System (run as ``python -m benchmarks.<name>``)."""
@@ -0,0 +1,337 @@
+"""Differential check of optimized stages against their reference versions.
+
+Each pair runs a frozen reference implementation (:mod:`benchmarks.reference`)
+and the live one from ``modules/`` on the same inputs, diffs the outputs
+cell by cell (floats within a tolerance) and times both.  An optimization
+only lands when every pair is equivalent on every dataset.  Usage::
+
+    python -m benchmarks.equivalence                       # synthetic datasets
+    python -m benchmarks.equivalence --data att.xls ot.xlsx  # plus a real export
+    python -m benchmarks.equivalence --pairs parse_shift_report --repeat 5
+
+Exits 1 if any pair differs.
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.reference import parsing as ref_parsing
+from benchmarks.reference import summary as ref_summary
+from benchmarks.stages import METADATA, Fixture, fixture_from_bytes, synthetic_fixture
+from benchmarks.synthetic import SyntheticConfig
+from modules import parsing, schedule, summary
+from modules.pipeline import SHIFT_SHEET
+
+DEFAULT_RTOL = 1e-9
+DEFAULT_ATOL = 1e-9
+
+# Mismatches listed per pair/dataset before the rest are only counted
+MAX_REPORTED = 10
+
+DATASETS: Dict[str, SyntheticConfig] = {
+    "small": SyntheticConfig(employees=10),
+    "medium": SyntheticConfig(employees=50),
+    # Many shifted form rows, missing swipes, leaves and visits
+    "messy": SyntheticConfig(
+        employees=20, shifted_row_rate=0.3, missing_swipe_rate=0.2,
+        leave_rate=0.2, visit_rate=0.2, overtime_rate=0.3, seed=1,
+    ),
+}
+
+
+class Mismatch(NamedTuple):
+    """One difference between a reference and a candidate output."""
+
+    location: str
+    expected: Any
+    actual: Any
+
+
+class Pair(NamedTuple):
+    """A reference implementation and the optimized one it vouches for."""
+
+    reference: Callable[[Fixture], Any]
+    candidate: Callable[[Fixture], Any]
+
+
+class PairResult(NamedTuple):
+    """Outcome of one pair on one dataset."""
+
+    pair: str
+    dataset: str
+    mismatches: List[Mismatch]
+    mismatch_count: int
+    reference_s: float
+    candidate_s: float
+
+    @property
+    def equivalent(self) -> bool:
+        return self.mismatch_count == 0
+
+    @property
+    def speedup(self) -> float:
+        return self.reference_s / self.candidate_s if self.candidate_s else math.inf
+
+
+# ---------------------------------------------------------------------------
+# Diffing
+# ---------------------------------------------------------------------------
+
+def _is_missing(value: Any) -> bool:
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):  # lists, arrays
+        return False
+
+
+def _values_equal(expected: Any, actual: Any, rtol: float, atol: float) -> bool:
+    if _is_missing(expected) or _is_missing(actual):
+        return _is_missing(expected) and _is_missing(actual)
+    numbers = (int, float, np.integer, np.floating)
+    if isinstance(expected, numbers) and isinstance(actual, numbers) and not isinstance(expected, bool):
+        return math.isclose(float(expected), float(actual), rel_tol=rtol, abs_tol=atol)
+    return expected == actual
+
+
+def diff_frames(
+    expected: pd.DataFrame,
+    actual: pd.DataFrame,
+    rtol: float = DEFAULT_RTOL,
+    atol: float = DEFAULT_ATOL,
+    location: str = "",
+) -> List[Mismatch]:
+    """Compare two tables cell by cell.
+
+    Rows are matched by position (the index is ignored) and columns by name;
+    missing, extra or reordered columns and differing row counts are
+    reported as well.  NaN/None/NaT count as equal to each other, and
+    numbers are compared with ``math.isclose(rtol, atol)``.
+
+    Returns:
+        Every mismatch, as ``location[row, column]`` entries.
+    """
+    mismatches: List[Mismatch] = []
+    expected_cols, actual_cols = list(expected.columns), list(actual.columns)
+    if expected_cols != actual_cols:
+        if set(expected_cols) == set(actual_cols):
+            mismatches.append(Mismatch(f"{location}.columns order", expected_cols, actual_cols))
+        else:
+            missing = [c for c in expected_cols if c not in actual_cols]
+            extra = [c for c in actual_cols if c not in expected_cols]
+            mismatches.append(Mismatch(f"{location}.columns", missing, extra))
+    if len(expected) != len(actual):
+        mismatches.append(Mismatch(f"{location}.rows", len(expected), len(actual)))
+
+    rows = min(len(expected), len(actual))
+    for column in [c for c in expected_cols if c in actual_cols]:
+        left = expected[column].iloc[:rows].tolist()
+        right = actual[column].iloc[:rows].tolist()
+        for row, (a, b) in enumerate(zip(left, right)):
+            if not _values_equal(a, b, rtol, atol):
+                mismatches.append(Mismatch(f"{location}[{row}, {column!r}]", a, b))
+    return mismatches
+
+
+def diff_outputs(
+    expected: Any,
+    actual: Any,
+    rtol: float = DEFAULT_RTOL,
+    atol: float = DEFAULT_ATOL,
+    location: str = "",
+) -> List[Mismatch]:
+    """Recursively compare stage outputs.
+
+    Handles DataFrames (via :func:`diff_frames`), Series and arrays (as
+    one-column tables), dicts, lists/tuples and scalars.
+    """
+    if isinstance(expected, (pd.Series, np.ndarray)) and isinstance(actual, (pd.Series, np.ndarray)):
+        expected = pd.DataFrame({"value": np.asarray(expected, dtype=object)})
+        actual = pd.DataFrame({"value": np.asarray(actual, dtype=object)})
+    if isinstance(expected, pd.DataFrame) and isinstance(actual, pd.DataFrame):
+        return diff_frames(expected, actual, rtol, atol, location)
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        mismatches = []
+        for key in expected.keys() | actual.keys():
+            if key not in actual or key not in expected:
+                mismatches.append(Mismatch(f"{location}[{key!r}]", expected.get(key), actual.get(key)))
+            else:
+                mismatches += diff_outputs(expected[key], actual[key], rtol, atol, f"{location}[{key!r}]")
+        return mismatches
+    if isinstance(expected, (list, tuple)) and isinstance(actual, (list, tuple)):
+        mismatches = []
+        if len(expected) != len(actual):
+            mismatches.append(Mismatch(f"{location}.length", len(expected), len(actual)))
+        for i, (a, b) in enumerate(zip(expected, actual)):
+            mismatches += diff_outputs(a, b, rtol, atol, f"{location}[{i}]")
+        return mismatches
+    if type(expected) is not type(actual) and not (
+        isinstance(expected, (int, float, np.number)) and isinstance(actual, (int, float, np.number))
+    ):
+        return [Mismatch(f"{location}.type", type(expected).__name__, type(actual).__name__)]
+    return [] if _values_equal(expected, actual, rtol, atol) else [Mismatch(location, expected, actual)]
+
+
+# ---------------------------------------------------------------------------
+# Pairs
+# ---------------------------------------------------------------------------
+
+def _shift_sheet(fx: Fixture) -> pd.DataFrame:
+    return fx.sheets[SHIFT_SHEET]
+
+
+PAIRS: Dict[str, Pair] = {
+    "parse_attendance_report": Pair(
+        lambda fx: ref_parsing.parse_attendance_report(fx.sheets, METADATA),
+        lambda fx: parsing.parse_attendance_report(fx.sheets, METADATA),
+    ),
+    # Both parsers strip column names in place, so each gets its own copy
+    "parse_overtime_leave_report": Pair(
+        lambda fx: ref_parsing.parse_overtime_leave_report(fx.report_raw.copy()),
+        lambda fx: parsing.parse_overtime_leave_report(fx.report_raw.copy()),
+    ),
+    "parse_shift_report": Pair(
+        lambda fx: ref_parsing.parse_shift_report(_shift_sheet(fx)),
+        lambda fx: parsing.parse_shift_report(_shift_sheet(fx)),
+    ),
+    "late_minutes": Pair(
+        lambda fx: ref_summary.late_minutes(fx.attendance, METADATA),
+        lambda fx: schedule.late_minutes(
+            fx.attendance["Start Time"], fx.attendance["Period"], schedule.compile_metadata(METADATA)
+        ),
+    ),
+    "overtime_minutes": Pair(
+        lambda fx: ref_summary.overtime_minutes(fx.attendance, METADATA),
+        lambda fx: schedule.overtime_minutes(
+            fx.attendance["End Time"], fx.attendance["Period"], schedule.compile_metadata(METADATA)
+        ),
+    ),
+    "generate_all_summaries": Pair(
+        lambda fx: list(ref_summary.generate_all_summaries(fx.attendance, fx.report, METADATA, fx.shifts)),
+        lambda fx: list(summary.generate_all_summaries(fx.attendance, fx.report, METADATA, fx.shifts)),
+    ),
+}
+
+
+# ---------------------------------------------------------------------------
+# Running
+# ---------------------------------------------------------------------------
+
+def _timed(func: Callable[[Fixture], Any], fixture: Fixture, repeat: int) -> Tuple[Any, float]:
+    """Return the first call's output and the median time of *repeat* calls."""
+    samples, output = [], None
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = func(fixture)
+        samples.append(time.perf_counter() - start)
+        if i == 0:
+            output = result
+    return output, statistics.median(samples)
+
+
+def check_pair(
+    name: str,
+    fixture: Fixture,
+    dataset: str,
+    repeat: int = 3,
+    rtol: float = DEFAULT_RTOL,
+    atol: float = DEFAULT_ATOL,
+) -> PairResult:
+    """Run pair *name* on *fixture*, diff the outputs and time both sides."""
+    pair = PAIRS[name]
+    expected, reference_s = _timed(pair.reference, fixture, repeat)
+    actual, candidate_s = _timed(pair.candidate, fixture, repeat)
+    mismatches = diff_outputs(expected, actual, rtol, atol, name)
+    return PairResult(name, dataset, mismatches[:MAX_REPORTED], len(mismatches), reference_s, candidate_s)
+
+
+def run_checks(
+    fixtures: Dict[str, Fixture],
+    pairs: List[str],
+    repeat: int = 3,
+    rtol: float = DEFAULT_RTOL,
+    atol: float = DEFAULT_ATOL,
+) -> List[PairResult]:
+    """Check every pair in *pairs* against every fixture."""
+    return [
+        check_pair(name, fixture, dataset, repeat, rtol, atol)
+        for dataset, fixture in fixtures.items()
+        for name in pairs
+    ]
+
+
+def _load_files(attendance_path: str, report_path: str) -> Fixture:
+    with open(attendance_path, "rb") as f:
+        attendance_bytes = f.read()
+    with open(report_path, "rb") as f:
+        report_bytes = f.read()
+    return fixture_from_bytes(
+        attendance_bytes, report_bytes, os.path.basename(attendance_path), os.path.basename(report_path)
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.equivalence", description=__doc__.splitlines()[0])
+    parser.add_argument("--datasets", nargs="*", choices=list(DATASETS), default=list(DATASETS))
+    parser.add_argument(
+        "--data", nargs=2, action="append", default=[], metavar=("ATTENDANCE", "REPORT"),
+        help="A real attendance/report pair to check as well (repeatable)",
+    )
+    parser.add_argument("--pairs", nargs="+", choices=list(PAIRS), default=list(PAIRS))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed calls per side (median kept)")
+    parser.add_argument("--rtol", type=float, default=DEFAULT_RTOL)
+    parser.add_argument("--atol", type=float, default=DEFAULT_ATOL)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    fixtures = {name: synthetic_fixture(DATASETS[name]) for name in args.datasets}
+    for attendance_path, report_path in args.data:
+        fixtures[os.path.basename(attendance_path)] = _load_files(attendance_path, report_path)
+
+    results = run_checks(fixtures, args.pairs, args.repeat, args.rtol, args.atol)
+    print(f"{'pair':<30}{'dataset':<16}{'reference':>12}{'optimized':>12}{'speedup':>10}  result")
+    for r in results:
+        status = "equal" if r.equivalent else f"{r.mismatch_count} DIFFERENCES"
+        print(
+            f"{r.pair:<30}{r.dataset:<16}{r.reference_s * 1000:>9.2f} ms{r.candidate_s * 1000:>9.2f} ms"
+            f"{r.speedup:>9.1f}x  {status}"
+        )
+        for m in r.mismatches:
+            print(f"    {m.location}: expected {m.expected!r}, got {m.actual!r}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                [
+                    {
+                        "pair": r.pair,
+                        "dataset": r.dataset,
+                        "equivalent": r.equivalent,
+                        "mismatches": r.mismatch_count,
+                        "reference_s": r.reference_s,
+                        "candidate_s": r.candidate_s,
+                        "speedup": r.speedup,
+                        "examples": [
+                            {"location": m.location, "expected": repr(m.expected), "actual": repr(m.actual)}
+                            for m in r.mismatches
+                        ],
+                    }
+                    for r in results
+                ],
+                f,
+                indent=2,
+                ensure_ascii=False,
+            )
+    return 0 if all(r.equivalent for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Compare Excel writer backends on a year of Duty Time Entries.
+
+Each backend runs in a fresh spawned process so peak RSS readings are not
+polluted by earlier runs.  Usage::
+
+    python -m benchmarks.excel_writer [--employees 40] [--repeat 3] [--json out.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from modules.export import EXCEL_BACKENDS, generate_excel_download
+
+DAYS_PER_YEAR = 365
+
+
+def make_duty_entries(employees: int, seed: int = 0) -> pd.DataFrame:
+    """Build a synthetic year of Duty Time Entries for *employees* people."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2025-01-01", periods=DAYS_PER_YEAR).strftime("%Y-%m-%d")
+    rows = employees * DAYS_PER_YEAR * 2
+    start = rng.integers(7 * 60 + 40, 8 * 60 + 20, rows)
+    end = rng.integers(11 * 60 + 50, 12 * 60 + 40, rows)
+    night = np.tile([0, 8 * 60], rows // 2)
+    start, end = start + night, end + night
+
+    def hhmm(minutes: np.ndarray) -> List[str]:
+        return [f"{m // 60:02d}:{m % 60:02d}" for m in minutes]
+
+    return pd.DataFrame({
+        "Employee": np.repeat([f"Employee {i}" for i in range(employees)], DAYS_PER_YEAR * 2),
+        "Date": np.tile(np.repeat(dates, 2), employees),
+        "Period": np.tile(["早診", "晚診"], rows // 2),
+        "Start Time": hhmm(start),
+        "Adjusted Start Time": hhmm(np.maximum(start, 8 * 60 + night)),
+        "End Time": hhmm(end),
+        "Adjusted End Time": hhmm(np.minimum(end, 12 * 60 + night)),
+        "Total Duration (hr)": np.round((np.minimum(end, 12 * 60 + night) - np.maximum(start, 8 * 60 + night)) / 60, 2),
+        "Overtime Duration (min)": np.maximum(end - (12 * 60 + 10 + night), 0).astype(float),
+        "Late Duration (min)": np.maximum(start - (8 * 60 + 5 + night), 0).astype(float),
+    })
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _measure(backend: str, employees: int, repeat: int, results) -> None:
+    summary = {"Warnings": [], "Duty Time Entries": make_duty_entries(employees)}
+    baseline = _peak_rss_mb()
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        size = len(generate_excel_download("benchmark", summary, backend).getbuffer())
+        timings.append(time.perf_counter() - t0)
+    results.put({
+        "backend": backend,
+        "rows": len(summary["Duty Time Entries"]),
+        "best_s": round(min(timings), 3),
+        "mean_s": round(sum(timings) / len(timings), 3),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "rss_growth_mb": round(_peak_rss_mb() - baseline, 1),
+        "xlsx_kb": round(size / 1024, 1),
+    })
+
+
+def run(employees: int = 40, repeat: int = 3) -> List[Dict]:
+    """Benchmark every backend in ``EXCEL_BACKENDS`` and return the rows."""
+    ctx = multiprocessing.get_context("spawn")
+    rows = []
+    for backend in EXCEL_BACKENDS:
+        results = ctx.Queue()
+        proc = ctx.Process(target=_measure, args=(backend, employees, repeat, results))
+        proc.start()
+        rows.append(results.get())
+        proc.join()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    rows = run(args.employees, args.repeat)
+    print(pd.DataFrame(rows).to_string(index=False))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
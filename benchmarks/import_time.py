@@ -0,0 +1,115 @@
+"""Report what app start-up spends on imports.
+
+Imports everything ``app.py`` imports at module level in a fresh interpreter
+run with ``-X importtime``, then prints the slowest imports and which of the
+heavy optional packages were pulled in.  Usage::
+
+    python -m benchmarks.import_time [--app app.py] [--top 15] [--json out.json]
+"""
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, NamedTuple, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that should only load when their feature is used
+HEAVY_PACKAGES = ("openpyxl", "xlrd", "tabulate", "streamlit_calendar", "markdown_pdf", "fitz")
+
+
+class ImportTiming(NamedTuple):
+    """One ``-X importtime`` line; times in microseconds."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def startup_imports(app_path: str) -> List[str]:
+    """Return the modules imported at the top level of *app_path*."""
+    with open(app_path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=app_path)
+
+    modules: List[str] = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            # ``from modules import pipeline`` imports the sub-module too
+            modules.extend(f"{node.module}.{alias.name}" for alias in node.names)
+    return modules
+
+
+def parse_importtime(stderr: str) -> List[ImportTiming]:
+    """Parse ``-X importtime`` output into :class:`ImportTiming` rows."""
+    timings: List[ImportTiming] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        timings.append(ImportTiming(name.strip(), int(self_us), int(cumulative_us), depth))
+    return timings
+
+
+_PROBE = """
+import importlib, json, sys
+for name in {modules!r}:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        module, _, attr = name.rpartition(".")
+        getattr(importlib.import_module(module), attr)
+print(json.dumps([name for name in {heavy!r} if name in sys.modules]))
+"""
+
+
+def measure_imports(modules: List[str]) -> Dict[str, Any]:
+    """Import *modules* in a fresh interpreter and collect timings.
+
+    Returns:
+        A dict with 'total_ms', 'heavy_loaded' and 'timings' (a list of
+        :class:`ImportTiming` for top-level imports, slowest first).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(modules=modules, heavy=HEAVY_PACKAGES)],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    timings = parse_importtime(result.stderr)
+    top_level = sorted((t for t in timings if t.depth == 0), key=lambda t: t.cumulative_us, reverse=True)
+    return {
+        "total_ms": sum(t.cumulative_us for t in top_level) / 1000,
+        "heavy_loaded": json.loads(result.stdout.strip().splitlines()[-1]),
+        "timings": top_level,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_time", description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(REPO_ROOT, "app.py"), help="Streamlit entry point to inspect")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = measure_imports(startup_imports(args.app))
+    print(f"Start-up imports: {report['total_ms']:.0f} ms")
+    for timing in report["timings"][:args.top]:
+        print(f"  {timing.cumulative_us / 1000:8.1f} ms  {timing.module}")
+    print(f"Heavy packages loaded: {', '.join(report['heavy_loaded']) or 'none'}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {**report, "timings": [t._asdict() for t in report["timings"]]},
+                f, indent=2,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,383 @@
+"""Concurrent-session load test of the Streamlit app.
+
+Simulates *N* browser sessions in one process with Streamlit's ``AppTest``.
+Each session opens the app, uploads a synthetic month, presses Analyze,
+polls until the background analysis is collected and then switches between
+employees.  All sessions share the process's ``st.cache_*`` stores and the
+analysis job registry, exactly as they would share one server, so the
+process's RSS and CPU stand in for the server's.  Usage::
+
+    python -m benchmarks.load_test --sessions 8 [--switches 5] [--json load.json]
+    python -m benchmarks.load_test --sessions 4 --shared-files   # same upload everywhere
+
+Reported per action (page load, upload, analyze click, poll, employee
+switch): p50/p95/max script-run latency; per session: the time from
+pressing Analyze until the result was shown.  A wide spread between
+sessions' analysis times means one user's work is starving the others.
+``--max-p95`` turns the run into a pass/fail check.
+
+The app writes ``config.json`` and ``history.csv`` to its working
+directory, so the sessions run in a scratch directory (``--workdir``).
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from benchmarks.import_time import REPO_ROOT
+from benchmarks.synthetic import SyntheticConfig, generate_dataset
+
+SAMPLE_INTERVAL_S = 0.2
+POLL_INTERVAL_S = 0.5
+ACTIONS = ("load", "upload", "analyze", "poll", "switch")
+
+
+class RunSample(NamedTuple):
+    """One script run of one session."""
+
+    session: int
+    action: str
+    seconds: float
+
+
+class SessionResult(NamedTuple):
+    """What one simulated user experienced."""
+
+    session: int
+    runs: List[RunSample]
+    analysis_s: Optional[float]
+    errors: List[str]
+
+
+# ---------------------------------------------------------------------------
+# Process resources
+# ---------------------------------------------------------------------------
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (peak RSS where /proc is missing)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _cpu_seconds() -> float:
+    times = os.times()
+    return times.user + times.system
+
+
+class ResourceSampler:
+    """Samples RSS and CPU utilisation in a background thread.
+
+    CPU is reported as a percentage of one core, so a busy 4-core run can
+    show up to 400%.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_S) -> None:
+        self.interval = interval
+        self.rss: List[int] = []
+        self.cpu_percent: List[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+
+    def __enter__(self) -> "ResourceSampler":
+        self._start_cpu, self._start_wall = _cpu_seconds(), time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.cpu_seconds = _cpu_seconds() - self._start_cpu
+        self.wall_seconds = time.perf_counter() - self._start_wall
+
+    def _run(self) -> None:
+        last_cpu, last_wall = _cpu_seconds(), time.perf_counter()
+        while not self._stop.wait(self.interval):
+            cpu, wall = _cpu_seconds(), time.perf_counter()
+            self.rss.append(current_rss_bytes())
+            self.cpu_percent.append(100 * (cpu - last_cpu) / (wall - last_wall))
+            last_cpu, last_wall = cpu, wall
+
+    def summary(self) -> Dict[str, float]:
+        mib = 1024 * 1024
+        return {
+            "rss_peak_mib": round(max(self.rss, default=current_rss_bytes()) / mib, 1),
+            "rss_end_mib": round(current_rss_bytes() / mib, 1),
+            "cpu_mean_percent": round(100 * self.cpu_seconds / self.wall_seconds, 1),
+            "cpu_peak_percent": round(max(self.cpu_percent, default=0.0), 1),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Sessions
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def shared_server_state() -> Iterator[None]:
+    """Give concurrent ``AppTest`` sessions the state one server would share.
+
+    ``AppTest.run`` is written for one test at a time:
+
+    * it installs a fresh mock ``Runtime`` and clears it when the run ends,
+      pulling the runtime from under any other session still running;
+    * it compiles the script with a fresh ``ScriptCache`` on every run,
+      and concurrent ``ast.parse`` calls are not thread-safe on Python 3.11.
+
+    Inside this block the last installed runtime stays visible and the
+    script is compiled once, as a real server does.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    original_instance = Runtime.__dict__["instance"]
+    original_bytecode = ScriptCache.get_bytecode
+    latest: List[Any] = []
+    compiled: Dict[str, Any] = {}
+    compile_lock = threading.Lock()
+
+    def instance(cls: type) -> Any:
+        if cls._instance is not None:
+            latest[:] = [cls._instance]
+        return latest[0] if latest else original_instance.__func__(cls)
+
+    def get_bytecode(self: Any, script_path: str) -> Any:
+        with compile_lock:
+            if script_path not in compiled:
+                compiled[script_path] = original_bytecode(self, script_path)
+            return compiled[script_path]
+
+    Runtime.instance = classmethod(instance)
+    ScriptCache.get_bytecode = get_bytecode
+    try:
+        yield
+    finally:
+        Runtime.instance = original_instance
+        ScriptCache.get_bytecode = original_bytecode
+
+
+def _timed_run(at: Any, session: int, action: str, runs: List[RunSample]) -> None:
+    start = time.perf_counter()
+    at.run()
+    runs.append(RunSample(session, action, time.perf_counter() - start))
+
+
+def run_session(
+    session: int,
+    app_path: str,
+    files: Tuple[str, str],
+    switches: int,
+    timeout: float,
+    start_gate: Optional[threading.Barrier] = None,
+) -> SessionResult:
+    """Drive one simulated user through upload → analyze → employee switches."""
+    from streamlit.testing.v1 import AppTest
+
+    with open(files[0], "rb") as f:
+        attendance_bytes = f.read()
+    with open(files[1], "rb") as f:
+        report_bytes = f.read()
+
+    runs: List[RunSample] = []
+    errors: List[str] = []
+    analysis_s = None
+    at = AppTest.from_file(app_path, default_timeout=timeout)
+    if start_gate is not None:
+        start_gate.wait()
+    try:
+        _timed_run(at, session, "load", runs)
+        at.sidebar.file_uploader[0].upload(os.path.basename(files[0]), attendance_bytes)
+        _timed_run(at, session, "upload", runs)
+        at.sidebar.file_uploader[1].upload(os.path.basename(files[1]), report_bytes)
+        _timed_run(at, session, "upload", runs)
+
+        analyze = next(b for b in at.sidebar.button if b.label == "Analyze Data")
+        start = time.perf_counter()
+        analyze.click()
+        _timed_run(at, session, "analyze", runs)
+        while "analysis_job" in at.session_state:
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError(f"analysis did not finish within {timeout:.0f}s")
+            time.sleep(POLL_INTERVAL_S)
+            _timed_run(at, session, "poll", runs)
+        analysis_s = time.perf_counter() - start
+
+        employees = at.session_state["employees"] if "employees" in at.session_state else []
+        for i in range(switches if employees else 0):
+            select = next(s for s in at.selectbox if s.label == "Select Employee")
+            select.select(employees[(i + 1) % len(employees)])
+            _timed_run(at, session, "switch", runs)
+        errors.extend(str(e.value) for e in at.exception)
+    except Exception as exc:  # reported, the other sessions carry on
+        errors.append(f"{type(exc).__name__}: {exc}")
+    return SessionResult(session, runs, analysis_s, errors)
+
+
+def prepare_files(output_dir: str, sessions: int, employees: int, shared: bool) -> List[Tuple[str, str]]:
+    """Write one synthetic upload pair per session (or one shared pair)."""
+    files = []
+    for session in range(1 if shared else sessions):
+        session_dir = os.path.join(output_dir, f"session-{session}")
+        files.append(generate_dataset(session_dir, SyntheticConfig(employees=employees, seed=session))[0])
+    return files * sessions if shared else files
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def latency_table(results: List[SessionResult]) -> Dict[str, Dict[str, float]]:
+    """Return p50/p95/max milliseconds per action and over all runs."""
+    by_action: Dict[str, List[float]] = defaultdict(list)
+    for result in results:
+        for run in result.runs:
+            by_action[run.action].append(run.seconds)
+            by_action["all"].append(run.seconds)
+    return {
+        action: {
+            "runs": len(samples),
+            "p50_ms": round(percentile(samples, 50) * 1000, 1),
+            "p95_ms": round(percentile(samples, 95) * 1000, 1),
+            "max_ms": round(max(samples) * 1000, 1),
+        }
+        for action in (*ACTIONS, "all")
+        if (samples := by_action.get(action))
+    }
+
+
+def run_load_test(
+    sessions: int,
+    app_path: str = os.path.join(REPO_ROOT, "app.py"),
+    employees: int = 20,
+    switches: int = 5,
+    shared_files: bool = False,
+    timeout: float = 300.0,
+    workdir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Run *sessions* concurrent users and return a JSON-serializable report.
+
+    Args:
+        sessions: Simulated concurrent users.
+        app_path: Streamlit entry point.
+        employees: Employees in each synthetic upload.
+        switches: Employee switches per session after analysis.
+        shared_files: Upload the same files in every session (exercises the
+            shared job cache) instead of one distinct month per session.
+        timeout: Seconds allowed for any script run and for each analysis.
+        workdir: Scratch working directory; a temporary one by default.
+    """
+    scratch = workdir or tempfile.mkdtemp(prefix="attendance-load-")
+    os.makedirs(scratch, exist_ok=True)
+    if os.path.exists(os.path.join(REPO_ROOT, "config.json")):
+        shutil.copy(os.path.join(REPO_ROOT, "config.json"), scratch)
+    files = prepare_files(os.path.join(scratch, "uploads"), sessions, employees, shared_files)
+
+    previous_cwd = os.getcwd()
+    os.chdir(scratch)
+    results: List[Optional[SessionResult]] = [None] * sessions
+    gate = threading.Barrier(sessions)
+
+    def worker(index: int) -> None:
+        results[index] = run_session(index, app_path, files[index], switches, timeout, gate)
+
+    threads = [threading.Thread(target=worker, args=(i,), name=f"session-{i}") for i in range(sessions)]
+    try:
+        with shared_server_state(), ResourceSampler() as sampler:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    finally:
+        os.chdir(previous_cwd)
+        if workdir is None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    finished = [r for r in results if r is not None]
+    analysis = [r.analysis_s for r in finished if r.analysis_s is not None]
+    import streamlit
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "streamlit": streamlit.__version__,
+        "cpu_count": os.cpu_count(),
+        "sessions": sessions,
+        "employees": employees,
+        "switches": switches,
+        "shared_files": shared_files,
+        "wall_s": round(sampler.wall_seconds, 2),
+        "latency": latency_table(finished),
+        "analysis_s": {
+            "per_session": [round(r.analysis_s, 2) if r.analysis_s is not None else None for r in finished],
+            "p50": round(percentile(analysis, 50), 2),
+            "max": round(max(analysis, default=0.0), 2),
+        },
+        "resources": sampler.summary(),
+        "errors": {r.session: r.errors for r in finished if r.errors},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load_test", description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent simulated users")
+    parser.add_argument("--app", default=os.path.join(REPO_ROOT, "app.py"), help="Streamlit entry point")
+    parser.add_argument("--employees", type=int, default=20, help="Employees per synthetic upload")
+    parser.add_argument("--switches", type=int, default=5, help="Employee switches per session")
+    parser.add_argument("--shared-files", action="store_true", help="Every session uploads the same files")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds allowed per run and per analysis")
+    parser.add_argument("--workdir", help="Scratch directory to run in (kept afterwards)")
+    parser.add_argument("--max-p95", type=float, help="Fail if the p95 of all script runs exceeds this many ms")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args(argv)
+    # AppTest logs a line per cache it creates outside a server runtime
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    report = run_load_test(
+        args.sessions, args.app, args.employees, args.switches, args.shared_files, args.timeout, args.workdir
+    )
+
+    print(f"{args.sessions} sessions, {report['wall_s']:.1f}s wall, {report['cpu_count']} CPUs")
+    print(f"{'action':<10}{'runs':>6}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for action, stats in report["latency"].items():
+        print(f"{action:<10}{stats['runs']:>6}{stats['p50_ms']:>10.0f}{stats['p95_ms']:>10.0f}{stats['max_ms']:>10.0f}")
+    analysis = report["analysis_s"]
+    print(f"analysis per session (s): {analysis['per_session']} (p50 {analysis['p50']}, max {analysis['max']})")
+    res = report["resources"]
+    print(
+        f"RSS peak {res['rss_peak_mib']} MiB (end {res['rss_end_mib']} MiB), "
+        f"CPU mean {res['cpu_mean_percent']}% / peak {res['cpu_peak_percent']}% of one core"
+    )
+    for session, errors in report["errors"].items():
+        print(f"session {session} errors: {errors}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if report["errors"]:
+        return 1
+    if args.max_p95 is not None and report["latency"]["all"]["p95_ms"] > args.max_p95:
+        print(f"p95 {report['latency']['all']['p95_ms']:.0f} ms exceeds {args.max_p95:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Frozen reference implementations for :mod:`benchmarks.equivalence`."""
@@ -0,0 +1,48 @@
+"""Reference (row-at-a-time) summary helpers.
+
+Counterparts of the vectorized helpers in :mod:`modules.schedule` and of the
+one-pass :func:`modules.summary.generate_all_summaries`, written the way the
+summary code computed them before those optimizations.  Like
+:mod:`benchmarks.reference.parsing`, these exist only to be compared
+against; keep them slow and obvious.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from modules.summary import generate_employee_summary
+from modules.time_utils import Metadata, calc_late_time, calc_overtime
+
+
+def late_minutes(swipes: pd.DataFrame, metadata: Metadata) -> pd.Series:
+    """Late minutes per swipe row via :func:`calc_late_time`."""
+    if swipes.empty:
+        return pd.Series(dtype=float)
+    return swipes.apply(lambda row: calc_late_time(row, metadata), axis=1)
+
+
+def overtime_minutes(duty: pd.DataFrame, metadata: Metadata) -> pd.Series:
+    """Overtime minutes per swipe row via :func:`calc_overtime`."""
+    if duty.empty:
+        return pd.Series(dtype=float)
+    return duty.apply(lambda row: calc_overtime(row, metadata), axis=1)
+
+
+def generate_all_summaries(
+    attendance_df: pd.DataFrame,
+    overtime_df: pd.DataFrame,
+    metadata: Metadata,
+    shift_df: Optional[pd.DataFrame] = None,
+    employees: Optional[List[str]] = None,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Summarise each employee from the full, unsplit inputs."""
+    if employees is None:
+        employees = sorted(
+            set(attendance_df["Employee"].dropna().unique())
+            | set(overtime_df["Employee"].dropna().unique())
+        )
+    for employee in employees:
+        yield employee, generate_employee_summary(
+            employee, attendance_df, overtime_df, metadata, shift_df
+        )
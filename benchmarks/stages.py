@@ -0,0 +1,238 @@
+"""Benchmark every pipeline stage on synthetic data of several sizes.
+
+Each case is timed ``--repeat`` times (after one warm-up call) on workbooks
+from :mod:`benchmarks.synthetic`, and the median is compared with a stored
+JSON baseline; a case that got slower than the baseline by more than
+``--threshold`` fails the run, and so does a missing baseline unless
+``--save`` is given.  Usage::
+
+    python -m benchmarks.stages --save              # record a baseline
+    python -m benchmarks.stages [--threshold 0.25]  # compare against it
+    python -m benchmarks.stages --sizes small --cases parse_overtime_leave_report
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import pandas as pd
+
+from benchmarks.synthetic import SyntheticConfig, generate_dataset
+from modules.calendar_ui import build_leave_events
+from modules.export import generate_excel_download
+from modules.file_io import read_file_by_extension
+from modules.parsing import (
+    apply_period_config,
+    extract_raw_swipes,
+    parse_attendance_report,
+    parse_overtime_leave_report,
+    parse_shift_report,
+)
+from modules.pipeline import SHIFT_SHEET
+from modules.summary import generate_all_summaries, generate_employee_summary
+from modules.validation import validate_attendance_report, validate_overtime_report
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "stages.json")
+DEFAULT_THRESHOLD = 0.25
+
+# Differences below this are timer noise, whatever the ratio
+NOISE_FLOOR_S = 0.002
+
+# Employees per synthetic month
+SIZES: Dict[str, int] = {"small": 10, "medium": 50, "large": 200}
+
+METADATA = {
+    "morning_start": "08:00",
+    "morning_end": "12:00",
+    "morning_ot_start": "12:10",
+    "morning_late": "08:05",
+    "night_start": "16:00",
+    "night_end": "20:00",
+    "night_ot_start": "20:10",
+    "night_late": "16:05",
+}
+
+
+class Fixture(NamedTuple):
+    """One size's inputs, each stage's output pre-computed for the next."""
+
+    attendance_bytes: bytes
+    report_bytes: bytes
+    sheets: Dict[str, pd.DataFrame]
+    report_raw: pd.DataFrame
+    raw_swipes: pd.DataFrame
+    attendance: pd.DataFrame
+    report: pd.DataFrame
+    shifts: pd.DataFrame
+    employee: str
+    summary: Dict[str, Any]
+
+
+def _upload(data: bytes, name: str) -> io.BytesIO:
+    buffer = io.BytesIO(data)
+    buffer.name = name
+    return buffer
+
+
+def build_fixture(employees: int, seed: int = 0) -> Fixture:
+    """Generate one synthetic month for *employees* and parse it once."""
+    return synthetic_fixture(SyntheticConfig(employees=employees, months=1, seed=seed))
+
+
+def synthetic_fixture(config: SyntheticConfig) -> Fixture:
+    """Generate the first month described by *config* and parse it once."""
+    with tempfile.TemporaryDirectory() as tmp:
+        attendance_path, report_path = generate_dataset(tmp, config._replace(months=1))[0]
+        with open(attendance_path, "rb") as f:
+            attendance_bytes = f.read()
+        with open(report_path, "rb") as f:
+            report_bytes = f.read()
+    return fixture_from_bytes(attendance_bytes, report_bytes)
+
+
+def fixture_from_bytes(
+    attendance_bytes: bytes,
+    report_bytes: bytes,
+    attendance_name: str = "attendance.xlsx",
+    report_name: str = "report.xlsx",
+) -> Fixture:
+    """Parse an attendance/report workbook pair into a :class:`Fixture`.
+
+    The names only select the reader (``.xls`` vs ``.xlsx``), so real exports
+    can be benchmarked as well as generated ones.
+    """
+    sheets = read_file_by_extension(_upload(attendance_bytes, attendance_name))
+    report_raw = read_file_by_extension(_upload(report_bytes, report_name))
+    raw_swipes = extract_raw_swipes(sheets)
+    attendance = apply_period_config(raw_swipes, METADATA)
+    report = parse_overtime_leave_report(report_raw.copy())
+    shifts = parse_shift_report(sheets[SHIFT_SHEET]) if SHIFT_SHEET in sheets else pd.DataFrame()
+    employee = sorted(raw_swipes["Employee"].unique())[0]
+    summary = generate_employee_summary(employee, attendance, report, METADATA, shifts)
+    return Fixture(
+        attendance_bytes, report_bytes, sheets, report_raw, raw_swipes,
+        attendance, report, shifts, employee, summary,
+    )
+
+
+CASES: Dict[str, Callable[[Fixture], Any]] = {
+    "read_attendance": lambda fx: read_file_by_extension(_upload(fx.attendance_bytes, "attendance.xlsx")),
+    "read_report": lambda fx: read_file_by_extension(_upload(fx.report_bytes, "report.xlsx")),
+    "validate_attendance_report": lambda fx: validate_attendance_report(fx.sheets, "attendance.xlsx"),
+    "validate_overtime_report": lambda fx: validate_overtime_report(fx.report_raw, "report.xlsx"),
+    "extract_raw_swipes": lambda fx: extract_raw_swipes(fx.sheets),
+    "apply_period_config": lambda fx: apply_period_config(fx.raw_swipes, METADATA),
+    "parse_attendance_report": lambda fx: parse_attendance_report(fx.sheets, METADATA),
+    # The parser strips column names in place, so give it its own copy
+    "parse_overtime_leave_report": lambda fx: parse_overtime_leave_report(fx.report_raw.copy()),
+    "parse_shift_report": lambda fx: parse_shift_report(fx.sheets[SHIFT_SHEET]),
+    "generate_employee_summary": lambda fx: generate_employee_summary(
+        fx.employee, fx.attendance, fx.report, METADATA, fx.shifts
+    ),
+    "generate_all_summaries": lambda fx: list(
+        generate_all_summaries(fx.attendance, fx.report, METADATA, fx.shifts)
+    ),
+    "generate_excel_download": lambda fx: generate_excel_download(fx.employee, fx.summary),
+    "build_leave_events": lambda fx: build_leave_events(fx.report, METADATA),
+}
+
+
+def time_case(func: Callable[[Fixture], Any], fixture: Fixture, repeat: int) -> Dict[str, float]:
+    """Return median/min seconds of *repeat* calls after one warm-up call."""
+    func(fixture)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(fixture)
+        samples.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "rounds": repeat}
+
+
+def run_suite(sizes: List[str], cases: List[str], repeat: int) -> Dict[str, Dict[str, float]]:
+    """Time *cases* at each of *sizes*; keys are ``'<case>[<size>]'``."""
+    results: Dict[str, Dict[str, float]] = {}
+    for size in sizes:
+        fixture = build_fixture(SIZES[size])
+        for case in cases:
+            results[f"{case}[{size}]"] = time_case(CASES[case], fixture, repeat)
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[str]:
+    """Return a message for every case slower than its baseline by more than *threshold*.
+
+    Cases missing from either side are skipped, as are differences under
+    ``NOISE_FLOOR_S``.
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        before, after = baseline[key]["median_s"], result["median_s"]
+        if after - before > NOISE_FLOOR_S and after > before * (1 + threshold):
+            regressions.append(
+                f"{key}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms ({after / before - 1:+.0%})"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.stages", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"])
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=5, help="Timed calls per case (median kept)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare with or save to")
+    parser.add_argument("--save", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown, e.g. 0.25 = 25%%")
+    parser.add_argument("--json", help="Also write this run's results to this file")
+    args = parser.parse_args(argv)
+    if not args.save and not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save to record one.", file=sys.stderr)
+        return 2
+
+    results = run_suite(args.sizes, args.cases, args.repeat)
+    for key, result in results.items():
+        print(f"{key:<45}{result['median_s'] * 1000:>10.2f} ms")
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    if regressions:
+        return 1
+    print(f"No regressions beyond {args.threshold:.0%} of {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""Start-up profile: per-module import cost and time to first frame.
+
+Every measurement runs in a fresh interpreter so earlier imports cannot hide
+later ones.  For each ``modules.*`` sub-module two numbers are recorded:
+
+* ``cold_ms`` – importing the module alone, dependencies included.
+* ``marginal_ms`` – importing it after ``pandas`` and ``streamlit`` are
+  already loaded, which is what app start-up actually pays for it.
+
+The app itself is timed with Streamlit's ``AppTest``: ``imports_ms`` is the
+cost of everything ``app.py`` imports at top level, ``first_frame_ms`` the
+first script run on top of those (config loading and widget construction)
+and ``rerun_ms`` a second run.  Usage::
+
+    python -m benchmarks.startup [--repeat 3] [--json startup.json]
+"""
+
+import argparse
+import json
+import os
+import pkgutil
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks.import_time import REPO_ROOT, parse_importtime, startup_imports
+
+PRELOADED = ("pandas", "streamlit")
+
+
+def project_modules() -> List[str]:
+    """Return every ``modules.*`` sub-module name."""
+    return [
+        f"modules.{info.name}"
+        for info in pkgutil.iter_modules([os.path.join(REPO_ROOT, "modules")])
+    ]
+
+
+def _run_python(code: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    return subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+
+
+def module_import_ms(module: str, preload: tuple = ()) -> float:
+    """Return the cumulative import time of *module* in a fresh interpreter."""
+    code = "".join(f"import {name}\n" for name in preload) + f"import {module}\n"
+    timings = parse_importtime(_run_python(code, importtime=True).stderr)
+    # The last top-level entry for the module is its own import
+    matches = [t for t in timings if t.module == module]
+    return matches[-1].cumulative_us / 1000 if matches else 0.0
+
+
+_APP_PROBE = """
+import importlib, json, os, sys, time
+os.environ.setdefault("STREAMLIT_BROWSER_GATHER_USAGE_STATS", "false")
+start = time.perf_counter()
+for name in {modules!r}:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        module, _, attr = name.rpartition(".")
+        getattr(importlib.import_module(module), attr)
+imports = time.perf_counter() - start
+
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=60)
+start = time.perf_counter()
+at.run()
+first_frame = time.perf_counter() - start
+start = time.perf_counter()
+at.run()
+rerun = time.perf_counter() - start
+print(json.dumps({{
+    "imports_ms": imports * 1000,
+    "first_frame_ms": first_frame * 1000,
+    "rerun_ms": rerun * 1000,
+    "exceptions": [str(e.value) for e in at.exception],
+}}))
+"""
+
+
+def app_first_frame(app_path: str) -> Dict[str, Any]:
+    """Time the app's imports, first script run and a rerun via ``AppTest``."""
+    code = _APP_PROBE.format(modules=startup_imports(app_path), app=app_path)
+    return json.loads(_run_python(code).stdout.strip().splitlines()[-1])
+
+
+def _median(samples: List[float]) -> float:
+    return round(statistics.median(samples), 2)
+
+
+def profile_startup(app_path: str, repeat: int = 3, modules: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Collect the full start-up profile as a JSON-serializable dict.
+
+    Args:
+        app_path: Streamlit entry point.
+        repeat: Fresh-interpreter runs per measurement; medians are kept.
+        modules: Sub-modules to time; defaults to :func:`project_modules`.
+    """
+    module_costs: Dict[str, Dict[str, float]] = {}
+    for module in modules or project_modules():
+        module_costs[module] = {
+            "cold_ms": _median([module_import_ms(module) for _ in range(repeat)]),
+            "marginal_ms": _median([module_import_ms(module, PRELOADED) for _ in range(repeat)]),
+        }
+
+    runs = [app_first_frame(app_path) for _ in range(repeat)]
+    app = {
+        key: _median([run[key] for run in runs])
+        for key in ("imports_ms", "first_frame_ms", "rerun_ms")
+    }
+    app["exceptions"] = runs[-1]["exceptions"]
+
+    import streamlit
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "streamlit": streamlit.__version__,
+        "repeat": repeat,
+        "modules": module_costs,
+        "app": app,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup", description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(REPO_ROOT, "app.py"), help="Streamlit entry point to profile")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh-interpreter runs per measurement (median kept)")
+    parser.add_argument("--json", help="Write the profile to this file")
+    args = parser.parse_args(argv)
+
+    profile = profile_startup(args.app, args.repeat)
+
+    print(f"{'module':<26}{'cold ms':>10}{'marginal ms':>14}")
+    for module, cost in sorted(profile["modules"].items(), key=lambda item: -item[1]["marginal_ms"]):
+        print(f"{module:<26}{cost['cold_ms']:>10.1f}{cost['marginal_ms']:>14.1f}")
+    app = profile["app"]
+    print(
+        f"\napp imports {app['imports_ms']:.0f} ms, first frame {app['first_frame_ms']:.0f} ms, "
+        f"rerun {app['rerun_ms']:.0f} ms"
+    )
+    if app["exceptions"]:
+        print(f"App raised: {app['exceptions']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(profile, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""Synthetic attendance data for load testing and benchmarks.
+
+Writes month-by-month pairs of files in the layouts the parsers expect:
+
+* an attendance workbook (考勤報表) with employee sheets named by ID
+  (``'1,2,3'``) holding one 15-column block per employee – ``姓名`` header,
+  the month's date range in the block's first column, daily rows from row 12
+  with morning swipes in offsets 1-5 and night swipes in offsets 6-9 – plus a
+  ``排班記錄表`` shift sheet;
+* the Google-form export (上班時數表單) with overtime, leave and home-visit
+  rows, a configurable share of which are shifted one column to the right
+  with the name and timestamp swapped, as in real exports.
+
+File names match the watch-folder patterns, so the output directory can be
+fed straight to ``python -m modules.watcher``.  Usage::
+
+    python -m benchmarks.synthetic out/ [--employees 40] [--months 3] \
+        [--start 2026-01] [--noise 10] [--shifted-rate 0.05] [--seed 0]
+"""
+
+import argparse
+import calendar
+import os
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from modules.pipeline import SHIFT_SHEET
+from modules.schedule import BLOCK_WIDTH
+
+# Daily rows start here (see modules.parsing._FIRST_DAY_ROW)
+FIRST_DAY_ROW = 12
+
+WEEKDAYS = "一二三四五六日"
+
+FORM_COLUMNS = [
+    "時間戳記",
+    "姓名",
+    "回報屬性",
+    "上班日期",
+    "加班屬性",
+    "時段",
+    "加班時處理的病人姓名 or 水藥編號",
+    "請假日期",
+    "請假時段",
+    "請假屬性",
+    "請假事由",
+    "家訪日期",
+    "家訪開始時間（離開診所的時間）",
+    "家訪結束時間（回到診所的時間）",
+    "病人姓名",
+]
+
+# Period start/end in minutes and the block offsets their swipes go into
+_PERIODS = {
+    "早診": (8 * 60, 12 * 60, (1, 5)),
+    "晚診": (16 * 60, 20 * 60, (6, 9)),
+}
+
+# Shift sheet codes: 1 = morning and night, 2 = morning only
+_SHIFT_FULL_DAY = 1
+_SHIFT_MORNING = 2
+
+
+class SyntheticConfig(NamedTuple):
+    """Knobs for :func:`generate_dataset`.
+
+    Attributes:
+        employees: Number of employees.
+        months: Number of consecutive months.
+        start_month: First month, ``'YYYY-MM'``.
+        swipe_noise: Standard deviation (minutes) of swipe times around
+            period boundaries.
+        shifted_row_rate: Share of form rows written shifted by one column.
+        missing_swipe_rate: Share of worked periods with only one swipe.
+        overtime_rate: Share of worked periods that run into overtime (and
+            get an overtime form entry).
+        leave_rate: Share of scheduled periods taken as leave.
+        visit_rate: Home visits per employee per working day.
+        employees_per_sheet: Employee blocks per attendance sheet.
+        seed: Random seed; the same config always yields the same files.
+    """
+
+    employees: int = 10
+    months: int = 1
+    start_month: str = "2026-01"
+    swipe_noise: float = 8.0
+    shifted_row_rate: float = 0.05
+    missing_swipe_rate: float = 0.02
+    overtime_rate: float = 0.1
+    leave_rate: float = 0.03
+    visit_rate: float = 0.05
+    employees_per_sheet: int = 3
+    seed: int = 0
+
+
+def employee_names(count: int) -> List[str]:
+    """Return *count* distinct employee names."""
+    return [f"員工{i:03d}" for i in range(1, count + 1)]
+
+
+def month_range(start_month: str, months: int) -> List[str]:
+    """Return *months* consecutive ``'YYYY-MM'`` strings from *start_month*."""
+    return [p.strftime("%Y-%m") for p in pd.period_range(start_month, periods=months, freq="M")]
+
+
+def _hhmm(minutes: float) -> str:
+    minutes = int(min(max(round(minutes), 0), 23 * 60 + 59))
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _cht_time(minutes: int) -> str:
+    """Format minutes as a Google-form time, e.g. '下午 1:30:00'."""
+    hour, minute = divmod(minutes, 60)
+    half = "上午" if hour < 12 else "下午"
+    return f"{half} {(hour - 1) % 12 + 1}:{minute:02d}:00"
+
+
+def _timestamp(date: str, rng: np.random.Generator) -> str:
+    year, month, day = (int(part) for part in date.split("-"))
+    return f"{year}/{month}/{day} {_cht_time(int(rng.integers(9 * 60, 22 * 60)))}"
+
+
+def _shift_code(year_month: str, day: int) -> Optional[int]:
+    weekday = calendar.weekday(int(year_month[:4]), int(year_month[5:]), day)
+    if weekday == 6:
+        return None
+    return _SHIFT_MORNING if weekday == 5 else _SHIFT_FULL_DAY
+
+
+def _scheduled_periods(code: Optional[int]) -> List[str]:
+    if code == _SHIFT_FULL_DAY:
+        return ["早診", "晚診"]
+    if code == _SHIFT_MORNING:
+        return ["早診"]
+    return []
+
+
+# ---------------------------------------------------------------------------
+# One month
+# ---------------------------------------------------------------------------
+
+def build_month(
+    year_month: str, names: List[str], config: SyntheticConfig, rng: np.random.Generator
+) -> Tuple[Dict[str, pd.DataFrame], List[List[object]]]:
+    """Build one month of attendance sheets and form rows.
+
+    Returns:
+        ``(sheets, form_rows)`` – raw (header-less) attendance sheets keyed by
+        sheet name including ``排班記錄表``, and form rows as value lists in
+        ``FORM_COLUMNS`` order (shifted rows are one value longer).
+    """
+    days = calendar.monthrange(int(year_month[:4]), int(year_month[5:]))[1]
+    date_range = f"{year_month}-01 ~ {year_month}-{days:02d}"
+    form_rows: List[List[object]] = []
+
+    def add_form_row(employee: str, date: str, values: Dict[str, object]) -> None:
+        row = [values.get(column) for column in FORM_COLUMNS]
+        row[0], row[1] = _timestamp(date, rng), employee
+        if rng.random() < config.shifted_row_rate:
+            row = [row[1], row[0], None] + row[2:]
+        form_rows.append(row)
+
+    sheets: Dict[str, pd.DataFrame] = {}
+    per_sheet = max(config.employees_per_sheet, 1)
+    for first in range(0, len(names), per_sheet):
+        ids = range(first + 1, min(first + per_sheet, len(names)) + 1)
+        grid = np.full((FIRST_DAY_ROW + days, BLOCK_WIDTH * len(ids)), None, dtype=object)
+
+        for block, employee_id in enumerate(ids):
+            employee = names[employee_id - 1]
+            base = block * BLOCK_WIDTH
+            grid[2, base] = date_range
+            grid[3, base], grid[3, base + 1] = "姓名", employee
+            grid[3, base + 8], grid[3, base + 9] = "工號", str(employee_id)
+
+            for day in range(1, days + 1):
+                date = f"{year_month}-{day:02d}"
+                row = FIRST_DAY_ROW + day - 1
+                weekday = calendar.weekday(int(year_month[:4]), int(year_month[5:]), day)
+                grid[row, base] = f"{day:02d} {WEEKDAYS[weekday]}"
+
+                for period in _scheduled_periods(_shift_code(year_month, day)):
+                    if rng.random() < config.leave_rate:
+                        add_form_row(employee, date, {
+                            "回報屬性": "請假", "請假日期": date, "請假時段": period,
+                            "請假屬性": str(rng.choice(["事假", "病假", "特休"])), "請假事由": "synthetic",
+                        })
+                        continue
+
+                    start, end, (first_col, last_col) = _PERIODS[period]
+                    swipe_in = start - 10 + rng.normal(0, config.swipe_noise)
+                    swipe_out = end + 5 + abs(rng.normal(0, config.swipe_noise))
+                    if rng.random() < config.overtime_rate:
+                        swipe_out += int(rng.integers(20, 90))
+                        add_form_row(employee, date, {
+                            "回報屬性": "加班", "上班日期": date, "加班屬性": "正常加班",
+                            "時段": period, "加班時處理的病人姓名 or 水藥編號": f"P{int(rng.integers(1, 999)):03d}",
+                        })
+
+                    swipes = [swipe_in] if rng.random() < config.missing_swipe_rate else [swipe_in, swipe_out]
+                    for col, minutes in zip(range(first_col, last_col + 1), swipes):
+                        grid[row, base + col] = _hhmm(minutes)
+
+                if _shift_code(year_month, day) and rng.random() < config.visit_rate:
+                    visit_start = int(rng.integers(13 * 60, 15 * 60))
+                    add_form_row(employee, date, {
+                        "回報屬性": "家訪", "家訪日期": date,
+                        "家訪開始時間（離開診所的時間）": _cht_time(visit_start),
+                        "家訪結束時間（回到診所的時間）": _cht_time(visit_start + int(rng.integers(30, 120))),
+                        "病人姓名": f"P{int(rng.integers(1, 999)):03d}",
+                    })
+
+        sheets[",".join(map(str, ids))] = pd.DataFrame(grid)
+
+    sheets[SHIFT_SHEET] = _build_shift_sheet(year_month, names, days)
+    return sheets, form_rows
+
+
+def _build_shift_sheet(year_month: str, names: List[str], days: int) -> pd.DataFrame:
+    """Build the 排班記錄表 grid: month in A2, day numbers from D3, names in B5+."""
+    grid = np.full((4 + len(names), 3 + days), None, dtype=object)
+    grid[0, 0] = "排班記錄表"
+    grid[1, 0] = f"{year_month}-01"
+    grid[2, 3:] = np.arange(1, days + 1)
+    for i, employee in enumerate(names):
+        grid[4 + i, 0] = str(i + 1)
+        grid[4 + i, 1] = employee
+        for day in range(1, days + 1):
+            grid[4 + i, 2 + day] = _shift_code(year_month, day)
+    return pd.DataFrame(grid)
+
+
+def form_frame(form_rows: List[List[object]]) -> pd.DataFrame:
+    """Return the form rows as a DataFrame with the export's column headers.
+
+    Shifted rows spill into one extra, unnamed trailing column.
+    """
+    width = max([len(FORM_COLUMNS)] + [len(row) for row in form_rows])
+    columns = FORM_COLUMNS + [f"Unnamed: {i}" for i in range(len(FORM_COLUMNS), width)]
+    return pd.DataFrame([row + [None] * (width - len(row)) for row in form_rows], columns=columns)
+
+
+# ---------------------------------------------------------------------------
+# Files
+# ---------------------------------------------------------------------------
+
+def write_attendance_workbook(path: str, sheets: Dict[str, pd.DataFrame]) -> str:
+    with pd.ExcelWriter(path) as writer:
+        for sheet_name, grid in sheets.items():
+            grid.to_excel(writer, sheet_name=sheet_name, header=False, index=False)
+    return path
+
+
+def write_form_report(path: str, form_rows: List[List[object]]) -> str:
+    frame = form_frame(form_rows)
+    # The spill-over column has no header in real exports
+    frame.columns = FORM_COLUMNS + [""] * (len(frame.columns) - len(FORM_COLUMNS))
+    frame.to_excel(path, index=False)
+    return path
+
+
+def generate_dataset(output_dir: str, config: SyntheticConfig = SyntheticConfig()) -> List[Tuple[str, str]]:
+    """Write one attendance workbook and form export per month.
+
+    Args:
+        output_dir: Directory to write into (created if needed).
+        config: Generation settings.
+
+    Returns:
+        ``(attendance_path, report_path)`` per month, oldest first.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(config.seed)
+    names = employee_names(config.employees)
+
+    pairs: List[Tuple[str, str]] = []
+    for year_month in month_range(config.start_month, config.months):
+        sheets, form_rows = build_month(year_month, names, config, rng)
+        pairs.append((
+            write_attendance_workbook(os.path.join(output_dir, f"{year_month}_考勤報表.xlsx"), sheets),
+            write_form_report(os.path.join(output_dir, f"{year_month}_上班時數表單.xlsx"), form_rows),
+        ))
+    return pairs
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.synthetic", description=__doc__.splitlines()[0])
+    defaults = SyntheticConfig()
+    parser.add_argument("output", help="Directory to write the workbooks into")
+    parser.add_argument("--employees", type=int, default=defaults.employees)
+    parser.add_argument("--months", type=int, default=defaults.months)
+    parser.add_argument("--start", default=defaults.start_month, help="First month, YYYY-MM")
+    parser.add_argument("--noise", type=float, default=defaults.swipe_noise, help="Swipe time jitter (minutes)")
+    parser.add_argument("--shifted-rate", type=float, default=defaults.shifted_row_rate, help="Share of shifted form rows")
+    parser.add_argument("--missing-rate", type=float, default=defaults.missing_swipe_rate, help="Share of single-swipe periods")
+    parser.add_argument("--per-sheet", type=int, default=defaults.employees_per_sheet, help="Employees per attendance sheet")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args(argv)
+
+    config = defaults._replace(
+        employees=args.employees, months=args.months, start_month=args.start,
+        swipe_noise=args.noise, shifted_row_rate=args.shifted_rate,
+        missing_swipe_rate=args.missing_rate, employees_per_sheet=args.per_sheet, seed=args.seed,
+    )
+    for attendance_path, report_path in generate_dataset(args.output, config):
+        print(attendance_path)
+        print(report_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
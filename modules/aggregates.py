@@ -0,0 +1,304 @@
+"""Materialized per-employee monthly aggregate table.
+
+The table has one row per (employee, month) with the ``Monthly Report``
+totals plus overtime validity counts.  Each row remembers a content hash of
+the inputs it was computed from, so :func:`refresh_aggregates` only
+recomputes months whose swipes, reports or metadata actually changed.  The
+UI and exports read monthly numbers through the lookup helpers instead of
+re-aggregating raw rows.
+
+All functions here are pure (no side effects) and suitable for caching.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from modules.summary import generate_employee_summary
+from modules.time_utils import Metadata, normalize_date
+
+logger = logging.getLogger(__name__)
+
+TOTAL_COLUMNS = [
+    "Total Late Mins",
+    "Total Overtime Mins",
+    "Total On-Duty Hours",
+    "Total Leave Hours",
+    "Total Visit Hours",
+]
+
+VALIDITY_COLUMNS = [
+    "Valid Overtime Entries",
+    "Invalid Overtime Entries",
+]
+
+AGGREGATE_COLUMNS = (
+    ["Employee", "Month"] + TOTAL_COLUMNS + VALIDITY_COLUMNS + ["Input Hash"]
+)
+
+MONTHLY_REPORT_COLUMNS = ["Month"] + TOTAL_COLUMNS
+
+
+def empty_aggregate_table() -> pd.DataFrame:
+    """Return an empty aggregate table with the expected columns."""
+    return pd.DataFrame(columns=AGGREGATE_COLUMNS)
+
+
+# ---------------------------------------------------------------------------
+# Content hashing
+# ---------------------------------------------------------------------------
+
+def _with_month(df: pd.DataFrame) -> pd.DataFrame:
+    """Return *df* with a 'Month' column derived from its Date column."""
+    df = df[df["Employee"].notna()].copy()
+    df["Month"] = df["Date"].apply(normalize_date).str[:7]
+    return df
+
+
+def input_months(df: pd.DataFrame) -> List[str]:
+    """Return the sorted 'YYYY-MM' months covered by *df*'s Date column."""
+    if df.empty:
+        return []
+    return sorted({normalize_date(d)[:7] for d in df["Date"].dropna().unique()})
+
+
+def _group_hashes(df: pd.DataFrame) -> Dict[Tuple[str, str], bytes]:
+    """Hash the rows of every (Employee, Month) group of *df*.
+
+    Args:
+        df: A frame with Employee and Month columns.
+
+    Returns:
+        A dict mapping (employee, month) to a digest of that group's rows.
+    """
+    if df.empty:
+        return {}
+    row_hashes = pd.util.hash_pandas_object(
+        df.astype(str), index=False
+    ).to_numpy()
+    digests: Dict[Tuple[str, str], bytes] = {}
+    for key, positions in df.groupby(["Employee", "Month"]).indices.items():
+        digests[key] = hashlib.sha1(row_hashes[positions].tobytes()).digest()
+    return digests
+
+
+def compute_input_hashes(
+    attendance_df: pd.DataFrame,
+    overtime_df: pd.DataFrame,
+    metadata: Metadata,
+) -> Dict[Tuple[str, str], str]:
+    """Compute a content hash for every (employee, month) in the inputs.
+
+    The hash covers that employee's swipe rows and report rows for the month
+    plus the period metadata, so any change that could alter the month's
+    totals yields a different hash.
+
+    Args:
+        attendance_df: Parsed attendance (swipe) records.
+        overtime_df: Parsed overtime/leave/visit records.
+        metadata: Period configuration dict.
+
+    Returns:
+        A dict mapping (employee, month) to a hex digest.
+    """
+    att_hashes = _group_hashes(_with_month(attendance_df)) if not attendance_df.empty else {}
+    rep_hashes = _group_hashes(_with_month(overtime_df)) if not overtime_df.empty else {}
+    meta_bytes = json.dumps(dict(metadata), sort_keys=True).encode("utf-8")
+
+    hashes: Dict[Tuple[str, str], str] = {}
+    for key in set(att_hashes) | set(rep_hashes):
+        h = hashlib.sha1(meta_bytes)
+        h.update(att_hashes.get(key, b""))
+        h.update(b"|")
+        h.update(rep_hashes.get(key, b""))
+        hashes[key] = h.hexdigest()
+    return hashes
+
+
+# ---------------------------------------------------------------------------
+# Materialization
+# ---------------------------------------------------------------------------
+
+def _aggregate_row(
+    employee: str,
+    month: str,
+    att_month: pd.DataFrame,
+    rep_month: pd.DataFrame,
+    metadata: Metadata,
+) -> dict:
+    """Summarise one (employee, month) and flatten it to a table row."""
+    summary = generate_employee_summary(employee, att_month, rep_month, metadata)
+    row = summary["Monthly Report"].iloc[0].to_dict()
+    validity = summary["Overtime Detail"]["Validity"]
+    row["Valid Overtime Entries"] = int((validity == "Valid").sum())
+    row["Invalid Overtime Entries"] = int(
+        validity.astype(str).str.startswith("Invalid").sum()
+    )
+    row["Employee"] = employee
+    row["Month"] = month
+    return row
+
+
+def upsert_aggregates(
+    table: pd.DataFrame, new_rows: pd.DataFrame
+) -> pd.DataFrame:
+    """Upsert *new_rows* into *table* keyed on (Employee, Month).
+
+    Args:
+        table: Existing aggregate table.
+        new_rows: Rows replacing any stored row for the same key.
+
+    Returns:
+        The merged table sorted by Employee and Month.
+    """
+    if new_rows.empty:
+        return table.copy()
+    keys = set(zip(new_rows["Employee"], new_rows["Month"]))
+    keep = [
+        (emp, month) not in keys
+        for emp, month in zip(table["Employee"], table["Month"])
+    ]
+    frames = [
+        f for f in (table[keep], new_rows[AGGREGATE_COLUMNS]) if not f.empty
+    ]
+    merged = pd.concat(frames, ignore_index=True)
+    return merged.sort_values(["Employee", "Month"]).reset_index(drop=True)
+
+
+def refresh_aggregates(
+    table: pd.DataFrame,
+    attendance_df: pd.DataFrame,
+    overtime_df: pd.DataFrame,
+    metadata: Metadata,
+) -> Tuple[pd.DataFrame, List[Tuple[str, str]]]:
+    """Bring *table* up to date with the given inputs.
+
+    Only (employee, month) pairs whose input hash differs from the stored
+    ``Input Hash`` are recomputed; every other row is reused as-is.  Months
+    absent from the inputs are left untouched, so the table accumulates
+    history across runs.
+
+    Args:
+        table: Existing aggregate table (may be empty).
+        attendance_df: Parsed attendance (swipe) records.
+        overtime_df: Parsed overtime/leave/visit records.
+        metadata: Period configuration dict.
+
+    Returns:
+        A tuple ``(table, refreshed)`` where *refreshed* lists the
+        (employee, month) keys that were recomputed.
+    """
+    hashes = compute_input_hashes(attendance_df, overtime_df, metadata)
+    stored = dict(
+        zip(zip(table["Employee"], table["Month"]), table["Input Hash"])
+    )
+    stale = sorted(k for k, h in hashes.items() if stored.get(k) != h)
+    if not stale:
+        return table, []
+
+    att = _with_month(attendance_df) if not attendance_df.empty else attendance_df
+    rep = _with_month(overtime_df) if not overtime_df.empty else overtime_df
+    att_groups = att.groupby(["Employee", "Month"]).indices if not att.empty else {}
+    rep_groups = rep.groupby(["Employee", "Month"]).indices if not rep.empty else {}
+
+    rows = []
+    for employee, month in stale:
+        att_month = att.iloc[att_groups.get((employee, month), [])]
+        rep_month = rep.iloc[rep_groups.get((employee, month), [])]
+        row = _aggregate_row(
+            employee,
+            month,
+            att_month.drop(columns=["Month"], errors="ignore"),
+            rep_month.drop(columns=["Month"], errors="ignore"),
+            metadata,
+        )
+        row["Input Hash"] = hashes[(employee, month)]
+        rows.append(row)
+
+    logger.info("Refreshed %d of %d monthly aggregates", len(rows), len(hashes))
+    return upsert_aggregates(table, pd.DataFrame(rows)), stale
+
+
+# ---------------------------------------------------------------------------
+# Lookup API
+# ---------------------------------------------------------------------------
+
+def _month_mask(table: pd.DataFrame, month: Union[str, Iterable[str], None]) -> pd.Series:
+    if month is None:
+        return pd.Series(True, index=table.index)
+    if isinstance(month, str):
+        return table["Month"] == month
+    return table["Month"].isin(list(month))
+
+
+def lookup_monthly_report(
+    table: pd.DataFrame,
+    employee_name: str,
+    month: Union[str, Iterable[str], None] = None,
+) -> pd.DataFrame:
+    """Return the ``Monthly Report`` rows for one employee from *table*.
+
+    Args:
+        table: Aggregate table.
+        employee_name: Employee to look up.
+        month: Optional 'YYYY-MM' (or several) to restrict the rows to.
+
+    Returns:
+        A DataFrame with ``MONTHLY_REPORT_COLUMNS``, one row per month.
+    """
+    mask = (table["Employee"] == employee_name) & _month_mask(table, month)
+    return table.loc[mask, MONTHLY_REPORT_COLUMNS].reset_index(drop=True)
+
+
+def with_monthly_report(
+    summary_data: Dict[str, Any],
+    table: Optional[pd.DataFrame],
+    employee_name: str,
+    months: Iterable[str],
+) -> Dict[str, Any]:
+    """Replace the summary's ``Monthly Report`` with the stored aggregate rows.
+
+    Only *months* (the months of the analyzed upload) are taken from
+    *table*, which also holds every month stored in history before.  The
+    computed report is kept when the table is missing or has no such row.
+
+    Args:
+        summary_data: Output of ``generate_employee_summary``; updated in place.
+        table: Aggregate table, or None when it is unavailable.
+        employee_name: Employee the summary belongs to.
+        months: 'YYYY-MM' months to report.
+
+    Returns:
+        *summary_data*.
+    """
+    if table is not None:
+        monthly_report = lookup_monthly_report(table, employee_name, list(months))
+        if not monthly_report.empty:
+            summary_data["Monthly Report"] = monthly_report
+    return summary_data
+
+
+def clinic_monthly_table(
+    table: pd.DataFrame,
+    month: Union[str, Iterable[str], None] = None,
+    employees: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """Return the clinic-wide monthly table (every employee, one row each).
+
+    Args:
+        table: Aggregate table.
+        month: Optional 'YYYY-MM' (or several) to restrict the rows to.
+        employees: Optional employees to restrict the rows to, e.g. those
+            of one upload when *table* is the whole stored history.
+
+    Returns:
+        A DataFrame with Employee, Month, totals and validity counts.
+    """
+    mask = _month_mask(table, month)
+    if employees is not None:
+        mask &= table["Employee"].isin(list(employees))
+    rows = table[mask]
+    return rows.drop(columns=["Input Hash"]).reset_index(drop=True)
@@ -4,22 +4,46 @@ This module used to contain all calculation logic (798 lines).  It has been
 refactored into focused sub-modules.  All public names are re-exported here
 so that existing ``from modules.calculations import …`` and
 ``from modules import calculations`` statements continue to work.
+
+Re-exports are resolved on first attribute access (PEP 562), so importing
+this module does not import every sub-module up front.
 """
 
-# Re-export: file I/O
-from modules.file_io import read_file_by_extension  # noqa: F401
+import importlib
+from typing import Any, Dict, List
+
+# Public name -> sub-module that defines it
+_EXPORTS: Dict[str, str] = {
+    # file I/O
+    "read_file_by_extension": "modules.file_io",
+    # parsing
+    "apply_period_config": "modules.parsing",
+    "extract_raw_swipes": "modules.parsing",
+    "parse_abnormal_stats": "modules.parsing",
+    "parse_attendance_report": "modules.parsing",
+    "parse_overtime_leave_report": "modules.parsing",
+    "parse_shift_report": "modules.parsing",
+    "preprocess_abnormal_stats": "modules.parsing",
+    # summary
+    "generate_all_summaries": "modules.summary",
+    "generate_employee_summary": "modules.summary",
+    # export
+    "generate_excel_download": "modules.export",
+    "generate_zip_download": "modules.export",
+}
+
+__all__ = sorted(_EXPORTS)
+
 
-# Re-export: parsing
-from modules.parsing import (  # noqa: F401
-    parse_abnormal_stats,
-    parse_attendance_report,
-    parse_overtime_leave_report,
-    parse_shift_report,
-    preprocess_abnormal_stats,
-)
+def __getattr__(name: str) -> Any:
+    try:
+        module_name = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
 
-# Re-export: summary
-from modules.summary import generate_employee_summary  # noqa: F401
 
-# Re-export: export
-from modules.export import generate_excel_download  # noqa: F401
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -1,11 +1,14 @@
-"""Calendar UI component for displaying employee leave events."""
+"""Calendar UI component for displaying employee leave events.
+
+``streamlit_calendar`` is imported on first render so app start-up does not
+pay for the component unless the calendar view is opened.
+"""
 
 import logging
 from typing import Any, Dict, List
 
 import pandas as pd
 import streamlit as st
-from streamlit_calendar import calendar as st_calendar
 
 from modules.time_utils import Metadata
 
@@ -56,17 +59,17 @@ def _resolve_period_times(
     )
 
 
-def render_calendar(
+def build_leave_events(
     report: pd.DataFrame, metadata: Metadata
-) -> Any:
-    """Render a calendar widget showing employee leave events.
+) -> List[dict]:
+    """Build calendar events for every leave record in the report.
 
     Args:
         report: Parsed overtime/leave/visit report for all employees.
         metadata: Period configuration dict.
 
     Returns:
-        The streamlit-calendar component result.
+        A list of FullCalendar event dicts (title, start, end, allDay).
     """
     events: List[dict] = []
 
@@ -102,6 +105,23 @@ def render_calendar(
                 }
             )
 
+    return events
+
+
+def render_calendar(
+    report: pd.DataFrame, metadata: Metadata
+) -> Any:
+    """Render a calendar widget showing employee leave events.
+
+    Args:
+        report: Parsed overtime/leave/visit report for all employees.
+        metadata: Period configuration dict.
+
+    Returns:
+        The streamlit-calendar component result.
+    """
+    from streamlit_calendar import calendar as st_calendar
+
     calendar_options = {
         "initialView": "dayGridMonth",
         "locale": "zh-tw",
@@ -112,4 +132,4 @@ def render_calendar(
         },
     }
 
-    return st_calendar(events=events, options=calendar_options)
+    return st_calendar(events=build_leave_events(report, metadata), options=calendar_options)
@@ -0,0 +1,284 @@
+"""Headless batch runner for month-end processing.
+
+Runs the same read → validate → parse → summary pipeline as ``app.py`` and
+writes per-employee reports plus clinic-wide tables to a directory::
+
+    python -m modules.cli 考勤報表.xls 加班報表.xlsx --config config.json \
+        --output out/ --format xlsx csv --workers 4
+
+Output layout::
+
+    out/employees/<employee>.xlsx|.pdf
+    out/clinic/clinic_monthly.<csv|parquet|arrow>
+    out/clinic/<detail_table>.<csv|parquet|arrow>
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from modules import history
+from modules.aggregates import clinic_monthly_table, input_months, with_monthly_report
+from modules.exceptions import AttendanceAppError
+from modules.export import (
+    DEFAULT_EXPORT_WORKERS,
+    TABLE_FORMATS,
+    combine_detail_tables,
+    export_table,
+    iter_employee_workbooks,
+    safe_filename,
+)
+from modules.parsing import apply_period_config
+from modules.pdf_report import iter_employee_pdfs, pdf_available
+from modules.pipeline import process_uploads
+from modules.summary import generate_all_summaries
+from modules.time_utils import PERIOD_TIME_FIELDS, Metadata, get_schedule
+
+logger = logging.getLogger(__name__)
+
+REPORT_FORMATS = ("xlsx", "pdf")
+OUTPUT_FORMATS = REPORT_FORMATS + tuple(TABLE_FORMATS)
+DEFAULT_FORMATS = ["xlsx", "csv"]
+
+
+def load_metadata(path: str) -> Metadata:
+    """Load and check a period configuration file (``config.json`` format).
+
+    Raises:
+        ValueError: If the file is missing or a period time is blank.
+    """
+    if not os.path.exists(path):
+        raise ValueError(f"Config file not found: {path}")
+    with open(path, "r") as f:
+        metadata = json.load(f)
+
+    missing = [
+        f"{spec['key']}_{field}"
+        for spec in get_schedule(metadata)
+        for field in PERIOD_TIME_FIELDS
+        if not str(metadata.get(f"{spec['key']}_{field}", "")).strip()
+    ]
+    if missing:
+        raise ValueError(f"Config file {path} is missing: {', '.join(missing)}")
+    return metadata
+
+
+def _write_bytes(path: str, content: bytes) -> str:
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+class MonthData(NamedTuple):
+    """One month of parsed inputs plus every employee's summary."""
+
+    attendance: pd.DataFrame
+    report: pd.DataFrame
+    summaries: List[Tuple[str, Dict[str, Any]]]
+    employees: List[str]
+    months: List[str]
+
+
+def check_formats(formats: List[str]) -> None:
+    """Raise ValueError for unknown or unavailable output formats."""
+    unknown = [fmt for fmt in formats if fmt not in OUTPUT_FORMATS]
+    if unknown:
+        raise ValueError(
+            f"Unknown output format(s): {', '.join(unknown)}. "
+            f"Choose from: {', '.join(OUTPUT_FORMATS)}"
+        )
+    if "pdf" in formats and not pdf_available():
+        raise ValueError("PDF output requires the optional markdown-pdf package.")
+
+
+def load_month(
+    attendance_path: str, report_path: str, metadata: Metadata
+) -> MonthData:
+    """Read, validate and parse one pair of files and summarise everyone.
+
+    Raises:
+        ValueError: If either file fails validation.
+    """
+    with open(attendance_path, "rb") as f:
+        attendance_bytes = f.read()
+    with open(report_path, "rb") as f:
+        report_bytes = f.read()
+
+    parsed = process_uploads(
+        attendance_bytes, os.path.basename(attendance_path),
+        report_bytes, os.path.basename(report_path),
+        get_schedule(metadata),
+    )
+    for warning in parsed.warnings:
+        logger.warning(warning)
+    attendance = apply_period_config(parsed.raw_swipes, metadata)
+
+    # Summaries are reused by every output format, so build them once
+    summaries = list(
+        generate_all_summaries(
+            attendance, parsed.report, metadata, parsed.shifts, parsed.employees
+        )
+    )
+    return MonthData(attendance, parsed.report, summaries, parsed.employees, input_months(parsed.raw_swipes))
+
+
+def write_outputs(
+    month: MonthData,
+    output_dir: str,
+    formats: List[str],
+    aggregate_table: pd.DataFrame,
+    workers: int = DEFAULT_EXPORT_WORKERS,
+) -> Dict[str, List[str]]:
+    """Write per-employee reports and clinic tables for *month*.
+
+    As in the app, each report's Monthly Report and the clinic monthly table
+    come from *aggregate_table*, limited to the employees and months of
+    *month*.
+
+    Args:
+        month: Output of :func:`load_month`.
+        output_dir: Directory to write into (created if needed).
+        formats: Any of ``OUTPUT_FORMATS``.
+        aggregate_table: Monthly aggregates for the clinic monthly table.
+        workers: Worker processes for rendering reports.
+
+    Returns:
+        A dict with 'employees' and 'clinic' lists of written paths.
+    """
+    written: Dict[str, List[str]] = {"employees": [], "clinic": []}
+    summaries = [
+        (employee, with_monthly_report(summary, aggregate_table, employee, month.months))
+        for employee, summary in month.summaries
+    ]
+
+    employee_dir = os.path.join(output_dir, "employees")
+    if any(fmt in REPORT_FORMATS for fmt in formats):
+        os.makedirs(employee_dir, exist_ok=True)
+    if "xlsx" in formats:
+        for employee, content in iter_employee_workbooks(summaries, workers):
+            written["employees"].append(
+                _write_bytes(os.path.join(employee_dir, f"{safe_filename(employee)}.xlsx"), content)
+            )
+            logger.info("Wrote %s.xlsx", employee)
+    if "pdf" in formats:
+        for employee, content in iter_employee_pdfs(summaries, workers):
+            written["employees"].append(
+                _write_bytes(os.path.join(employee_dir, f"{safe_filename(employee)}.pdf"), content)
+            )
+            logger.info("Wrote %s.pdf", employee)
+
+    table_formats = [fmt for fmt in formats if fmt in TABLE_FORMATS]
+    if table_formats:
+        tables: Dict[str, pd.DataFrame] = {
+            "Clinic Monthly": clinic_monthly_table(aggregate_table, month.months, month.employees)
+        }
+        tables.update(combine_detail_tables(summaries))
+
+        clinic_dir = os.path.join(output_dir, "clinic")
+        os.makedirs(clinic_dir, exist_ok=True)
+        for name, df in tables.items():
+            stem = name.lower().replace(" ", "_")
+            for fmt in table_formats:
+                extension = TABLE_FORMATS[fmt][0]
+                written["clinic"].append(
+                    _write_bytes(os.path.join(clinic_dir, f"{stem}{extension}"), export_table(df, fmt))
+                )
+        logger.info("Wrote %d clinic tables", len(written["clinic"]))
+
+    return written
+
+
+def run(
+    attendance_path: str,
+    report_path: str,
+    metadata: Metadata,
+    output_dir: str,
+    formats: Optional[List[str]] = None,
+    workers: int = DEFAULT_EXPORT_WORKERS,
+    history_path: Optional[str] = None,
+) -> Dict[str, List[str]]:
+    """Process one month of files and write every requested output.
+
+    Args:
+        attendance_path: Attendance report (考勤報表) workbook.
+        report_path: Overtime report (加班報表).
+        metadata: Period configuration dict.
+        output_dir: Directory to write into (created if needed).
+        formats: Any of ``OUTPUT_FORMATS``; 'xlsx'/'pdf' produce
+            per-employee reports, 'csv'/'parquet'/'arrow' clinic tables.
+        workers: Worker processes for rendering reports.
+        history_path: If given, the aggregate history file to refresh.
+            Reports still cover only this upload's months and employees.
+
+    Returns:
+        A dict with 'employees' and 'clinic' lists of written paths.
+
+    Raises:
+        ValueError: On invalid input files or unknown formats.
+    """
+    formats = list(formats or DEFAULT_FORMATS)
+    check_formats(formats)
+
+    month = load_month(attendance_path, report_path, metadata)
+    if history_path:
+        aggregate_table, _ = history.refresh_history(
+            month.attendance, month.report, metadata, history_path
+        )
+    else:
+        aggregate_table = history.compute_monthly_aggregates(month.attendance, month.report, metadata)
+
+    return write_outputs(month, output_dir, formats, aggregate_table, workers)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m modules.cli",
+        description="Process attendance and overtime reports without the Streamlit UI.",
+    )
+    parser.add_argument("attendance", help="Attendance report (考勤報表) .xls/.xlsx")
+    parser.add_argument("report", help="Overtime report (加班報表) .tsv/.csv/.xlsx")
+    parser.add_argument("--config", default="config.json", help="Period configuration JSON (default: config.json)")
+    parser.add_argument("--output", "-o", default="output", help="Output directory (default: output)")
+    parser.add_argument(
+        "--format", "-f", nargs="+", dest="formats", default=DEFAULT_FORMATS,
+        choices=OUTPUT_FORMATS, help="Output formats (default: xlsx csv)",
+    )
+    parser.add_argument(
+        "--workers", "-j", type=int, default=DEFAULT_EXPORT_WORKERS,
+        help=f"Worker processes for report rendering (default: {DEFAULT_EXPORT_WORKERS})",
+    )
+    parser.add_argument("--history", help="Also refresh this aggregate history CSV")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Only log warnings and errors")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.WARNING if args.quiet else logging.INFO,
+        format="%(levelname)s: %(message)s",
+    )
+    try:
+        metadata = load_metadata(args.config)
+        written = run(
+            args.attendance, args.report, metadata, args.output,
+            formats=args.formats, workers=args.workers, history_path=args.history,
+        )
+    except (ValueError, AttendanceAppError, OSError) as exc:
+        logger.error("%s", exc)
+        return 1
+
+    logger.info(
+        "Done: %d employee reports, %d clinic tables in %s",
+        len(written["employees"]), len(written["clinic"]), args.output,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,3 +11,11 @@ class DataFormatError(AttendanceAppError):
 
 class ParsingError(AttendanceAppError):
     """Raised when data parsing fails due to malformed cell values."""
+
+
+class JobCancelledError(AttendanceAppError):
+    """Raised inside a background job once cancellation was requested."""
+
+
+class QueueFullError(AttendanceAppError):
+    """Raised when the shared worker pool cannot queue another job."""
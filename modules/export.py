@@ -1,20 +1,97 @@
 """Excel export utilities for the Attendance System.
 
 All functions here are pure (no side effects beyond writing to an in-memory
-buffer).
+buffer).  ``openpyxl`` and ``pyarrow`` are imported by the writers that use
+them, so importing this module stays cheap at app start-up.
 """
 
 import io
 import logging
-from typing import Any, Dict
+import os
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import pandas as pd
 
+from modules.instrumentation import instrumented
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_EXPORT_WORKERS = min(4, os.cpu_count() or 1)
+
+_UNSAFE_FILENAME_CHARS = re.compile(r'[\\/:*?"<>|]')
+
+
+# ---------------------------------------------------------------------------
+# Writer backends
+# ---------------------------------------------------------------------------
+
+# Summaries with at least this many rows are written with the streaming backend
+STREAMING_ROW_THRESHOLD = 10_000
+
+
+def _iter_sheets(summary_data: Dict[str, Any]) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Yield ``(sheet_name, df)`` in workbook order, Warnings first."""
+    if "Warnings" in summary_data and summary_data["Warnings"]:
+        yield "Warnings", pd.DataFrame({"Warnings": summary_data["Warnings"]})
+
+    for sheet_name, df in summary_data.items():
+        if sheet_name == "Warnings":
+            continue
+        yield sheet_name[:31], df
+
+
+def _write_openpyxl(
+    output: io.BytesIO, sheets: Iterable[Tuple[str, pd.DataFrame]]
+) -> None:
+    """Write sheets through ``pd.ExcelWriter`` (full in-memory workbook)."""
+    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+        for sheet_name, df in sheets:
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+
+def _write_streaming(
+    output: io.BytesIO, sheets: Iterable[Tuple[str, pd.DataFrame]]
+) -> None:
+    """Write sheets row by row with a write-only openpyxl workbook.
+
+    Rows are serialized as they are appended, so memory stays flat however
+    many rows the sheets hold.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for sheet_name, df in sheets:
+        sheet = workbook.create_sheet(title=sheet_name)
+        sheet.append(list(df.columns))
+
+        values = df.astype(object).where(df.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            sheet.append(row)
+    workbook.save(output)
+
+
+EXCEL_BACKENDS: Dict[str, Callable[[io.BytesIO, Iterable[Tuple[str, pd.DataFrame]]], None]] = {
+    "openpyxl": _write_openpyxl,
+    "streaming": _write_streaming,
+}
+
+
+def select_excel_backend(summary_data: Dict[str, Any]) -> str:
+    """Pick the writer backend for *summary_data* by its total row count."""
+    rows = sum(len(df) for _, df in _iter_sheets(summary_data))
+    return "streaming" if rows >= STREAMING_ROW_THRESHOLD else "openpyxl"
+
 
+@instrumented()
 def generate_excel_download(
-    employee_name: str, summary_data: Dict[str, Any]
+    employee_name: str,
+    summary_data: Dict[str, Any],
+    backend: Optional[str] = None,
 ) -> io.BytesIO:
     """Generate an Excel workbook from the employee summary data.
 
@@ -24,23 +101,252 @@ def generate_excel_download(
         employee_name: Employee name (used for context in logs).
         summary_data: Dict mapping sheet names to DataFrames (or list for
             Warnings).
+        backend: Name of an ``EXCEL_BACKENDS`` entry; chosen by
+            :func:`select_excel_backend` when omitted.
 
     Returns:
         A BytesIO object containing the ``.xlsx`` bytes.
+
+    Raises:
+        ValueError: If *backend* is not a known writer backend.
     """
+    if backend is None:
+        backend = select_excel_backend(summary_data)
+    if backend not in EXCEL_BACKENDS:
+        raise ValueError(
+            f"Unknown Excel backend '{backend}'. "
+            f"Choose one of: {', '.join(EXCEL_BACKENDS)}"
+        )
+
+    logger.debug("Writing Excel report for %s with %s backend", employee_name, backend)
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        # Write Warnings sheet first if it exists and is non-empty
-        if "Warnings" in summary_data and summary_data["Warnings"]:
-            pd.DataFrame({"Warnings": summary_data["Warnings"]}).to_excel(
-                writer, sheet_name="Warnings", index=False
-            )
-
-        for sheet_name, df in summary_data.items():
-            if sheet_name == "Warnings":
-                continue
-            safe_sheet_name = sheet_name[:31]
-            df.to_excel(writer, sheet_name=safe_sheet_name, index=False)
+    EXCEL_BACKENDS[backend](output, _iter_sheets(summary_data))
+    output.seek(0)
+    return output
+
+
+# ---------------------------------------------------------------------------
+# Bulk export
+# ---------------------------------------------------------------------------
+
+def safe_filename(name: str) -> str:
+    """Replace characters that are not allowed in file names with '_'."""
+    return _UNSAFE_FILENAME_CHARS.sub("_", str(name))
+
+
+def _render_workbook(
+    item: Tuple[str, Dict[str, Any]], backend: Optional[str] = None
+) -> Tuple[str, bytes]:
+    """Render one ``(employee, summary)`` pair to workbook bytes."""
+    employee_name, summary_data = item
+    return employee_name, generate_excel_download(
+        employee_name, summary_data, backend
+    ).getvalue()
+
+
+def iter_rendered(
+    summaries: Iterable[Tuple[str, Dict[str, Any]]],
+    render: Callable[[Tuple[str, Dict[str, Any]]], Tuple[str, bytes]],
+    max_workers: int = DEFAULT_EXPORT_WORKERS,
+) -> Iterator[Tuple[str, bytes]]:
+    """Apply *render* to every summary in a process pool, preserving order.
+
+    At most ``2 * max_workers`` summaries are in flight at once, so memory
+    stays bounded no matter how many employees *summaries* yields.
+
+    Args:
+        summaries: ``(employee, summary)`` pairs, e.g. from
+            ``summary.generate_all_summaries``.
+        render: Picklable (module-level) function mapping one pair to
+            ``(employee, file_bytes)``.
+        max_workers: Worker processes; ``1`` renders in-process.
+
+    Yields:
+        ``(employee, file_bytes)`` pairs.
+    """
+    if max_workers <= 1:
+        for item in summaries:
+            yield render(item)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        pending: deque = deque()
+        for item in summaries:
+            pending.append(pool.submit(render, item))
+            if len(pending) >= 2 * max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def iter_employee_workbooks(
+    summaries: Iterable[Tuple[str, Dict[str, Any]]],
+    max_workers: int = DEFAULT_EXPORT_WORKERS,
+    backend: Optional[str] = "streaming",
+) -> Iterator[Tuple[str, bytes]]:
+    """Render employee workbooks in a process pool (see :func:`iter_rendered`).
+
+    Args:
+        summaries: ``(employee, summary)`` pairs.
+        max_workers: Worker processes; ``1`` renders in-process.
+        backend: Excel writer backend; bulk exports stream by default.
 
+    Yields:
+        ``(employee, xlsx_bytes)`` pairs.
+    """
+    return iter_rendered(
+        summaries, partial(_render_workbook, backend=backend), max_workers
+    )
+
+
+def zip_rendered_reports(
+    rendered: Iterable[Tuple[str, bytes]],
+    extension: str,
+    total: Optional[int] = None,
+    progress: Optional[Callable[[int, Optional[int], str], None]] = None,
+) -> io.BytesIO:
+    """Write rendered per-employee files into one ZIP archive as they arrive.
+
+    Args:
+        rendered: ``(employee, file_bytes)`` pairs.
+        extension: File extension for archive members, e.g. ``'.xlsx'``.
+        total: Number of pairs, passed through to *progress*.
+        progress: Optional ``progress(done, total, employee)`` callback,
+            invoked after each file is added.
+
+    Returns:
+        A BytesIO object containing the ``.zip`` bytes, one
+        ``<employee><extension>`` per employee.
+    """
+    output = io.BytesIO()
+    done = 0
+    # .xlsx and .pdf files are already compressed; store them as-is
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED) as archive:
+        for employee_name, content in rendered:
+            archive.writestr(f"{safe_filename(employee_name)}{extension}", content)
+            done += 1
+            if progress is not None:
+                progress(done, total, employee_name)
+
+    logger.info("Bulk export wrote %d %s files", done, extension)
     output.seek(0)
     return output
+
+
+def generate_zip_download(
+    summaries: Iterable[Tuple[str, Dict[str, Any]]],
+    total: Optional[int] = None,
+    max_workers: int = DEFAULT_EXPORT_WORKERS,
+    progress: Optional[Callable[[int, Optional[int], str], None]] = None,
+) -> io.BytesIO:
+    """Bundle every employee's Excel report into one ZIP archive.
+
+    Args:
+        summaries: ``(employee, summary)`` pairs.
+        total: Number of pairs, passed through to *progress*.
+        max_workers: Worker processes for rendering.
+        progress: Optional ``progress(done, total, employee)`` callback.
+
+    Returns:
+        A BytesIO object containing the ``.zip`` bytes, one
+        ``<employee>.xlsx`` per employee.
+    """
+    return zip_rendered_reports(
+        iter_employee_workbooks(summaries, max_workers), ".xlsx", total, progress
+    )
+
+
+# ---------------------------------------------------------------------------
+# Columnar exports
+# ---------------------------------------------------------------------------
+
+# Format name -> (file extension, MIME type)
+TABLE_FORMATS: Dict[str, Tuple[str, str]] = {
+    "csv": (".csv", "text/csv"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "arrow": (".arrow", "application/vnd.apache.arrow.file"),
+}
+
+DETAIL_TABLES = [
+    "Overtime Detail",
+    "Leave Details",
+    "Duty Time Entries",
+    "Visit Entries",
+    "Shift Entries",
+]
+
+
+def combine_detail_tables(
+    summaries: Iterable[Tuple[str, Dict[str, Any]]],
+) -> Dict[str, pd.DataFrame]:
+    """Stack each detail table across employees into one clinic-wide frame.
+
+    Args:
+        summaries: ``(employee, summary)`` pairs.
+
+    Returns:
+        A dict mapping each ``DETAIL_TABLES`` name to a DataFrame with a
+        leading 'Employee' column.
+    """
+    parts: Dict[str, List[pd.DataFrame]] = {name: [] for name in DETAIL_TABLES}
+    for employee_name, summary_data in summaries:
+        for name in DETAIL_TABLES:
+            df = summary_data.get(name)
+            if df is not None and not df.empty:
+                parts[name].append(df.assign(Employee=employee_name))
+
+    tables: Dict[str, pd.DataFrame] = {}
+    for name, frames in parts.items():
+        combined = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["Employee"])
+        tables[name] = combined[["Employee"] + [c for c in combined.columns if c != "Employee"]]
+    return tables
+
+
+def _to_arrow_table(df: pd.DataFrame):
+    """Convert *df* to a ``pyarrow.Table``, stringifying mixed-type columns."""
+    import pyarrow as pa
+
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        mixed = {
+            col: df[col].astype("string")
+            for col in df.columns
+            if df[col].dtype == object
+        }
+        return pa.Table.from_pandas(df.assign(**mixed), preserve_index=False)
+
+
+@instrumented()
+def export_table(df: pd.DataFrame, fmt: str) -> bytes:
+    """Serialize a table straight from its columns, without cell styling.
+
+    Args:
+        df: Table to export.
+        fmt: One of ``TABLE_FORMATS`` ('csv', 'parquet' or 'arrow').
+
+    Returns:
+        The encoded file contents.
+
+    Raises:
+        ValueError: If *fmt* is not a supported format.
+    """
+    if fmt == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+    if fmt not in TABLE_FORMATS:
+        raise ValueError(
+            f"Unknown export format '{fmt}'. "
+            f"Choose one of: {', '.join(TABLE_FORMATS)}"
+        )
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = _to_arrow_table(df)
+    sink = pa.BufferOutputStream()
+    if fmt == "parquet":
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
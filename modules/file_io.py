@@ -5,17 +5,20 @@ All functions here are pure (no side effects beyond reading the file object).
 
 import logging
 import re
-from typing import Dict, Union
+from typing import Callable, Dict, Optional, Union
 
 import pandas as pd
 
-from modules.exceptions import DataFormatError
+from modules.exceptions import DataFormatError, JobCancelledError
+from modules.instrumentation import instrumented
 
 logger = logging.getLogger(__name__)
 
 
+@instrumented()
 def read_file_by_extension(
     uploaded_file: object,
+    progress: Optional[Callable[[int, int], None]] = None,
 ) -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
     """Read an uploaded file based on its extension.
 
@@ -26,6 +29,8 @@ def read_file_by_extension(
     Args:
         uploaded_file: A file-like object with a ``.name`` attribute
             (e.g. a Streamlit ``UploadedFile``).
+        progress: Optional ``progress(done, total)`` callback, called after
+            each employee sheet is decoded.
 
     Returns:
         A single DataFrame **or** a dict mapping sheet names to DataFrames.
@@ -42,8 +47,10 @@ def read_file_by_extension(
 
             if matching_sheets:
                 dfs: Dict[str, pd.DataFrame] = {}
-                for sheet in matching_sheets:
+                for done, sheet in enumerate(matching_sheets, start=1):
                     dfs[sheet] = xl.parse(sheet, header=None)
+                    if progress is not None:
+                        progress(done, len(matching_sheets))
 
                 if "排班記錄表" in xl.sheet_names:
                     dfs["排班記錄表"] = xl.parse("排班記錄表", header=None)
@@ -63,5 +70,7 @@ def read_file_by_extension(
             except Exception:
                 return pd.read_csv(uploaded_file)
 
+    except JobCancelledError:
+        raise
     except Exception as exc:
         raise DataFormatError(f"Error reading file {filename}: {exc}") from exc
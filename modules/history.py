@@ -0,0 +1,267 @@
+"""Per-month aggregate history for multi-month and year-to-date reports.
+
+Every analysis run refreshes the materialized aggregate table (see
+:mod:`modules.aggregates`) and persists it here.  Range and year-to-date
+reports are assembled from those stored rows, so a 12-month report never
+re-aggregates raw swipes.
+
+The app, the batch runner and the watch-folder daemon may all update the
+same history file.  :func:`refresh_history` and :func:`merge_into_history`
+hold :func:`history_lock` across their load → update → save cycle, so
+concurrent writers never drop each other's months.
+"""
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows / Pyodide: threads of this process only
+    fcntl = None
+
+import pandas as pd
+
+from modules.aggregates import (
+    AGGREGATE_COLUMNS,
+    TOTAL_COLUMNS,
+    empty_aggregate_table,
+    refresh_aggregates,
+    upsert_aggregates,
+)
+from modules.time_utils import Metadata
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FILE = "history.csv"
+
+HISTORY_COLUMNS = AGGREGATE_COLUMNS
+
+_path_locks: Dict[str, threading.Lock] = {}
+_path_locks_guard = threading.Lock()
+
+
+# ---------------------------------------------------------------------------
+# Aggregation (raw frames -> per-month rows)
+# ---------------------------------------------------------------------------
+
+def compute_monthly_aggregates(
+    attendance_df: pd.DataFrame,
+    overtime_df: pd.DataFrame,
+    metadata: Metadata,
+    employees: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """Compute one aggregate row per (employee, month) from parsed frames.
+
+    The frames may span several months; each month is summarised on its own
+    so the totals match the single-month ``Monthly Report`` exactly.
+
+    Args:
+        attendance_df: Parsed attendance (swipe) records.
+        overtime_df: Parsed overtime/leave/visit records.
+        metadata: Period configuration dict.
+        employees: Optional subset of employees; defaults to everyone found.
+
+    Returns:
+        A DataFrame with ``HISTORY_COLUMNS``.
+    """
+    table, _ = refresh_aggregates(
+        empty_aggregate_table(), attendance_df, overtime_df, metadata
+    )
+    if employees is not None:
+        table = table[table["Employee"].isin(list(employees))]
+    return table.reset_index(drop=True)
+
+
+# ---------------------------------------------------------------------------
+# Storage
+# ---------------------------------------------------------------------------
+
+def load_history(path: str = HISTORY_FILE) -> pd.DataFrame:
+    """Load the stored aggregate history, or an empty table if none exists.
+
+    Args:
+        path: CSV file holding the history.
+
+    Returns:
+        A DataFrame with ``HISTORY_COLUMNS``.
+    """
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+    history = pd.read_csv(
+        path, dtype={"Employee": str, "Month": str, "Input Hash": str}
+    )
+    for col in HISTORY_COLUMNS:
+        if col not in history.columns:
+            history[col] = "" if col == "Input Hash" else 0.0
+    history["Input Hash"] = history["Input Hash"].fillna("")
+    return history[HISTORY_COLUMNS]
+
+
+def save_history(history: pd.DataFrame, path: str = HISTORY_FILE) -> None:
+    """Write the aggregate history to *path* as CSV.
+
+    The file is replaced atomically, so a concurrent :func:`load_history`
+    (another browser session) never sees it half written.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    history[HISTORY_COLUMNS].to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def history_lock(path: str = HISTORY_FILE) -> Iterator[None]:
+    """Hold the history file at *path* for one read-modify-write cycle.
+
+    Threads of this process are serialized by a per-path lock; other
+    processes (the watcher, the batch runner) by ``flock`` on
+    ``<path>.lock`` where the platform provides it.
+    """
+    with _path_locks_guard:
+        lock = _path_locks.setdefault(os.path.abspath(path), threading.Lock())
+    with lock:
+        if fcntl is None:
+            yield
+            return
+        with open(f"{path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def refresh_history(
+    attendance_df: pd.DataFrame,
+    overtime_df: pd.DataFrame,
+    metadata: Metadata,
+    path: str = HISTORY_FILE,
+) -> Tuple[pd.DataFrame, List[Tuple[str, str]]]:
+    """Refresh the stored aggregates from parsed frames, under the lock.
+
+    Args:
+        attendance_df: Parsed attendance (swipe) records.
+        overtime_df: Parsed overtime/leave/visit records.
+        metadata: Period configuration dict.
+        path: CSV file holding the history.
+
+    Returns:
+        Same as :func:`modules.aggregates.refresh_aggregates`; the file is
+        only rewritten when some month was recomputed.
+    """
+    with history_lock(path):
+        table, refreshed = refresh_aggregates(
+            load_history(path), attendance_df, overtime_df, metadata
+        )
+        if refreshed:
+            save_history(table, path)
+    return table, refreshed
+
+
+def merge_into_history(
+    new_rows: pd.DataFrame, path: str = HISTORY_FILE
+) -> pd.DataFrame:
+    """Upsert *new_rows* into the stored history, under the lock.
+
+    Returns:
+        The history as saved.
+    """
+    with history_lock(path):
+        stored = merge_history(load_history(path), new_rows)
+        save_history(stored, path)
+    return stored
+
+
+def merge_history(
+    history: pd.DataFrame, new_rows: pd.DataFrame
+) -> pd.DataFrame:
+    """Upsert *new_rows* into *history* keyed on (Employee, Month).
+
+    Rows in *new_rows* replace stored rows for the same employee and month;
+    all other stored months are kept untouched.
+
+    Args:
+        history: Previously stored aggregates.
+        new_rows: Freshly computed aggregates.
+
+    Returns:
+        The merged table sorted by Employee and Month.
+    """
+    return upsert_aggregates(history, new_rows)
+
+
+# ---------------------------------------------------------------------------
+# Range / year-to-date reports
+# ---------------------------------------------------------------------------
+
+def build_range_report(
+    history: pd.DataFrame,
+    employee_name: str,
+    start_month: str,
+    end_month: str,
+) -> Dict[str, pd.DataFrame]:
+    """Build a multi-month report for one employee from stored aggregates.
+
+    Every month in ``[start_month, end_month]`` gets a row; months with no
+    stored data are reported as zeros.
+
+    Args:
+        history: Aggregate history table.
+        employee_name: Employee to report on.
+        start_month: First month, 'YYYY-MM'.
+        end_month: Last month (inclusive), 'YYYY-MM'.
+
+    Returns:
+        A dict with keys 'Monthly Report' (one row per month) and 'Totals'
+        (a single row summing the range).
+
+    Raises:
+        ValueError: If the month strings are malformed or out of order.
+    """
+    try:
+        months = pd.period_range(start_month, end_month, freq="M")
+    except ValueError as exc:
+        raise ValueError(
+            f"Invalid month range {start_month!r} to {end_month!r}: {exc}"
+        ) from exc
+    if len(months) == 0:
+        raise ValueError(
+            f"Start month {start_month} is after end month {end_month}."
+        )
+
+    month_index = [str(m) for m in months]
+    emp_rows = history[history["Employee"] == employee_name]
+    monthly = (
+        emp_rows.set_index("Month")[TOTAL_COLUMNS]
+        .groupby(level=0)
+        .sum()
+        .reindex(month_index, fill_value=0.0)
+        .astype(float)
+        .rename_axis("Month")
+        .reset_index()
+    )
+
+    totals = monthly[TOTAL_COLUMNS].sum().to_frame().T
+    totals.insert(0, "Month", f"{month_index[0]} ~ {month_index[-1]}")
+
+    return {"Monthly Report": monthly, "Totals": totals}
+
+
+def build_year_to_date_report(
+    history: pd.DataFrame, employee_name: str, as_of_month: str
+) -> Dict[str, pd.DataFrame]:
+    """Build the January-to-*as_of_month* report for one employee.
+
+    Args:
+        history: Aggregate history table.
+        employee_name: Employee to report on.
+        as_of_month: Last month to include, 'YYYY-MM'.
+
+    Returns:
+        Same shape as :func:`build_range_report`.
+    """
+    return build_range_report(
+        history, employee_name, f"{as_of_month[:4]}-01", as_of_month
+    )
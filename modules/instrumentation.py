@@ -0,0 +1,211 @@
+"""Lightweight per-stage timing and memory instrumentation.
+
+Pipeline functions are wrapped with :func:`instrumented` (or a block with
+:func:`stage`).  Nothing is measured unless a :func:`recording` block is
+active on the current thread/context, or logging is switched on
+(``ATTENDANCE_PERF_LOG=1`` at start-up, or :func:`set_log_enabled`), so the
+disabled cost is one context-variable lookup per call.
+
+While active, every stage produces a :class:`StageRecord` (wall time, rows
+in the result and the ``tracemalloc`` peak above the stage's starting point)
+that is appended to the active recording and logged as one JSON line.
+While logging is switched on, the lines are written to stderr even if the
+application configured no logging (as under Streamlit).
+``tracemalloc`` is process-wide, so peaks are approximate when several
+recordings overlap.
+"""
+
+import functools
+import json
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, TypeVar
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PERF_LOG_ENV = "ATTENDANCE_PERF_LOG"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class StageRecord(NamedTuple):
+    """Measurements for one instrumented stage."""
+
+    stage: str
+    seconds: float
+    rows: Optional[int]
+    peak_kib: Optional[float]
+    depth: int
+
+
+class _Recording:
+    def __init__(self, trace_memory: bool) -> None:
+        self.records: List[StageRecord] = []
+        self.trace_memory = trace_memory
+        self.depth = 0
+        # Absolute tracemalloc peaks seen by open stages, innermost last
+        self.peaks: List[int] = []
+
+
+_active: ContextVar[Optional[_Recording]] = ContextVar("instrumentation_recording", default=None)
+
+
+class _FallbackHandler(logging.StreamHandler):
+    """Write stage records to stderr unless an ancestor logger handles them."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        current = logger.parent
+        while current is not None:
+            if current.handlers:
+                return
+            if not current.propagate:
+                break
+            current = current.parent
+        super().emit(record)
+
+
+_fallback_handler = _FallbackHandler()
+
+
+def log_enabled() -> bool:
+    """Return True if stage records are logged even without a recording."""
+    return _log_enabled
+
+
+def set_log_enabled(enabled: bool) -> None:
+    """Switch logging of every stage on or off (overrides the env var)."""
+    global _log_enabled
+    _log_enabled = enabled
+    if enabled:
+        logger.setLevel(logging.INFO)
+        if _fallback_handler not in logger.handlers:
+            logger.addHandler(_fallback_handler)
+    else:
+        logger.setLevel(logging.NOTSET)
+        logger.removeHandler(_fallback_handler)
+
+
+_log_enabled = False
+set_log_enabled(os.environ.get(PERF_LOG_ENV, "").lower() in ("1", "true", "yes"))
+
+
+@contextmanager
+def recording(trace_memory: bool = True) -> Iterator[List[StageRecord]]:
+    """Collect :class:`StageRecord` entries for stages run inside the block.
+
+    Args:
+        trace_memory: Also measure ``tracemalloc`` peaks (starts tracing for
+            the duration of the block if it was off).
+
+    Yields:
+        The list that records are appended to, in completion order.
+    """
+    rec = _Recording(trace_memory)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    token = _active.set(rec)
+    try:
+        yield rec.records
+    finally:
+        _active.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def count_rows(result: Any) -> Optional[int]:
+    """Return the number of rows in a stage result, if it has any."""
+    if isinstance(result, pd.DataFrame):
+        return len(result)
+    if isinstance(result, dict):
+        frames = [value for value in result.values() if isinstance(value, pd.DataFrame)]
+        return sum(len(frame) for frame in frames) if frames else None
+    if isinstance(result, tuple) and hasattr(result, "_fields"):
+        return count_rows(result[0])
+    return None
+
+
+def _emit(record: StageRecord, rec: Optional[_Recording]) -> None:
+    if rec is not None:
+        rec.records.append(record)
+    logger.info(json.dumps({"event": "stage", **record._asdict()}, ensure_ascii=False))
+
+
+@contextmanager
+def stage(name: str, rows: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Measure the enclosed block as stage *name*.
+
+    Yields a dict whose ``'rows'`` entry may be set inside the block.
+    """
+    rec = _active.get()
+    info: Dict[str, Any] = {"rows": rows}
+    if rec is None and not _log_enabled:
+        yield info
+        return
+
+    depth = 0
+    tracing = rec is not None and rec.trace_memory and tracemalloc.is_tracing()
+    if rec is not None:
+        depth = rec.depth
+        rec.depth += 1
+    if tracing:
+        start_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        rec.peaks.append(0)
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        seconds = time.perf_counter() - start
+        if rec is not None:
+            rec.depth -= 1
+        peak_kib = None
+        if tracing:
+            peak = max(tracemalloc.get_traced_memory()[1], rec.peaks.pop())
+            if rec.peaks:
+                # reset_peak() in this stage hid the parent's peak; hand ours up
+                rec.peaks[-1] = max(rec.peaks[-1], peak)
+            peak_kib = round(max(peak - start_memory, 0) / 1024, 1)
+        _emit(StageRecord(name, round(seconds, 6), info["rows"], peak_kib, depth), rec)
+
+
+def instrumented(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator form of :func:`stage`; rows are counted from the result.
+
+    Args:
+        name: Stage name; defaults to ``<module>.<function>``, e.g.
+            ``'parsing.extract_raw_swipes'``.
+    """
+    def decorator(func: F) -> F:
+        stage_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _active.get() is None and not _log_enabled:
+                return func(*args, **kwargs)
+            with stage(stage_name) as info:
+                result = func(*args, **kwargs)
+                info["rows"] = count_rows(result)
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def records_frame(records: List[StageRecord]) -> pd.DataFrame:
+    """Return *records* as a table for display, nested stages indented."""
+    return pd.DataFrame(
+        {
+            "Stage": ["· " * r.depth + r.stage for r in records],
+            "Time (ms)": [round(r.seconds * 1000, 1) for r in records],
+            "Rows": [r.rows for r in records],
+            "Peak memory (KiB)": [r.peak_kib for r in records],
+        }
+    )
@@ -0,0 +1,512 @@
+"""Background jobs with per-stage progress and cancellation.
+
+A :class:`BackgroundJob` runs one function in a daemon thread and hands it a
+``progress(stage, done, total)`` callback (the signature used by
+:func:`modules.pipeline.process_uploads`).  The UI polls :attr:`stages` to
+draw progress bars and picks the result up from the job handle once it is
+done, so reruns never repeat the work.
+
+Cancellation is cooperative: :meth:`BackgroundJob.cancel` sets a flag and the
+next progress call raises :class:`JobCancelledError` inside the worker.
+
+:class:`JobRegistry` shares jobs between sessions by key, so two browsers
+uploading the same files attach to one running job.  It counts the
+subscribers of each job, so one session leaving (:meth:`JobRegistry.release`)
+only cancels the work when nobody else is waiting for it.
+
+:class:`WorkerPool` runs jobs from every session on a fixed number of
+threads.  Jobs wait in a priority queue (interactive views ahead of
+analyses ahead of bulk exports) and one worker is kept for interactive
+calls, so long analyses and exports never hold up an employee switch.  The
+queue of background jobs is bounded; a full queue raises
+:class:`QueueFullError` instead of piling more work onto the CPU.
+
+Where threads cannot be started (the Pyodide runtime of the desktop build)
+jobs run to completion in the caller instead, so callers see a finished job.
+"""
+
+import contextvars
+import heapq
+import itertools
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from modules import instrumentation
+from modules.exceptions import JobCancelledError, QueueFullError
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# WorkerPool priorities, most urgent first
+INTERACTIVE = 0
+ANALYSIS = 1
+BULK = 2
+
+
+def _start_thread(thread: threading.Thread) -> bool:
+    """Start *thread*; False where threads are unavailable (e.g. Pyodide)."""
+    if sys.platform == "emscripten":
+        return False
+    try:
+        thread.start()
+    except RuntimeError:
+        return False
+    return True
+
+
+class BackgroundJob:
+    """Run ``func(*args, progress=..., **kwargs)`` in a background thread.
+
+    Args:
+        func: The work to run; must accept a ``progress`` keyword argument.
+        *args: Positional arguments for *func*.
+        name: Thread name, used in log messages.
+        record: Collect :mod:`modules.instrumentation` stage records for
+            the run (see :attr:`stage_records`).
+        **kwargs: Keyword arguments for *func*.
+    """
+
+    def __init__(
+        self, func: Callable[..., Any], *args: Any, name: str = "job", record: bool = False, **kwargs: Any
+    ) -> None:
+        self.name = name
+        self.record = record
+        self.stage_records: List[instrumentation.StageRecord] = []
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stages: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()
+        self._state = PENDING
+        self._result: Any = None
+        self._error: Optional[BaseException] = None
+        self._pool: Optional["WorkerPool"] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # Control
+    # ------------------------------------------------------------------
+
+    def start(self) -> "BackgroundJob":
+        """Start a dedicated worker thread (once) and return the job.
+
+        Without threads the job runs in the caller and is finished on
+        return.  Use :meth:`WorkerPool.submit` instead to run on the shared
+        pool.
+        """
+        with self._lock:
+            if self._thread is not None or self._pool is not None:
+                return self
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        if not _start_thread(self._thread):
+            logger.info("Threads unavailable, running %s inline", self.name)
+            self._run()
+        return self
+
+    def cancel(self) -> None:
+        """Ask the job to stop at its next progress checkpoint.
+
+        A job still waiting in a :class:`WorkerPool` queue is removed from
+        the queue and finishes as cancelled straight away.
+        """
+        self._cancel.set()
+        if self._pool is not None and self._pool.discard(self):
+            logger.info("%s cancelled while queued", self.name)
+            self._finish(CANCELLED, None, None)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job finishes; return False on timeout."""
+        return self._finished.wait(timeout)
+
+    def _progress(self, stage: str, done: int, total: int) -> None:
+        if self._cancel.is_set():
+            raise JobCancelledError(f"{self.name} was cancelled")
+        with self._lock:
+            self._stages[stage] = (done, total)
+
+    def _run(self) -> None:
+        with self._lock:
+            self._state = RUNNING
+            self.started_at = time.monotonic()
+        recorder = instrumentation.recording() if self.record else nullcontext(self.stage_records)
+        try:
+            with recorder as self.stage_records:
+                result = self._func(*self._args, progress=self._progress, **self._kwargs)
+        except JobCancelledError:
+            state, result, error = CANCELLED, None, None
+            logger.info("%s cancelled", self.name)
+        except BaseException as exc:  # surfaced to the UI via .error
+            state, result, error = FAILED, None, exc
+            logger.warning("%s failed: %s", self.name, exc)
+        else:
+            state, error = DONE, None
+        self._finish(state, result, error)
+
+    def _finish(self, state: str, result: Any, error: Optional[BaseException]) -> None:
+        with self._lock:
+            self._state = state
+            self._result = result
+            self._error = error
+            self.finished_at = time.monotonic()
+        self._finished.set()
+
+    # ------------------------------------------------------------------
+    # Status
+    # ------------------------------------------------------------------
+
+    @property
+    def state(self) -> str:
+        """One of 'pending', 'running', 'done', 'failed' or 'cancelled'."""
+        with self._lock:
+            return self._state
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def queue_position(self) -> Optional[int]:
+        """1-based place in the pool's queue while waiting, else None."""
+        if self._pool is None or self.state != PENDING:
+            return None
+        return self._pool.position(self)
+
+    @property
+    def stages(self) -> Dict[str, Tuple[int, int]]:
+        """Snapshot of ``{stage: (done, total)}`` in the order reported."""
+        with self._lock:
+            return dict(self._stages)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the job started running (up to its finish time)."""
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        with self._lock:
+            return self._error
+
+    def result(self) -> Any:
+        """Return the job's result.
+
+        Raises:
+            RuntimeError: If the job has not finished successfully.  A failed
+                job re-raises its own exception instead.
+        """
+        with self._lock:
+            state, result, error = self._state, self._result, self._error
+        if state == FAILED and error is not None:
+            raise error
+        if state != DONE:
+            raise RuntimeError(f"{self.name} is {state}, no result available")
+        return result
+
+
+class JobRegistry:
+    """Thread-safe map of running and finished jobs, shared by key.
+
+    Successful jobs are kept (and reused) until *ttl* seconds after they
+    finish or until more than *max_entries* jobs are held; failed and
+    cancelled jobs are replaced on the next request for their key.
+    Callers that pass a *subscriber* to :meth:`get_or_start` are counted
+    until they :meth:`release` the key.
+
+    Args:
+        max_entries: Most jobs to keep; the oldest finished jobs go first.
+        ttl: Seconds a finished job's result stays available.
+    """
+
+    def __init__(self, max_entries: int = 8, ttl: Optional[float] = None) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, BackgroundJob]" = OrderedDict()
+        self._subscribers: Dict[str, Set[str]] = {}
+
+    def get(self, key: str) -> Optional[BackgroundJob]:
+        with self._lock:
+            return self._jobs.get(key)
+
+    def get_or_start(
+        self,
+        key: str,
+        func: Callable[..., Any],
+        *args: Any,
+        record: bool = False,
+        pool: Optional["WorkerPool"] = None,
+        priority: int = ANALYSIS,
+        subscriber: Optional[str] = None,
+        **kwargs: Any,
+    ) -> BackgroundJob:
+        """Return the job for *key*, starting ``func(*args, **kwargs)`` if needed.
+
+        *record*, *pool* and *priority* apply to a newly started job only; a
+        reused job keeps whatever it recorded.  Without a *pool* the job
+        gets its own thread.  *subscriber* (e.g. a session id) is counted
+        as waiting for the job until it calls :meth:`release`.
+
+        Raises:
+            QueueFullError: If *pool* cannot queue the new job; nothing is
+                registered under *key* in that case.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and self._reusable(job):
+                self._jobs.move_to_end(key)
+                self._subscribe(key, subscriber)
+                return job
+            job = BackgroundJob(func, *args, name=f"analysis-{key[:8]}", record=record, **kwargs)
+            self._jobs[key] = job
+            self._subscribers.pop(key, None)
+            self._subscribe(key, subscriber)
+            self._evict()
+        if pool is None:
+            return job.start()
+        try:
+            return pool.submit(job, priority)
+        except QueueFullError:
+            with self._lock:
+                if self._jobs.get(key) is job:
+                    del self._jobs[key]
+                    self._subscribers.pop(key, None)
+            raise
+
+    def release(self, key: str, subscriber: str) -> bool:
+        """Stop counting *subscriber* as waiting for the job under *key*.
+
+        The job is cancelled when it is still unfinished and no other
+        subscriber is left.
+
+        Returns:
+            True if the job was cancelled.
+        """
+        with self._lock:
+            subscribers = self._subscribers.get(key, set())
+            subscribers.discard(subscriber)
+            if subscribers:
+                return False
+            self._subscribers.pop(key, None)
+            job = self._jobs.get(key)
+        if job is None or job.finished:
+            return False
+        job.cancel()
+        return True
+
+    def results(self) -> List[Any]:
+        """Results of the successful jobs currently held (e.g. to size them)."""
+        with self._lock:
+            held = list(self._jobs.values())
+        return [job.result() for job in held if job.state == DONE]
+
+    def subscribers(self, key: str) -> int:
+        """Number of subscribers waiting for the job under *key*."""
+        with self._lock:
+            return len(self._subscribers.get(key, ()))
+
+    def _reusable(self, job: BackgroundJob) -> bool:
+        # A job being cancelled by its last subscriber is not handed out again
+        return job.state not in (FAILED, CANCELLED) and not job.cancel_requested and not self._expired(job)
+
+    def _subscribe(self, key: str, subscriber: Optional[str]) -> None:
+        if subscriber is not None:
+            self._subscribers.setdefault(key, set()).add(subscriber)
+
+    def _expired(self, job: BackgroundJob) -> bool:
+        if self.ttl is None or job.finished_at is None:
+            return False
+        return time.monotonic() - job.finished_at > self.ttl
+
+    def _evict(self) -> None:
+        for key in [key for key, job in self._jobs.items() if self._expired(job)]:
+            del self._jobs[key]
+            self._subscribers.pop(key, None)
+        # Running jobs may still have sessions waiting on them
+        finished = [key for key, job in self._jobs.items() if job.finished]
+        while len(self._jobs) > self.max_entries and finished:
+            key = finished.pop(0)
+            del self._jobs[key]
+            self._subscribers.pop(key, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+
+def _call(func: Callable[..., Any], args: tuple, kwargs: Dict[str, Any], progress: Callable[..., None]) -> Any:
+    return func(*args, **kwargs)
+
+
+class WorkerPool:
+    """Fixed set of worker threads fed from a bounded priority queue.
+
+    Jobs run in priority order (lower first, e.g. :data:`INTERACTIVE`
+    before :data:`BULK`) and first-come first-served within a priority.
+    Background jobs (any priority after :data:`INTERACTIVE`) occupy at most
+    ``max_workers - reserved_workers`` workers (but at least one), so
+    interactive calls find a free worker even while analyses and exports
+    run.  Worker threads are started on first use; if none can be started,
+    :meth:`submit` runs the job in the caller instead.
+
+    Args:
+        max_workers: Jobs that may run at the same time.
+        max_queue: Background jobs that may wait for a worker; further
+            submissions raise :class:`QueueFullError`.  Interactive calls
+            are not bounded: each one holds up its own session's run.
+        reserved_workers: Workers kept for interactive calls.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 16, reserved_workers: int = 1) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_background = max(1, max_workers - reserved_workers)
+        self._lock = threading.Condition()
+        self._queue: List[Tuple[int, int, BackgroundJob]] = []
+        self._order = itertools.count()
+        self._workers: List[threading.Thread] = []
+        self._running = 0
+        self._background_running = 0
+
+    def submit(self, job: BackgroundJob, priority: int = ANALYSIS) -> BackgroundJob:
+        """Queue *job* (once) and return it.
+
+        Without threads the job runs in the caller and is finished on return.
+
+        Raises:
+            QueueFullError: If *priority* is a background one and
+                ``max_queue`` background jobs are already waiting.
+        """
+        with self._lock:
+            if job._pool is not None or job._thread is not None:
+                return job
+            waiting = self._queued_background()
+            if priority > INTERACTIVE and waiting >= self.max_queue:
+                raise QueueFullError(
+                    f"The server is busy ({waiting} jobs waiting). Please try again in a moment."
+                )
+            job._pool = self
+            inline = False
+            if len(self._workers) < self.max_workers:
+                worker = threading.Thread(
+                    target=self._work, name=f"worker-{len(self._workers)}", daemon=True
+                )
+                if _start_thread(worker):
+                    self._workers.append(worker)
+                else:
+                    inline = not self._workers
+            if inline:
+                background = self._claim(priority)
+            else:
+                heapq.heappush(self._queue, (priority, next(self._order), job))
+                self._lock.notify_all()
+        if inline:
+            logger.info("Threads unavailable, running %s inline", job.name)
+            self._execute(job, background)
+        return job
+
+    def submit_call(
+        self, func: Callable[..., Any], *args: Any, priority: int = INTERACTIVE, **kwargs: Any
+    ) -> BackgroundJob:
+        """Queue a plain ``func(*args, **kwargs)`` call as a job.
+
+        The call runs in a copy of the caller's context, so an active
+        :func:`modules.instrumentation.recording` still sees its stages.
+        """
+        context = contextvars.copy_context()
+        job = BackgroundJob(
+            context.run, _call, func, args, kwargs, name=getattr(func, "__name__", "call")
+        )
+        return self.submit(job, priority)
+
+    def discard(self, job: BackgroundJob) -> bool:
+        """Remove *job* from the queue; False if it is not waiting."""
+        with self._lock:
+            for i, entry in enumerate(self._queue):
+                if entry[2] is job:
+                    self._queue.pop(i)
+                    heapq.heapify(self._queue)
+                    return True
+        return False
+
+    def position(self, job: BackgroundJob) -> Optional[int]:
+        """Return *job*'s 1-based place in the queue, or None if not waiting."""
+        with self._lock:
+            for rank, entry in enumerate(sorted(self._queue, key=lambda e: e[:2]), start=1):
+                if entry[2] is job:
+                    return rank
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        """Current load: running and queued jobs against the limits."""
+        with self._lock:
+            return {
+                "running": self._running,
+                "background_running": self._background_running,
+                "queued": len(self._queue),
+                "max_workers": self.max_workers,
+                "max_background": self.max_background,
+                "max_queue": self.max_queue,
+            }
+
+    def _queued_background(self) -> int:
+        return sum(1 for priority, _, _ in self._queue if priority > INTERACTIVE)
+
+    def _can_take(self) -> bool:
+        # The heap top is the most urgent job; a background one waits for a
+        # background slot, which also keeps the reserved worker free
+        if not self._queue:
+            return False
+        return self._queue[0][0] <= INTERACTIVE or self._background_running < self.max_background
+
+    def _claim(self, priority: int) -> bool:
+        # Count a job as running (under the lock); True for a background one
+        background = priority > INTERACTIVE
+        self._running += 1
+        self._background_running += background
+        return background
+
+    def _execute(self, job: BackgroundJob, background: bool) -> None:
+        try:
+            if job.cancel_requested:
+                job._finish(CANCELLED, None, None)
+            else:
+                job._run()
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._background_running -= background
+                self._lock.notify_all()
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                while not self._can_take():
+                    self._lock.wait()
+                priority, _, job = heapq.heappop(self._queue)
+                background = self._claim(priority)
+            self._execute(job, background)
@@ -6,16 +6,31 @@ All functions here are pure (no side effects) and suitable for caching.
 import logging
 import re
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 from modules.exceptions import DataFormatError, ParsingError
+from modules.instrumentation import instrumented
+from modules.schedule import (
+    BLOCK_WIDTH,
+    CompiledSchedule,
+    assign_column_periods,
+    compile_metadata,
+    compile_schedule,
+    period_codes,
+)
 from modules.time_utils import (
+    DEFAULT_SCHEDULE,
     Metadata,
+    PeriodSpec,
+    get_schedule,
     has_column,
+    hhmm_series_to_minutes,
     is_time_like,
     is_valid_attr,
+    minutes_to_hhmm,
     normalize_date,
     parse_cht_time,
 )
@@ -71,12 +86,25 @@ def _get_val_by_name(
 # Attendance Report
 # ---------------------------------------------------------------------------
 
+RAW_SWIPE_COLUMNS = ["Employee", "Date", "Period", "Start Time", "End Time"]
+
+# Daily rows of an attendance block start here and span at most 31 days.
+_FIRST_DAY_ROW = 12
+_MAX_DAYS = 31
+
+
+@instrumented()
 def parse_attendance_report(
     df_or_dict: Union[pd.DataFrame, Dict[str, pd.DataFrame]],
     metadata: Metadata,
 ) -> pd.DataFrame:
     """Parse the Attendance Report dataframe(s) into a flat records table.
 
+    Equivalent to ``apply_period_config(extract_raw_swipes(df_or_dict,
+    get_schedule(metadata)), metadata)``.  Callers that re-run with
+    different metadata should cache the raw swipes and call
+    :func:`apply_period_config` directly.
+
     Args:
         df_or_dict: A single DataFrame or dict of DataFrames (one per sheet).
         metadata: Period configuration dict (start/end times, late thresholds).
@@ -86,41 +114,131 @@ def parse_attendance_report(
         Adjusted Start Time, End Time, Adjusted End Time,
         Total Duration (hr), Total Duration (min).
     """
-    records: List[dict] = []
+    raw_swipes = extract_raw_swipes(df_or_dict, get_schedule(metadata))
+    return apply_period_config(raw_swipes, metadata)
+
+
+@instrumented()
+def extract_raw_swipes(
+    df_or_dict: Union[pd.DataFrame, Dict[str, pd.DataFrame]],
+    schedule: Optional[List[PeriodSpec]] = None,
+) -> pd.DataFrame:
+    """Extract the first/last swipe of every period from the workbook.
+
+    This stage only depends on the schedule's column ranges, not on any
+    period times, so its result can be cached per uploaded file and
+    re-adjusted cheaply.
+
+    Args:
+        df_or_dict: A single DataFrame or dict of DataFrames (one per sheet).
+        schedule: Period schedule; defaults to ``DEFAULT_SCHEDULE``.
+
+    Returns:
+        A DataFrame with ``RAW_SWIPE_COLUMNS``.
+    """
+    compiled = compile_schedule(schedule or DEFAULT_SCHEDULE)
 
     if isinstance(df_or_dict, dict):
         sheet_dict = df_or_dict
     else:
         sheet_dict = {"Unknown": df_or_dict}
 
-    fmt = "%H:%M"
-
+    # Blocks of every sheet are stacked side by side and reduced in one pass,
+    # numbered in sheet order so rows come out sheet by sheet.
+    cubes: List[np.ndarray] = []
+    employees: List[Optional[str]] = []
+    year_months: List[Optional[str]] = []
     for sheet_name, df in sheet_dict.items():
         if sheet_name == "排班記錄表":
             continue
+        cube, sheet_employees, sheet_months = _sheet_blocks(df)
+        cubes.append(cube)
+        employees.extend(sheet_employees)
+        year_months.extend(sheet_months)
+
+    if not any(employees):
+        return pd.DataFrame(columns=RAW_SWIPE_COLUMNS)
+    return _reduce_swipes(
+        np.concatenate(cubes, axis=1),
+        np.asarray(employees, dtype=object),
+        np.asarray(year_months, dtype=object),
+        compiled,
+    )
 
-        rows = df.values.tolist()
-        num_cols = len(df.columns)
-        base_cols = [c for c in range(0, num_cols, 15)]
 
-        for base_col in base_cols:
-            if base_col >= num_cols:
-                continue
+@instrumented()
+def apply_period_config(
+    raw_swipes: pd.DataFrame, metadata: Metadata
+) -> pd.DataFrame:
+    """Clamp raw swipes to the configured periods and compute durations.
 
-            employee, year_month_str = _extract_employee_header(
-                rows, base_col
-            )
+    The effective start is the period start when the employee swiped in by
+    the late threshold, otherwise the actual swipe; the effective end is the
+    earlier of the swipe-out and the period end.  Periods missing from the
+    schedule are bounded by their own swipes.  Rows whose times (or whose
+    period's metadata) cannot be parsed keep their raw times and get a zero
+    duration.  Fully vectorized — cheap enough to run on every rerun.
 
-            if not employee:
-                continue
-            if not year_month_str:
-                year_month_str = datetime.now().strftime("%Y-%m")
+    Args:
+        raw_swipes: Output of :func:`extract_raw_swipes`.
+        metadata: Period configuration dict.
 
-            _parse_daily_rows(
-                rows, base_col, employee, year_month_str, metadata, fmt, records
-            )
+    Returns:
+        *raw_swipes* plus Adjusted Start Time, Adjusted End Time,
+        Total Duration (hr) and Total Duration (min), in the column order of
+        :func:`parse_attendance_report`.
+    """
+    df = raw_swipes.copy()
+    compiled = compile_metadata(metadata)
+
+    t1 = hhmm_series_to_minutes(df["Start Time"])
+    t2 = hhmm_series_to_minutes(df["End Time"])
+
+    codes = period_codes(df["Period"], compiled)
+    known = codes >= 0
+    idx = np.clip(codes, 0, None)
+    p_start = np.where(known, compiled.start[idx], t1)
+    p_end = np.where(known, compiled.end[idx], t2)
+    p_late = np.where(known, compiled.late[idx], t1)
+
+    bad_meta = known & (np.isnan(p_start) | np.isnan(p_end) | np.isnan(p_late))
+    for code in np.unique(codes[bad_meta]):
+        logger.warning(
+            "Invalid %s metadata; durations set to 0", compiled.names[code]
+        )
 
-    return pd.DataFrame(records)
+    ok = ~(np.isnan(t1) | np.isnan(t2) | bad_meta)
+    if len(df) and not ok.all():
+        logger.warning("Could not compute duration for %d swipe rows", int((~ok).sum()))
+
+    with np.errstate(invalid="ignore"):
+        eff_start = np.where(t1 <= p_late, p_start, t1)
+        eff_end = np.minimum(t2, p_end)
+        duration_min = np.where(ok, np.maximum(eff_end - eff_start, 0.0), 0.0)
+
+    adj_start = df["Start Time"].to_numpy(dtype=object).copy()
+    adj_end = df["End Time"].to_numpy(dtype=object).copy()
+    adj_start[ok] = minutes_to_hhmm(eff_start[ok])
+    adj_end[ok] = minutes_to_hhmm(eff_end[ok])
+
+    df["Adjusted Start Time"] = adj_start
+    df["Adjusted End Time"] = adj_end
+    df["Total Duration (hr)"] = np.round(duration_min / 60.0, 2)
+    df["Total Duration (min)"] = duration_min
+
+    return df[
+        [
+            "Employee",
+            "Date",
+            "Period",
+            "Start Time",
+            "Adjusted Start Time",
+            "End Time",
+            "Adjusted End Time",
+            "Total Duration (hr)",
+            "Total Duration (min)",
+        ]
+    ]
 
 
 def _extract_employee_header(
@@ -165,115 +283,104 @@ def _extract_employee_header(
     return employee, year_month_str
 
 
-def _parse_daily_rows(
-    rows: List[list],
-    base_col: int,
-    employee: str,
-    year_month_str: str,
-    metadata: Metadata,
-    fmt: str,
-    records: List[dict],
-) -> None:
-    """Parse daily attendance rows for a single employee block.
+def _sheet_blocks(
+    df: pd.DataFrame,
+) -> Tuple[np.ndarray, List[Optional[str]], List[Optional[str]]]:
+    """Split a sheet into its 15-column employee blocks.
 
-    Mutates *records* in-place by appending dicts.
+    Returns:
+        A tuple ``(cube, employees, year_months)``: the daily rows as a
+        ``(_MAX_DAYS, blocks, BLOCK_WIDTH)`` object array padded with None,
+        and each block's employee and 'YYYY-MM' (None where the block has
+        no employee).
     """
-    start_data_row = 12
-    periods_to_scan = [
-        ("早診", range(1, 6)),
-        ("晚診", range(6, 10)),
-    ]
-
-    for row_idx in range(start_data_row, min(start_data_row + 31, len(rows))):
-        row = rows[row_idx]
-        if base_col >= len(row):
+    values = df.to_numpy(dtype=object)
+    num_cols = len(df.columns)
+    num_blocks = -(-num_cols // BLOCK_WIDTH)
+    rows = values[:_FIRST_DAY_ROW].tolist()
+
+    employees: List[Optional[str]] = [None] * num_blocks
+    year_months: List[Optional[str]] = [None] * num_blocks
+    for block, base_col in enumerate(range(0, num_cols, BLOCK_WIDTH)):
+        employee, year_month_str = _extract_employee_header(rows, base_col)
+        if not employee:
             continue
+        employees[block] = employee
+        year_months[block] = year_month_str or datetime.now().strftime("%Y-%m")
 
-        date_cell = str(row[base_col]).strip()
-        if not date_cell:
-            continue
+    day_rows = values[_FIRST_DAY_ROW:_FIRST_DAY_ROW + _MAX_DAYS]
+    padded = np.full((_MAX_DAYS, num_blocks * BLOCK_WIDTH), None, dtype=object)
+    padded[:day_rows.shape[0], :num_cols] = day_rows
+    return padded.reshape(_MAX_DAYS, num_blocks, BLOCK_WIDTH), employees, year_months
 
-        day_match = re.search(r"^(\d{1,2})", date_cell)
-        if not day_match:
-            continue
-        day_num = int(day_match.group(1))
-        date_str = f"{year_month_str}-{day_num:02d}"
-
-        for period_name, offsets in periods_to_scan:
-            times: List[str] = []
-            for offset in offsets:
-                if base_col + offset < len(row):
-                    cell_val = row[base_col + offset]
-                    if pd.isna(cell_val):
-                        continue
-                    if isinstance(cell_val, str):
-                        clean_time = cell_val.replace("-", "").strip()
-                        if re.match(r"^\d{1,2}:\d{2}$", clean_time):
-                            times.append(clean_time)
-
-            if not times:
-                continue
-
-            times.sort()
-            start_time_str = times[0]
-            end_time_str = times[-1]
 
-            try:
-                t1 = datetime.strptime(start_time_str, fmt)
-                t2 = datetime.strptime(end_time_str, fmt)
-
-                if period_name == "早診":
-                    p_start = datetime.strptime(metadata["morning_start"], fmt)
-                    p_end = datetime.strptime(metadata["morning_end"], fmt)
-                    p_late = datetime.strptime(metadata["morning_late"], fmt)
-                elif period_name == "晚診":
-                    p_start = datetime.strptime(metadata["night_start"], fmt)
-                    p_end = datetime.strptime(metadata["night_end"], fmt)
-                    p_late = datetime.strptime(metadata["night_late"], fmt)
-                else:
-                    p_start = t1
-                    p_end = t2
-                    p_late = t1
-
-                eff_start = p_start if t1 <= p_late else t1
-                eff_end = min(t2, p_end)
-
-                duration_min = max(
-                    (eff_end - eff_start).total_seconds() / 60.0, 0.0
-                )
-                duration_hr = duration_min / 60.0
-
-                adj_start_str = eff_start.strftime(fmt)
-                adj_end_str = eff_end.strftime(fmt)
-            except ValueError:
-                logger.warning(
-                    "Could not compute duration for %s %s %s",
-                    employee, date_str, period_name,
-                )
-                duration_hr = 0.0
-                duration_min = 0.0
-                adj_start_str = start_time_str
-                adj_end_str = end_time_str
+def _reduce_swipes(
+    cube: np.ndarray,
+    employees: np.ndarray,
+    year_months: np.ndarray,
+    compiled: CompiledSchedule,
+) -> pd.DataFrame:
+    """Reduce a ``(days, blocks, offsets)`` array to raw per-period swipes.
 
-            records.append(
-                {
-                    "Employee": employee,
-                    "Date": date_str,
-                    "Period": period_name,
-                    "Start Time": start_time_str,
-                    "Adjusted Start Time": adj_start_str,
-                    "End Time": end_time_str,
-                    "Adjusted End Time": adj_end_str,
-                    "Total Duration (hr)": round(duration_hr, 2),
-                    "Total Duration (min)": duration_min,
-                }
-            )
+    Swipe cells are matched with vectorized string ops and mapped to periods
+    via the compiled column bins, then reduced to the earliest/latest swipe
+    per (block, day, period).  Blocks without an employee are skipped.
+    """
+    # --- day number per (day row, block) ---
+    day_nums = pd.to_numeric(
+        pd.Series(cube[:, :, 0].ravel()).astype(str).str.strip()
+        .str.extract(r"^(\d{1,2})", expand=False),
+        errors="coerce",
+    ).to_numpy().reshape(cube.shape[:2])
+
+    # --- swipe cells, their period and (day row, block) position ---
+    offset_codes = assign_column_periods(np.arange(BLOCK_WIDTH), compiled)
+    cells = pd.Series(cube.ravel())
+    cleaned = cells.str.replace("-", "", regex=False).str.strip()
+    is_time = cleaned.str.match(r"^\d{1,2}:\d{2}$").fillna(False).to_numpy(dtype=bool)
+    pos = np.flatnonzero(is_time)
+    row_idx, block_idx, offset = np.unravel_index(pos, cube.shape)
+    code = offset_codes[offset]
+    keep = code >= 0
+    keep &= pd.notna(employees)[block_idx] & ~np.isnan(day_nums[row_idx, block_idx])
+
+    swipes = pd.DataFrame(
+        {
+            "block": block_idx[keep],
+            "row": row_idx[keep],
+            "code": code[keep],
+            "time": cleaned.to_numpy(dtype=object)[pos[keep]],
+        }
+    )
+    if swipes.empty:
+        return pd.DataFrame(columns=RAW_SWIPE_COLUMNS)
+
+    # Sorting on the time strings reproduces the earlier sort-then-take-ends
+    # behaviour; a string groupby min/max would fall back to a per-group loop.
+    keys = ["block", "row", "code"]
+    swipes = swipes.sort_values(keys + ["time"], ignore_index=True)
+    first = swipes.drop_duplicates(keys, keep="first")
+    last = swipes.drop_duplicates(keys, keep="last")
+
+    blocks = first["block"].to_numpy()
+    days = pd.Series(day_nums[first["row"].to_numpy(), blocks].astype(int)).astype(str).str.zfill(2)
+    return pd.DataFrame(
+        {
+            "Employee": employees[blocks],
+            "Date": (pd.Series(year_months[blocks]) + "-" + days).to_numpy(),
+            "Period": np.asarray(compiled.names, dtype=object)[first["code"].to_numpy()],
+            "Start Time": first["time"].to_numpy(),
+            "End Time": last["time"].to_numpy(),
+        },
+        columns=RAW_SWIPE_COLUMNS,
+    )
 
 
 # ---------------------------------------------------------------------------
 # Shift Report
 # ---------------------------------------------------------------------------
 
+@instrumented()
 def parse_shift_report(df: pd.DataFrame) -> pd.DataFrame:
     """Parse the shift schedule sheet (排班記錄表) into a tidy table.
 
@@ -386,6 +493,7 @@ def preprocess_abnormal_stats(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+@instrumented()
 def parse_abnormal_stats(df: pd.DataFrame) -> pd.DataFrame:
     """Parse the Abnormal Stats table into (Employee, Date, Total Late Mins).
 
@@ -441,6 +549,7 @@ def parse_abnormal_stats(df: pd.DataFrame) -> pd.DataFrame:
 # Overtime / Leave Report
 # ---------------------------------------------------------------------------
 
+@instrumented()
 def parse_overtime_leave_report(df: pd.DataFrame) -> pd.DataFrame:
     """Parse the combined overtime, leave, and visit report.
 
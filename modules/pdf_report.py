@@ -1,22 +1,55 @@
-"""PDF report generation for the Attendance System."""
+"""PDF report generation for the Attendance System.
 
+``markdown_pdf`` is an optional dependency: it is imported on first use, and
+:func:`pdf_available` lets the UI hide PDF downloads when it is missing.
+PDFs are built entirely in memory.
+"""
+
+import importlib.util
+import io
 import logging
-import tempfile
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
 
 import pandas as pd
-from markdown_pdf import MarkdownPdf, Section
+
+from modules.export import DEFAULT_EXPORT_WORKERS, iter_rendered, zip_rendered_reports
 
 logger = logging.getLogger(__name__)
 
 
+def pdf_available() -> bool:
+    """Return True if the optional ``markdown_pdf`` package is installed."""
+    return importlib.util.find_spec("markdown_pdf") is not None
+
+
+def _render_markdown(selected_emp: str, summary_data: Dict[str, Any]) -> str:
+    """Render every table of one employee into a single markdown document."""
+    parts = [f"# {selected_emp} Attendance Report\n"]
+
+    for table_name, df in summary_data.items():
+        parts.append(f"## {table_name}\n")
+
+        if table_name == "Warnings":
+            if df:
+                parts.append(pd.DataFrame({"Warnings": df}).to_markdown(index=False) + "\n")
+            else:
+                parts.append("No warnings.\n")
+        else:
+            if not df.empty:
+                parts.append(df.to_markdown(index=False) + "\n")
+            else:
+                parts.append("No data available.\n")
+
+    return "\n".join(parts)
+
+
 def generate_pdf_report(
     selected_emp: str, summary_data: Dict[str, Any]
 ) -> bytes:
     """Generate a PDF report from the provided summary data.
 
-    Each DataFrame is converted to markdown and added as a new section
-    (page break between tables).
+    All tables are rendered into one markdown document (title once, one
+    heading per table) and laid out in a single pass, straight into memory.
 
     Args:
         selected_emp: Employee name for the report title.
@@ -25,43 +58,68 @@ def generate_pdf_report(
 
     Returns:
         PDF file contents as bytes.
-    """
-    pdf = MarkdownPdf(toc_level=0)
 
-    for table_name, df in summary_data.items():
-        markdown_content = f"# {selected_emp} Attendance Report\n\n"
-        markdown_content += f"## {table_name}\n\n"
-
-        if table_name == "Warnings":
-            if df:
-                warnings_df = pd.DataFrame({"Warnings": df})
-                markdown_content += warnings_df.to_markdown(index=False) + "\n\n"
-            else:
-                markdown_content += "No warnings.\n\n"
-        else:
-            if not df.empty:
-                markdown_content += df.to_markdown(index=False) + "\n\n"
-            else:
-                markdown_content += "No data available.\n\n"
+    Raises:
+        ImportError: If ``markdown_pdf`` is not installed.
+    """
+    from markdown_pdf import MarkdownPdf, Section
 
-        pdf.add_section(Section(markdown_content))
+    pdf = MarkdownPdf(toc_level=0)
+    pdf.add_section(Section(_render_markdown(selected_emp, summary_data)))
 
-    # Use a temporary file that is cleaned up automatically
-    tmp = tempfile.NamedTemporaryFile(
-        suffix=".pdf", delete=False, prefix="attendance_"
-    )
+    output = io.BytesIO()
     try:
-        tmp.close()
-        pdf.save(tmp.name)
-        with open(tmp.name, "rb") as f:
-            return f.read()
+        pdf.save_bytes(output)
     except Exception:
         logger.exception("Failed to generate PDF for %s", selected_emp)
         raise
-    finally:
-        import os
+    return output.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# Batch generation
+# ---------------------------------------------------------------------------
+
+def _render_pdf(item: Tuple[str, Dict[str, Any]]) -> Tuple[str, bytes]:
+    """Render one ``(employee, summary)`` pair to PDF bytes."""
+    employee_name, summary_data = item
+    return employee_name, generate_pdf_report(employee_name, summary_data)
+
+
+def iter_employee_pdfs(
+    summaries: Iterable[Tuple[str, Dict[str, Any]]],
+    max_workers: int = DEFAULT_EXPORT_WORKERS,
+) -> Iterator[Tuple[str, bytes]]:
+    """Render employee PDFs in parallel worker processes, preserving order.
 
-        try:
-            os.unlink(tmp.name)
-        except OSError:
-            pass
+    Args:
+        summaries: ``(employee, summary)`` pairs.
+        max_workers: Worker processes; ``1`` renders in-process.
+
+    Yields:
+        ``(employee, pdf_bytes)`` pairs.
+    """
+    return iter_rendered(summaries, _render_pdf, max_workers)
+
+
+def generate_pdf_zip_download(
+    summaries: Iterable[Tuple[str, Dict[str, Any]]],
+    total: Optional[int] = None,
+    max_workers: int = DEFAULT_EXPORT_WORKERS,
+    progress: Optional[Callable[[int, Optional[int], str], None]] = None,
+) -> io.BytesIO:
+    """Bundle every employee's PDF report into one ZIP archive.
+
+    Args:
+        summaries: ``(employee, summary)`` pairs.
+        total: Number of pairs, passed through to *progress*.
+        max_workers: Worker processes for rendering.
+        progress: Optional ``progress(done, total, employee)`` callback.
+
+    Returns:
+        A BytesIO object containing the ``.zip`` bytes, one
+        ``<employee>.pdf`` per employee.
+    """
+    return zip_rendered_reports(
+        iter_employee_pdfs(summaries, max_workers), ".pdf", total, progress
+    )
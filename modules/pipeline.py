@@ -0,0 +1,152 @@
+"""End-to-end input pipeline: read → validate → parse.
+
+Every stage works from the raw upload bytes, so results are fully
+determined by the file contents and the period schedule.  ``app.py`` runs
+:func:`process_uploads` as a :class:`modules.jobs.BackgroundJob` keyed on
+:func:`content_hash`, which lets every session that opens the same monthly
+files share one parse.
+
+All functions here are pure (no side effects) and suitable for caching.
+"""
+
+import hashlib
+import io
+import json
+import logging
+from typing import Callable, List, NamedTuple, Optional
+
+import pandas as pd
+
+from modules.file_io import read_file_by_extension
+from modules.instrumentation import instrumented
+from modules.parsing import (
+    extract_raw_swipes,
+    parse_overtime_leave_report,
+    parse_shift_report,
+)
+from modules.time_utils import Metadata, PeriodSpec
+from modules.validation import validate_attendance_report, validate_overtime_report
+
+logger = logging.getLogger(__name__)
+
+SHIFT_SHEET = "排班記錄表"
+
+# Progress stages reported by process_uploads, in order
+STAGES = ("Decoding sheets", "Validating", "Parsing attendance sheets", "Parsing reports")
+
+ProgressCallback = Callable[[str, int, int], None]
+
+
+class ParsedInputs(NamedTuple):
+    """Metadata-independent results of parsing one pair of uploads."""
+
+    raw_swipes: pd.DataFrame
+    report: pd.DataFrame
+    shifts: pd.DataFrame
+    employees: List[str]
+    warnings: List[str]
+
+
+def content_hash(data: bytes) -> str:
+    """Return a stable hex digest of upload contents."""
+    return hashlib.sha1(data).hexdigest()
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """Return a stable hex digest of a DataFrame's contents and columns."""
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    digest.update("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def metadata_key(metadata: Metadata) -> str:
+    """Serialize *metadata* to a canonical string usable as a cache key."""
+    return json.dumps(dict(metadata), sort_keys=True, ensure_ascii=False)
+
+
+def _as_upload(data: bytes, name: str) -> io.BytesIO:
+    """Wrap raw bytes in a file-like object carrying the upload's name."""
+    buffer = io.BytesIO(data)
+    buffer.name = name
+    return buffer
+
+
+@instrumented()
+def process_uploads(
+    attendance_bytes: bytes,
+    attendance_name: str,
+    report_bytes: bytes,
+    report_name: str,
+    schedule: Optional[List[PeriodSpec]] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> ParsedInputs:
+    """Read, validate and parse an attendance/overtime upload pair.
+
+    Args:
+        attendance_bytes: Contents of the attendance report (考勤報表).
+        attendance_name: Its file name (selects the reader).
+        report_bytes: Contents of the overtime report (加班報表).
+        report_name: Its file name.
+        schedule: Period schedule for swipe extraction; defaults to
+            ``DEFAULT_SCHEDULE``.
+        progress: Optional ``progress(stage, done, total)`` callback for
+            each step of ``STAGES``.  It may raise (e.g.
+            ``JobCancelledError``) to abort between steps.
+
+    Returns:
+        A :class:`ParsedInputs`.
+
+    Raises:
+        ValueError: If either file fails validation.
+        DataFormatError: If either file cannot be read.
+    """
+    notify = progress or (lambda stage, done, total: None)
+
+    # The overtime report counts as one more sheet once its size is known
+    sheet_counts = {"total": 1}
+
+    def sheet_decoded(done: int, total: int) -> None:
+        sheet_counts["total"] = total + 1
+        notify(STAGES[0], done, total + 1)
+
+    notify(STAGES[0], 0, 1)
+    attendance_df = read_file_by_extension(_as_upload(attendance_bytes, attendance_name), sheet_decoded)
+    report_df = read_file_by_extension(_as_upload(report_bytes, report_name))
+    notify(STAGES[0], sheet_counts["total"], sheet_counts["total"])
+
+    notify(STAGES[1], 0, 2)
+    validate_attendance_report(attendance_df, attendance_name)
+    notify(STAGES[1], 1, 2)
+    validate_overtime_report(report_df, report_name)
+    notify(STAGES[1], 2, 2)
+
+    # All employee sheets are stacked and reduced in one call; the shift
+    # sheet is skipped by extract_raw_swipes itself
+    notify(STAGES[2], 0, 1)
+    raw_swipes = extract_raw_swipes(attendance_df, schedule)
+    notify(STAGES[2], 1, 1)
+
+    notify(STAGES[3], 0, 2)
+    parsed_report = parse_overtime_leave_report(report_df)
+    notify(STAGES[3], 1, 2)
+
+    warnings: List[str] = []
+    try:
+        if isinstance(attendance_df, dict) and SHIFT_SHEET in attendance_df:
+            parsed_shifts = parse_shift_report(attendance_df[SHIFT_SHEET])
+        else:
+            parsed_shifts = pd.DataFrame()
+    except Exception as exc:
+        warnings.append(f"Could not parse Shift Entries ({SHIFT_SHEET}): {exc}")
+        parsed_shifts = pd.DataFrame()
+    notify(STAGES[3], 2, 2)
+
+    if raw_swipes.empty:
+        warnings.append("No valid attendance records found.")
+
+    employees = sorted(
+        set(raw_swipes["Employee"].dropna().unique())
+        | set(parsed_report["Employee"].dropna().unique())
+    )
+
+    return ParsedInputs(raw_swipes, parsed_report, parsed_shifts, employees, warnings)
@@ -0,0 +1,142 @@
+"""On-demand cProfile capture.
+
+Profiling is opt-in: set ``ATTENDANCE_PROFILE=1`` (or open the app with
+``?profile=1`` to reveal the sidebar toggle).  A :class:`Profiler` wraps a
+block or a call in ``cProfile`` and writes, per capture::
+
+    <dir>/<timestamp>_<label>_<hash>.pstats   # load with pstats / snakeviz
+    <dir>/<timestamp>_<label>_<hash>.txt      # top-N hotspots, human readable
+
+The input hash ties a profile to the uploaded files without shipping them.
+cProfile only sees the thread it runs on, so wrap the function that runs in
+a background job (:meth:`Profiler.wrap`) rather than the code that starts it.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Iterator, List, NamedTuple, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV = "ATTENDANCE_PROFILE"
+PROFILE_DIR_ENV = "ATTENDANCE_PROFILE_DIR"
+DEFAULT_PROFILE_DIR = "profiles"
+DEFAULT_TOP_N = 25
+MAX_CAPTURES = 10
+
+
+def profile_enabled() -> bool:
+    """Return True if ``ATTENDANCE_PROFILE`` switches profiling on."""
+    return os.environ.get(PROFILE_ENV, "").lower() in ("1", "true", "yes")
+
+
+def profile_dir() -> str:
+    """Return the directory captures are written to."""
+    return os.environ.get(PROFILE_DIR_ENV, DEFAULT_PROFILE_DIR)
+
+
+class ProfileCapture(NamedTuple):
+    """One profiled run and where its files were written."""
+
+    label: str
+    timestamp: str
+    input_hash: str
+    seconds: float
+    pstats_path: str
+    report_path: str
+    hotspots: pd.DataFrame
+
+
+def hotspots(stats: pstats.Stats, top: int = DEFAULT_TOP_N) -> pd.DataFrame:
+    """Return the *top* functions by cumulative time as a table."""
+    rows = []
+    for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+        rows.append({
+            "Function": f"{function} ({os.path.basename(filename)}:{line})",
+            "Calls": calls,
+            "Own time (s)": round(total, 4),
+            "Cumulative (s)": round(cumulative, 4),
+        })
+    table = pd.DataFrame(rows, columns=["Function", "Calls", "Own time (s)", "Cumulative (s)"])
+    return table.sort_values("Cumulative (s)", ascending=False).head(top).reset_index(drop=True)
+
+
+def _report_text(stats: pstats.Stats, capture_header: str, top: int) -> str:
+    buffer = io.StringIO()
+    stats.stream = buffer
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+    return capture_header + buffer.getvalue()
+
+
+class Profiler:
+    """Collects cProfile captures for one session.
+
+    Args:
+        output_dir: Where ``.pstats`` and report files go; defaults to
+            ``ATTENDANCE_PROFILE_DIR`` or ``profiles/``.
+        top: Rows in each hotspots table.
+    """
+
+    def __init__(self, output_dir: Optional[str] = None, top: int = DEFAULT_TOP_N) -> None:
+        self.output_dir = output_dir or profile_dir()
+        self.top = top
+        self._lock = threading.Lock()
+        self._captures: Deque[ProfileCapture] = deque(maxlen=MAX_CAPTURES)
+
+    @property
+    def captures(self) -> List[ProfileCapture]:
+        """Most recent captures, newest last."""
+        with self._lock:
+            return list(self._captures)
+
+    @contextmanager
+    def capture(self, label: str, input_hash: str) -> Iterator[None]:
+        """Profile the enclosed block and save it as a new capture."""
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._save(profile, label, input_hash, time.perf_counter() - start)
+
+    def wrap(self, func: Callable[..., Any], label: str, input_hash: str) -> Callable[..., Any]:
+        """Return *func* wrapped so each call is profiled as one capture."""
+        def profiled(*args: Any, **kwargs: Any) -> Any:
+            with self.capture(label, input_hash):
+                return func(*args, **kwargs)
+
+        return profiled
+
+    def _save(self, profile: cProfile.Profile, label: str, input_hash: str, seconds: float) -> None:
+        now = time.time()
+        timestamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f".{int(now * 1000) % 1000:03d}"
+        stem = os.path.join(self.output_dir, f"{timestamp}_{label}_{input_hash[:12]}")
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        profile.dump_stats(f"{stem}.pstats")
+        stats = pstats.Stats(profile)
+        header = (
+            f"label: {label}\ntimestamp: {timestamp}\ninput hash: {input_hash}\n"
+            f"wall time: {seconds:.3f}s\n\n"
+        )
+        with open(f"{stem}.txt", "w", encoding="utf-8") as f:
+            f.write(_report_text(stats, header, self.top))
+
+        capture = ProfileCapture(
+            label, timestamp, input_hash, seconds,
+            f"{stem}.pstats", f"{stem}.txt", hotspots(stats, self.top),
+        )
+        with self._lock:
+            self._captures.append(capture)
+        logger.info("Saved %s profile (%.2fs) to %s.pstats", label, seconds, stem)
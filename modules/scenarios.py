@@ -0,0 +1,222 @@
+"""What-if threshold sweeps over many metadata configurations.
+
+Answers questions like "what would total late minutes be with a 10-minute
+grace period?" without re-running the analysis once per value.  Every swipe
+row is evaluated against every variant in one broadcasted
+``(variants x rows)`` array pass.
+
+All functions here are pure (no side effects) and suitable for caching.
+"""
+
+import logging
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from modules.schedule import CompiledSchedule, compile_metadata, period_codes
+from modules.time_utils import (
+    Metadata,
+    get_schedule,
+    hhmm_series_to_minutes,
+    hhmm_to_minutes,
+)
+
+logger = logging.getLogger(__name__)
+
+SCENARIO_TOTAL_COLUMNS = [
+    "Total Late Mins",
+    "Total Overtime Mins",
+    "Total On-Duty Hours",
+]
+
+
+def build_variants(
+    metadata: Metadata,
+    late_grace_minutes: Iterable[int],
+    ot_grace_minutes: Iterable[int],
+) -> Dict[str, Metadata]:
+    """Build metadata variants from grace periods around the period times.
+
+    Each variant sets every period's late threshold to *start + late grace*
+    and its overtime start to *end + OT grace*; all other keys are copied
+    from *metadata*.
+
+    Args:
+        metadata: Base period configuration dict.
+        late_grace_minutes: Late grace periods to try, in minutes.
+        ot_grace_minutes: Overtime grace periods to try, in minutes.
+
+    Returns:
+        An ordered dict mapping a scenario label to its metadata.
+
+    Raises:
+        ValueError: If a base period start/end time cannot be parsed.
+    """
+    variants: Dict[str, Metadata] = {}
+    for late_grace in late_grace_minutes:
+        for ot_grace in ot_grace_minutes:
+            variant = dict(metadata)
+            for prefix in (spec["key"] for spec in get_schedule(metadata)):
+                start = hhmm_to_minutes(metadata[f"{prefix}_start"])
+                end = hhmm_to_minutes(metadata[f"{prefix}_end"])
+                if start is None or end is None:
+                    raise ValueError(
+                        f"Invalid {prefix} period times: "
+                        f"{metadata[f'{prefix}_start']!r} - {metadata[f'{prefix}_end']!r}"
+                    )
+                variant[f"{prefix}_late"] = _format_minutes(start + late_grace)
+                variant[f"{prefix}_ot_start"] = _format_minutes(end + ot_grace)
+            label = f"Late +{late_grace} min / OT +{ot_grace} min"
+            variants[label] = variant
+    return variants
+
+
+def _format_minutes(minutes: int) -> str:
+    """Format minutes after midnight as 'HH:MM' (clamped to the day)."""
+    minutes = min(max(int(minutes), 0), 23 * 60 + 59)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _compile_variants(variants: List[Metadata]) -> List[CompiledSchedule]:
+    """Compile every variant, checking they share one complete schedule.
+
+    Raises:
+        ValueError: If any variant holds an unparseable time or the variants
+            disagree on the period list.
+    """
+    compiled = [compile_metadata(variant) for variant in variants]
+    for v, comp in enumerate(compiled):
+        if comp.names != compiled[0].names:
+            raise ValueError("All scenarios must use the same period schedule.")
+        for field in ("start", "end", "late", "ot_start"):
+            bad = np.isnan(getattr(comp, field))
+            if bad.any():
+                raise ValueError(
+                    f"Invalid {field} time for period "
+                    f"{comp.names[int(np.argmax(bad))]} in scenario {v + 1}."
+                )
+    return compiled
+
+
+def run_threshold_sweep(
+    raw_swipes: pd.DataFrame,
+    variants: Dict[str, Metadata],
+) -> Dict[str, pd.DataFrame]:
+    """Compute late, overtime and duty totals for every metadata variant.
+
+    Late minutes follow ``calc_late_time``, overtime minutes follow
+    ``calc_overtime`` on each duty entry (swipe-based overtime, before it is
+    matched to overtime form entries), and duty hours follow
+    ``apply_period_config``.  For any single variant the per-employee late
+    and duty totals equal the ``Monthly Report`` values.
+
+    Args:
+        raw_swipes: Output of ``parsing.extract_raw_swipes`` (adjusted
+            attendance frames work too; only raw times are used).
+        variants: Mapping of scenario label to metadata.
+
+    Returns:
+        A dict with 'Per Employee' (Scenario, Employee, totals) and
+        'Clinic' (Scenario, totals) DataFrames, in variant order.
+
+    Raises:
+        ValueError: If a variant contains an unparseable time.
+    """
+    labels = list(variants)
+    metas = [variants[label] for label in labels]
+    per_emp_cols = ["Scenario", "Employee"] + SCENARIO_TOTAL_COLUMNS
+    if not labels or raw_swipes.empty:
+        return {
+            "Per Employee": pd.DataFrame(columns=per_emp_cols),
+            "Clinic": pd.DataFrame(
+                {"Scenario": labels, **{c: 0.0 for c in SCENARIO_TOTAL_COLUMNS}}
+            ),
+        }
+
+    compiled = _compile_variants(metas)
+    starts = np.stack([c.start for c in compiled])
+    ends = np.stack([c.end for c in compiled])
+    lates = np.stack([c.late for c in compiled])
+    ot_starts = np.stack([c.ot_start for c in compiled])
+
+    # Late/duty match periods exactly, overtime by substring (calc_overtime)
+    codes = period_codes(raw_swipes["Period"], compiled[0])
+    ot_codes = period_codes(raw_swipes["Period"], compiled[0], exact=False)
+    known, ot_known = codes >= 0, ot_codes >= 0
+    idx, ot_idx = np.clip(codes, 0, None), np.clip(ot_codes, 0, None)
+
+    t1 = hhmm_series_to_minutes(raw_swipes["Start Time"])[None, :]
+    t2 = hhmm_series_to_minutes(raw_swipes["End Time"])[None, :]
+    has_t1 = known & ~np.isnan(t1)
+    has_t2 = known & ~np.isnan(t2)
+    has_ot = ot_known & ~np.isnan(t2)
+
+    # (variants x rows) threshold grids via fancy indexing
+    p_start, p_end = starts[:, idx], ends[:, idx]
+    p_late, p_ot = lates[:, idx], ot_starts[:, ot_idx]
+
+    with np.errstate(invalid="ignore"):
+        late = np.where(has_t1 & (t1 > p_late), t1 - p_late, 0.0)
+        overtime = np.where(has_ot & (t2 > p_ot), t2 - p_ot, 0.0)
+        eff_start = np.where(t1 <= p_late, p_start, t1)
+        eff_end = np.minimum(t2, p_end)
+        duty_min = np.where(
+            has_t1 & has_t2, np.maximum(eff_end - eff_start, 0.0), 0.0
+        )
+    duty_hr = np.round(duty_min / 60.0, 2)
+
+    employees = raw_swipes["Employee"].to_numpy()
+    per_employee = []
+    for name, grid in zip(
+        SCENARIO_TOTAL_COLUMNS, (late, overtime, duty_hr)
+    ):
+        sums = pd.DataFrame(grid.T, columns=labels).groupby(employees).sum()
+        per_employee.append(
+            sums.stack().rename(name).rename_axis(["Employee", "Scenario"])
+        )
+
+    per_emp = pd.concat(per_employee, axis=1).reset_index()
+    per_emp["Scenario"] = pd.Categorical(per_emp["Scenario"], categories=labels)
+    per_emp = per_emp.sort_values(["Scenario", "Employee"])
+    per_emp["Scenario"] = per_emp["Scenario"].astype(str)
+    per_emp = per_emp[per_emp_cols].reset_index(drop=True)
+
+    clinic = pd.DataFrame(
+        {
+            "Scenario": labels,
+            "Total Late Mins": late.sum(axis=1),
+            "Total Overtime Mins": overtime.sum(axis=1),
+            "Total On-Duty Hours": duty_hr.sum(axis=1),
+        }
+    )
+
+    return {"Per Employee": per_emp, "Clinic": clinic}
+
+
+def parse_minutes_list(text: str) -> List[int]:
+    """Parse a comma-separated list of minute values (e.g. '0, 5, 10').
+
+    Args:
+        text: User input.
+
+    Returns:
+        A list of ints in input order, duplicates removed.
+
+    Raises:
+        ValueError: If any entry is not a non-negative integer.
+    """
+    values: List[int] = []
+    for part in str(text).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit():
+            raise ValueError(
+                f"'{part}' is not a whole number of minutes."
+            )
+        if int(part) not in values:
+            values.append(int(part))
+    if not values:
+        raise ValueError("Please enter at least one minute value.")
+    return values
@@ -0,0 +1,224 @@
+"""Compile the declarative period schedule into vectorized lookups.
+
+A schedule (see :class:`modules.time_utils.PeriodSpec`) lists any number of
+periods with their swipe-column ranges and metadata time keys.  Compiling it
+yields plain numpy arrays:
+
+* column bin edges, so every swipe cell's block offset maps to a period code
+  with one ``np.searchsorted`` call, and
+* per-period threshold arrays (start, end, late, overtime start in minutes),
+  indexed by period code.
+
+Period assignment and late/overtime math then stay fully vectorized no
+matter how many periods the clinic runs.
+
+All functions here are pure (no side effects) and suitable for caching.
+"""
+
+import json
+import logging
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from modules.time_utils import (
+    PERIOD_TIME_FIELDS,
+    Metadata,
+    PeriodSpec,
+    get_schedule,
+    hhmm_series_to_minutes,
+    hhmm_to_minutes,
+)
+
+logger = logging.getLogger(__name__)
+
+BLOCK_WIDTH = 15
+
+
+class CompiledSchedule(NamedTuple):
+    """Array form of a period schedule.
+
+    Threshold arrays hold minutes after midnight, NaN where the metadata
+    value is missing or unparseable.
+    """
+
+    names: List[str]
+    column_edges: np.ndarray   # sorted first-column offset of each bin
+    column_stops: np.ndarray   # exclusive stop offset of each bin
+    column_codes: np.ndarray   # period code of each bin
+    start: np.ndarray
+    end: np.ndarray
+    ot_start: np.ndarray
+    late: np.ndarray
+
+
+def validate_schedule(schedule: List[PeriodSpec]) -> None:
+    """Check that a schedule is well-formed.
+
+    Raises:
+        ValueError: On duplicate names/keys or empty, out-of-block or
+            overlapping column ranges.
+    """
+    if not schedule:
+        raise ValueError("The period schedule must contain at least one period.")
+    names = [spec["name"] for spec in schedule]
+    keys = [spec["key"] for spec in schedule]
+    if len(set(names)) != len(names) or len(set(keys)) != len(keys):
+        raise ValueError(f"Duplicate period names or keys in schedule: {names}")
+
+    ranges = sorted((spec["columns"][0], spec["columns"][1], spec["name"]) for spec in schedule)
+    for first, stop, name in ranges:
+        if not 1 <= first < stop <= BLOCK_WIDTH:
+            raise ValueError(
+                f"Period {name} has invalid column range [{first}, {stop}); "
+                f"offsets must lie within 1..{BLOCK_WIDTH - 1}."
+            )
+    for (_, prev_stop, prev_name), (first, _, name) in zip(ranges, ranges[1:]):
+        if first < prev_stop:
+            raise ValueError(
+                f"Periods {prev_name} and {name} have overlapping columns."
+            )
+
+
+def compile_schedule(
+    schedule: List[PeriodSpec], metadata: Optional[Metadata] = None
+) -> CompiledSchedule:
+    """Compile *schedule* (and the times in *metadata*) to lookup arrays.
+
+    Args:
+        schedule: Period specs in matching priority order.
+        metadata: Period configuration dict; thresholds are NaN without it.
+
+    Returns:
+        A :class:`CompiledSchedule`.
+
+    Raises:
+        ValueError: If the schedule is malformed.
+    """
+    key = json.dumps([schedule, dict(metadata) if metadata else None], sort_keys=True)
+    return _compile_cached(key)
+
+
+def compile_metadata(metadata: Metadata) -> CompiledSchedule:
+    """Compile the schedule carried by *metadata* together with its times."""
+    return compile_schedule(get_schedule(metadata), metadata)
+
+
+@lru_cache(maxsize=64)
+def _compile_cached(key: str) -> CompiledSchedule:
+    schedule, metadata = json.loads(key)
+    validate_schedule(schedule)
+
+    order = np.argsort([spec["columns"][0] for spec in schedule], kind="stable")
+    thresholds = {field: np.full(len(schedule), np.nan) for field in PERIOD_TIME_FIELDS}
+    if metadata:
+        for code, spec in enumerate(schedule):
+            for field in PERIOD_TIME_FIELDS:
+                value = hhmm_to_minutes(metadata.get(f"{spec['key']}_{field}", ""))
+                if value is not None:
+                    thresholds[field][code] = value
+
+    return CompiledSchedule(
+        names=[spec["name"] for spec in schedule],
+        column_edges=np.array([schedule[i]["columns"][0] for i in order], dtype=int),
+        column_stops=np.array([schedule[i]["columns"][1] for i in order], dtype=int),
+        column_codes=order.astype(int),
+        **thresholds,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Period assignment
+# ---------------------------------------------------------------------------
+
+def assign_column_periods(
+    offsets: np.ndarray, compiled: CompiledSchedule
+) -> np.ndarray:
+    """Map block-column offsets to period codes via the column bin edges.
+
+    Args:
+        offsets: Integer column offsets within a 15-column block.
+        compiled: Compiled schedule.
+
+    Returns:
+        An int array of period codes, -1 where no period covers the offset.
+    """
+    offsets = np.asarray(offsets, dtype=int)
+    bins = np.searchsorted(compiled.column_edges, offsets, side="right") - 1
+    safe = np.clip(bins, 0, None)
+    covered = (bins >= 0) & (offsets < compiled.column_stops[safe])
+    return np.where(covered, compiled.column_codes[safe], -1)
+
+
+def period_codes(
+    periods: pd.Series, compiled: CompiledSchedule, exact: bool = True
+) -> np.ndarray:
+    """Map period labels to period codes.
+
+    Args:
+        periods: Series of period labels.
+        compiled: Compiled schedule.
+        exact: Require exact name matches; otherwise the first period whose
+            name is contained in the label wins (as ``calc_overtime`` does).
+
+    Returns:
+        An int array of period codes, -1 for unrecognised labels.
+    """
+    if exact:
+        return pd.Index(compiled.names).get_indexer(periods).astype(int)
+    labels = periods.astype(str)
+    codes = np.full(len(labels), -1, dtype=int)
+    for code, name in enumerate(compiled.names):
+        hit = (codes == -1) & labels.str.contains(name, regex=False).to_numpy()
+        codes[hit] = code
+    return codes
+
+
+# ---------------------------------------------------------------------------
+# Vectorized late / overtime
+# ---------------------------------------------------------------------------
+
+def _minutes_past(
+    times: pd.Series, codes: np.ndarray, thresholds: np.ndarray
+) -> np.ndarray:
+    """Minutes by which each time exceeds its period's threshold (>= 0)."""
+    t = hhmm_series_to_minutes(times)
+    limit = np.where(codes >= 0, thresholds[np.clip(codes, 0, None)], np.nan)
+    with np.errstate(invalid="ignore"):
+        over = t - limit
+    return np.where(over > 0, over, 0.0)
+
+
+def late_minutes(
+    start_times: pd.Series, periods: pd.Series, compiled: CompiledSchedule
+) -> np.ndarray:
+    """Vectorized ``calc_late_time`` over whole columns.
+
+    Args:
+        start_times: 'HH:MM' swipe-in times.
+        periods: Period labels (exact match).
+        compiled: Compiled schedule with metadata times.
+
+    Returns:
+        A float array of late minutes.
+    """
+    return _minutes_past(start_times, period_codes(periods, compiled), compiled.late)
+
+
+def overtime_minutes(
+    end_times: pd.Series, periods: pd.Series, compiled: CompiledSchedule
+) -> np.ndarray:
+    """Vectorized ``calc_overtime`` over whole columns.
+
+    Args:
+        end_times: 'HH:MM' swipe-out times.
+        periods: Period labels (substring match).
+        compiled: Compiled schedule with metadata times.
+
+    Returns:
+        A float array of overtime minutes.
+    """
+    codes = period_codes(periods, compiled, exact=False)
+    return _minutes_past(end_times, codes, compiled.ot_start)
@@ -0,0 +1,265 @@
+"""Per-session data with a memory budget and spill to disk.
+
+Streamlit keeps ``st.session_state`` for every browser session in server
+memory, so parsed frames from many sessions only ever add up.  A
+:class:`SessionStore` holds those large values instead, shared by all
+sessions of the process, and :meth:`SessionStore.maintain` (called on every
+script run) keeps it in check:
+
+* sessions idle for ``idle_seconds`` have their values spilled to
+  compressed files in ``spill_dir``;
+* while resident values exceed ``budget_bytes``, the least recently used
+  sessions are spilled as well;
+* sessions idle for ``ttl`` seconds are dropped along with their files.
+
+Spilled values are reloaded transparently by :meth:`SessionStore.get`.
+Values are pickled (gzip, fast level) so frames round-trip exactly,
+mixed-type object columns included.  Note that frames also referenced by a
+shared cache (e.g. a finished analysis job) are only freed once that cache
+lets go of them too.
+"""
+
+import gzip
+import logging
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET_BYTES = 512 * 1024 * 1024
+DEFAULT_IDLE_SECONDS = 10 * 60
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+COMPRESS_LEVEL = 1
+
+
+def value_nbytes(value: Any) -> int:
+    """Approximate memory held by *value* (deep for DataFrames)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True, index=True))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(value_nbytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class Spilled(NamedTuple):
+    """Placeholder for a value that lives in a spill file."""
+
+    path: str
+    nbytes: int
+
+
+class _Session:
+    def __init__(self) -> None:
+        self.values: Dict[str, Any] = {}
+        self.nbytes: Dict[str, int] = {}
+        self.last_access = time.monotonic()
+
+    def resident_bytes(self) -> int:
+        return sum(n for key, n in self.nbytes.items() if not isinstance(self.values[key], Spilled))
+
+    def spilled_bytes(self) -> int:
+        return sum(n for key, n in self.nbytes.items() if isinstance(self.values[key], Spilled))
+
+
+class SessionStore:
+    """Thread-safe store of per-session values with spill and expiry.
+
+    Args:
+        spill_dir: Directory for spill files; a fresh temporary directory
+            by default.
+        budget_bytes: Resident bytes allowed across all sessions.
+        idle_seconds: Idle time after which a session is spilled.
+        ttl: Idle time after which a session is dropped entirely.
+    """
+
+    def __init__(
+        self,
+        spill_dir: Optional[str] = None,
+        budget_bytes: int = DEFAULT_BUDGET_BYTES,
+        idle_seconds: float = DEFAULT_IDLE_SECONDS,
+        ttl: float = DEFAULT_TTL_SECONDS,
+    ) -> None:
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix="attendance-sessions-")
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self.budget_bytes = budget_bytes
+        self.idle_seconds = idle_seconds
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # Serializes reloads, so concurrent gets of one spilled value read its file once
+        self._reload_lock = threading.Lock()
+        self._sessions: Dict[str, _Session] = {}
+
+    # ------------------------------------------------------------------
+    # Access
+    # ------------------------------------------------------------------
+
+    def put(self, session_id: str, key: str, value: Any) -> None:
+        """Store *value* under *key* for *session_id*, replacing any old one."""
+        nbytes = value_nbytes(value)
+        with self._lock:
+            session = self._sessions.setdefault(session_id, _Session())
+            old = session.values.get(key)
+            session.values[key] = value
+            session.nbytes[key] = nbytes
+            session.last_access = time.monotonic()
+        if isinstance(old, Spilled):
+            _remove(old.path)
+
+    def get(self, session_id: str, key: str, default: Any = None) -> Any:
+        """Return the value for *key*, reloading it from disk if spilled."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or key not in session.values:
+                return default
+            session.last_access = time.monotonic()
+            value = session.values[key]
+        if not isinstance(value, Spilled):
+            return value
+
+        with self._reload_lock:
+            with self._lock:
+                # Another get() may have reloaded (and removed the file) meanwhile
+                value = session.values.get(key, default)
+            if not isinstance(value, Spilled):
+                return value
+            with gzip.open(value.path, "rb") as f:
+                loaded = pickle.load(f)
+            with self._lock:
+                # Keep whatever a concurrent put() stored meanwhile
+                if session.values.get(key) is value:
+                    session.values[key] = loaded
+                    _remove(value.path)
+                else:
+                    loaded = session.values.get(key, default)
+        logger.debug("Reloaded %s for session %s", key, session_id[:8])
+        return loaded
+
+    def has(self, session_id: str, key: str) -> bool:
+        """Return True if *key* is stored for *session_id* (without reloading it)."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session is not None and key in session.values
+
+    def drop(self, session_id: str, key: Optional[str] = None) -> None:
+        """Forget one key of a session, or the whole session."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return
+            if key is None:
+                removed = list(session.values.values())
+                del self._sessions[session_id]
+            else:
+                removed = [session.values.pop(key, None)]
+                session.nbytes.pop(key, None)
+        for value in removed:
+            if isinstance(value, Spilled):
+                _remove(value.path)
+
+    # ------------------------------------------------------------------
+    # Housekeeping
+    # ------------------------------------------------------------------
+
+    def maintain(self, current: Optional[str] = None) -> None:
+        """Expire, spill idle sessions and enforce the budget.
+
+        Args:
+            current: The session running this script; it is touched and
+                never spilled for the budget.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if current in self._sessions:
+                self._sessions[current].last_access = now
+            expired = [sid for sid, s in self._sessions.items() if now - s.last_access > self.ttl]
+        for session_id in expired:
+            logger.info("Dropping abandoned session %s", session_id[:8])
+            self.drop(session_id)
+
+        with self._lock:
+            by_age = sorted(self._sessions.items(), key=lambda item: item[1].last_access)
+            resident = sum(s.resident_bytes() for _, s in by_age)
+            victims: List[Tuple[str, _Session]] = []
+            for session_id, session in by_age:
+                if session_id == current or not session.resident_bytes():
+                    continue
+                if now - session.last_access > self.idle_seconds or resident > self.budget_bytes:
+                    victims.append((session_id, session))
+                    resident -= session.resident_bytes()
+        for session_id, session in victims:
+            self._spill(session_id, session)
+
+    def _spill(self, session_id: str, session: _Session) -> None:
+        with self._lock:
+            items = [(k, v) for k, v in session.values.items() if not isinstance(v, Spilled)]
+        for key, value in items:
+            path = os.path.join(self.spill_dir, f"{session_id}_{uuid.uuid4().hex[:8]}.pkl.gz")
+            with gzip.open(path, "wb", compresslevel=COMPRESS_LEVEL) as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            with self._lock:
+                # Skip values replaced or dropped while writing
+                if session.values.get(key) is value and self._sessions.get(session_id) is session:
+                    session.values[key] = Spilled(path, session.nbytes[key])
+                    path = None
+            if path is not None:
+                _remove(path)
+        logger.info("Spilled session %s to %s", session_id[:8], self.spill_dir)
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, int]:
+        """Totals across sessions: count, resident and spilled bytes."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            return {
+                "sessions": len(sessions),
+                "resident_bytes": sum(s.resident_bytes() for s in sessions),
+                "spilled_bytes": sum(s.spilled_bytes() for s in sessions),
+                "budget_bytes": self.budget_bytes,
+            }
+
+    def session_stats(self, session_id: str) -> Dict[str, int]:
+        """Resident and spilled bytes of one session (zero if unknown)."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return {"resident_bytes": 0, "spilled_bytes": 0}
+            return {"resident_bytes": session.resident_bytes(), "spilled_bytes": session.spilled_bytes()}
+
+    def sessions_frame(self) -> pd.DataFrame:
+        """Per-session resident/spilled MiB and idle time, busiest first."""
+        now = time.monotonic()
+        mib = 1024 * 1024
+        with self._lock:
+            rows = [
+                {
+                    "Session": session_id[:8],
+                    "Resident (MiB)": round(s.resident_bytes() / mib, 2),
+                    "Spilled (MiB)": round(s.spilled_bytes() / mib, 2),
+                    "Idle (s)": round(now - s.last_access),
+                }
+                for session_id, s in self._sessions.items()
+            ]
+        table = pd.DataFrame(rows, columns=["Session", "Resident (MiB)", "Spilled (MiB)", "Idle (s)"])
+        return table.sort_values("Resident (MiB)", ascending=False).reset_index(drop=True)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -6,19 +6,23 @@ Streamlit caching.
 """
 
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
 from modules.exceptions import ParsingError
+from modules.instrumentation import instrumented
+from modules.schedule import compile_metadata, late_minutes, overtime_minutes
 from modules.time_utils import (
     Metadata,
-    calc_late_time,
-    calc_overtime,
-    get_ot_start,
     normalize_date,
 )
-from modules.validation import validate_duty_with_shifts, validate_leave_with_shifts
+from modules.validation import (
+    validate_duty_with_shifts,
+    validate_leave_with_shifts,
+    validate_shifts_by_employee,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -41,23 +45,51 @@ def _apply_late_duration(
     """
     df = emp_swipes.copy()
     if not df.empty:
-        df["Late Duration (min)"] = df.apply(
-            lambda row: calc_late_time(row, metadata), axis=1
+        df["Late Duration (min)"] = late_minutes(
+            df["Start Time"], df["Period"], compile_metadata(metadata)
         )
     else:
         df["Late Duration (min)"] = 0
     return df
 
 
+def _overtime_validity(ot_dur: Any, start: Any, end: Any, note: Any) -> str:
+    """Label one overtime record from its elapsed minutes, times and note."""
+    start_t = str(start)
+    end_t = str(end)
+
+    if not start_t or start_t == "nan" or not end_t or end_t == "nan":
+        is_end_after_start = False
+    else:
+        is_end_after_start = (end_t > start_t)
+
+    has_hash = str(note).strip().startswith("###")
+
+    if ot_dur != 0 and is_end_after_start and not has_hash:
+        return "Valid"
+    elif ot_dur != 0 and is_end_after_start and has_hash:
+        return "Invalid by manual inspection"
+    elif ot_dur == 0 and is_end_after_start:
+        return "Invalid by swiping records"
+    elif ot_dur != 0 and not is_end_after_start:
+        return "Invalid by weird Start/End Time"
+    elif ot_dur == 0 and not is_end_after_start:
+        return "Invalid by weird Start/End Time"
+    return "Invalid"
+
+
 def _build_overtime_records(
     emp_report_filtered: pd.DataFrame,
     duty_entries: pd.DataFrame,
+    on: Sequence[str] = ("Date", "Period"),
 ) -> pd.DataFrame:
     """Merge overtime records with duty entries and compute validity.
 
     Args:
         emp_report_filtered: Overtime/leave report rows filtered to valid dates.
         duty_entries: Duty time entries for the employee.
+        on: Columns matching a record to its duty entry; add 'Employee' to
+            merge several employees' rows at once.
 
     Returns:
         A DataFrame of overtime records with Validity and Elapsed Minutes.
@@ -71,8 +103,8 @@ def _build_overtime_records(
 
     ot_merged = pd.merge(
         ot_records,
-        duty_entries[["Date", "Period", "Start Time", "End Time", "Overtime Duration (min)"]],
-        on=["Date", "Period"],
+        duty_entries[list(on) + ["Start Time", "End Time", "Overtime Duration (min)"]],
+        on=list(on),
         how="left",
     )
 
@@ -83,33 +115,15 @@ def _build_overtime_records(
 
     if not ot_merged.empty:
         ot_merged["Elapsed Minutes"] = ot_merged["Elapsed Minutes"].fillna(0.0)
-        
-        def determine_validity(row):
-            ot_dur = row["Elapsed Minutes"]
-            start_t = str(row["Start Time"])
-            end_t = str(row["End Time"])
-            patient = str(row["Patient/Note"])
-            
-            if not start_t or start_t == "nan" or not end_t or end_t == "nan":
-                is_end_after_start = False
-            else:
-                is_end_after_start = (end_t > start_t)
-                
-            has_hash = patient.strip().startswith("###")
-            
-            if ot_dur != 0 and is_end_after_start and not has_hash:
-                return "Valid"
-            elif ot_dur != 0 and is_end_after_start and has_hash:
-                return "Invalid by manual inspection"
-            elif ot_dur == 0 and is_end_after_start:
-                return "Invalid by swiping records"
-            elif ot_dur != 0 and not is_end_after_start:
-                return "Invalid by weird Start/End Time"
-            elif ot_dur == 0 and not is_end_after_start:
-                return "Invalid by weird Start/End Time"
-            return "Invalid"
-
-        ot_merged["Validity"] = ot_merged.apply(determine_validity, axis=1)
+        ot_merged["Validity"] = [
+            _overtime_validity(*values)
+            for values in zip(
+                ot_merged["Elapsed Minutes"],
+                ot_merged["Start Time"],
+                ot_merged["End Time"],
+                ot_merged["Patient/Note"],
+            )
+        ]
         
         # Keep old behavior: zero out elapsed minutes if strictly Invalid
         # But for 'Invalid by manual inspection' we maintain the value.
@@ -173,8 +187,10 @@ def _build_duty_entries(
     ].copy()
 
     if not duty_entries.empty:
-        duty_entries["Overtime Duration (min)"] = duty_entries.apply(
-            lambda row: calc_overtime(row, metadata), axis=1
+        duty_entries["Overtime Duration (min)"] = overtime_minutes(
+            duty_entries["End Time"],
+            duty_entries["Period"],
+            compile_metadata(metadata),
         )
     else:
         duty_entries["Overtime Duration (min)"] = 0
@@ -214,12 +230,18 @@ def _build_visit_weekly_summary(
     if visit_entries.empty:
         return pd.DataFrame(columns=["Week", "Total Duration (hr)"])
 
+    calc = _with_visit_week(visit_entries)
+    return calc.groupby("Week")["Total Duration (hr)"].sum().reset_index()
+
+
+def _with_visit_week(visit_entries: pd.DataFrame) -> pd.DataFrame:
+    """Return a copy of *visit_entries* with its week-of-month in 'Week'."""
     calc = visit_entries.copy()
     calc["DateObj"] = pd.to_datetime(
         visit_entries["Date"].apply(normalize_date)
     )
     calc["Week"] = ((calc["DateObj"].dt.day - 1) // 7) + 1
-    return calc.groupby("Week")["Total Duration (hr)"].sum().reset_index()
+    return calc
 
 
 def _build_monthly_report(
@@ -271,10 +293,56 @@ def _build_monthly_report(
     )
 
 
+_OVERTIME_DETAIL_COLUMNS = [
+    "Date",
+    "Period",
+    "Start Time",
+    "End Time",
+    "Elapsed Minutes",
+    "OT Attribute",
+    "Patient/Note",
+    "Validity",
+]
+_VISIT_COLUMNS = ["Date", "Start Time", "End Time", "Patient Name", "Total Duration (hr)"]
+
+
+def _overtime_detail(ot_records: pd.DataFrame) -> pd.DataFrame:
+    """Select the Overtime Detail columns, with a fixed empty table."""
+    if ot_records.empty:
+        return pd.DataFrame(columns=_OVERTIME_DETAIL_COLUMNS)
+    return ot_records[_OVERTIME_DETAIL_COLUMNS]
+
+
+def _leave_detail(leave_records: pd.DataFrame) -> pd.DataFrame:
+    """Select the Leave Details columns, with a fixed empty table."""
+    if leave_records.empty:
+        return pd.DataFrame(columns=["Date", "Period", "Type", "Reason"])
+    return leave_records[["Date", "Period", "Leave Type", "Reason"]].rename(
+        columns={"Leave Type": "Type"}
+    )
+
+
+def _visit_entries(visit_records: pd.DataFrame) -> pd.DataFrame:
+    """Select the Visit Entries columns, with a fixed empty table."""
+    if not visit_records.empty and all(c in visit_records.columns for c in _VISIT_COLUMNS):
+        return visit_records[_VISIT_COLUMNS]
+    return pd.DataFrame(columns=_VISIT_COLUMNS)
+
+
+def _month_string(emp_swipes: pd.DataFrame, emp_report: pd.DataFrame) -> str:
+    """Return the 'YYYY-MM' month of the first swipe, else of the first report row."""
+    if not emp_swipes.empty:
+        return emp_swipes.iloc[0]["Date"][:7]
+    if not emp_report.empty:
+        return str(emp_report.iloc[0]["Date"])[:7]
+    return "Unknown"
+
+
 # ---------------------------------------------------------------------------
 # Main orchestrator
 # ---------------------------------------------------------------------------
 
+@instrumented()
 def generate_employee_summary(
     employee_name: str,
     attendance_df: pd.DataFrame,
@@ -332,60 +400,17 @@ def generate_employee_summary(
     ]
 
     # --- visits ---
-    visit_records = emp_report[emp_report["Type"] == "Visit"]
-    visit_cols = ["Date", "Start Time", "End Time", "Patient Name", "Total Duration (hr)"]
-    if not visit_records.empty and all(c in visit_records.columns for c in visit_cols):
-        visit_entries = visit_records[visit_cols]
-    else:
-        visit_entries = pd.DataFrame(columns=visit_cols)
+    visit_entries = _visit_entries(emp_report[emp_report["Type"] == "Visit"])
 
     # --- month string ---
-    month_str = "Unknown"
-    if not emp_swipes.empty:
-        month_str = emp_swipes.iloc[0]["Date"][:7]
-    elif not emp_report.empty:
-        month_str = str(emp_report.iloc[0]["Date"])[:7]
+    month_str = _month_string(emp_swipes, emp_report)
 
     # --- assemble outputs ---
     monthly_report = _build_monthly_report(
         emp_swipes, ot_records, leave_records, visit_entries, month_str
     )
-
-    overtime_detail = (
-        ot_records[
-            [
-                "Date",
-                "Period",
-                "Start Time",
-                "End Time",
-                "Elapsed Minutes",
-                "OT Attribute",
-                "Patient/Note",
-                "Validity",
-            ]
-        ]
-        if not ot_records.empty
-        else pd.DataFrame(
-            columns=[
-                "Date",
-                "Period",
-                "Start Time",
-                "End Time",
-                "Elapsed Minutes",
-                "OT Attribute",
-                "Patient/Note",
-                "Validity",
-            ]
-        )
-    )
-
-    leave_detail = (
-        leave_records[["Date", "Period", "Leave Type", "Reason"]].rename(
-            columns={"Leave Type": "Type"}
-        )
-        if not leave_records.empty
-        else pd.DataFrame(columns=["Date", "Period", "Type", "Reason"])
-    )
+    overtime_detail = _overtime_detail(ot_records)
+    leave_detail = _leave_detail(leave_records)
 
     # duty_entries previously computed
 
@@ -419,3 +444,137 @@ def generate_employee_summary(
         "Shift Entries": filtered_shift,
         "Warnings": warnings,
     }
+
+
+# ---------------------------------------------------------------------------
+# Batch orchestrator
+# ---------------------------------------------------------------------------
+
+def _positions(frame: pd.DataFrame) -> Dict[Any, np.ndarray]:
+    """Map each employee to the row positions of their rows in *frame*."""
+    if frame.empty:
+        return {}
+    return frame.groupby("Employee", sort=False).indices
+
+
+def _rows(frame: pd.DataFrame, positions: Dict[Any, np.ndarray], employee: Any) -> pd.DataFrame:
+    """Return *employee*'s rows of *frame*, in their original order."""
+    return frame.iloc[positions.get(employee, np.empty(0, dtype=np.intp))]
+
+
+def generate_all_summaries(
+    attendance_df: pd.DataFrame,
+    overtime_df: pd.DataFrame,
+    metadata: Metadata,
+    shift_df: Optional[pd.DataFrame] = None,
+    employees: Optional[List[str]] = None,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ``(employee, summary)`` for every employee in one pass.
+
+    Dates, late and overtime minutes, overtime validity, visit weeks and
+    shift warnings are computed once over the stacked frames of all
+    employees; each summary is then sliced out of those results, so the
+    per-employee work is limited to selecting rows and summing them.
+    Summaries are produced lazily so callers can stream them into an
+    export without holding all of them.
+
+    Args:
+        attendance_df: Parsed attendance (swipe) records for all employees.
+        overtime_df: Parsed overtime/leave/visit records for all employees.
+        metadata: Period configuration dict.
+        shift_df: Optional parsed shift schedule DataFrame.
+        employees: Employees to summarise, in output order; defaults to
+            every employee in the attendance and overtime data, sorted.
+
+    Yields:
+        ``(employee, summary)`` pairs, where *summary* equals the dict
+        returned by :func:`generate_employee_summary` for that employee.
+    """
+    if employees is None:
+        employees = sorted(
+            set(attendance_df["Employee"].dropna().unique())
+            | set(overtime_df["Employee"].dropna().unique())
+        )
+    wanted = set(employees)
+
+    # --- stacked swipes: dates, late minutes, duty entries ---
+    swipes = attendance_df[attendance_df["Employee"].isin(wanted)].copy()
+    swipes["Date"] = swipes["Date"].apply(normalize_date)
+    swipes = _apply_late_duration(swipes, metadata)
+    duty_entries = _build_duty_entries(swipes, metadata)
+    duty_entries.insert(0, "Employee", swipes["Employee"])
+
+    # --- stacked report, filtered to each employee's swipe dates ---
+    report = overtime_df[overtime_df["Employee"].isin(wanted)].copy()
+    report["Date"] = report["Date"].apply(normalize_date)
+    swiped_days = set(zip(swipes["Employee"], swipes["Date"]))
+    report_filtered = report[
+        np.array([day in swiped_days for day in zip(report["Employee"], report["Date"])], dtype=bool)
+    ]
+
+    ot_records = _build_overtime_records(
+        report_filtered, duty_entries, on=("Employee", "Date", "Period")
+    )
+    leave_records = report_filtered[report_filtered["Type"] == "Leave"]
+    visit_records = report[report["Type"] == "Visit"]
+    visit_entries = _visit_entries(visit_records)
+    if not visit_entries.empty:
+        visit_entries = visit_entries.assign(Employee=visit_records["Employee"])
+        visit_weeks = (
+            _with_visit_week(visit_entries)
+            .groupby(["Employee", "Week"])["Total Duration (hr)"]
+            .sum()
+            .reset_index()
+        )
+    else:
+        visit_weeks = pd.DataFrame(columns=["Employee", "Week", "Total Duration (hr)"])
+
+    # --- shift validation ---
+    has_shifts = shift_df is not None and not shift_df.empty
+    warnings: Dict[Any, List[str]] = {}
+    if has_shifts:
+        warnings = validate_shifts_by_employee(duty_entries, leave_records, shift_df)
+        shift_positions = shift_df.groupby("Name", sort=False).indices
+
+    swipe_positions = _positions(swipes)
+    report_positions = _positions(report)
+    ot_positions = _positions(ot_records)
+    leave_positions = _positions(leave_records)
+    visit_positions = _positions(visit_entries)
+    week_positions = _positions(visit_weeks)
+
+    duty_entries = duty_entries.drop(columns=["Employee"])
+    visit_entries = visit_entries.drop(columns=["Employee"], errors="ignore")
+    visit_weeks = visit_weeks.drop(columns=["Employee"])
+
+    # --- per-employee slices ---
+    for employee in employees:
+        emp_swipes = _rows(swipes, swipe_positions, employee)
+        emp_ot = _rows(ot_records, ot_positions, employee).reset_index(drop=True)
+        emp_leave = _rows(leave_records, leave_positions, employee)
+        emp_visits = _rows(visit_entries, visit_positions, employee)
+        if emp_visits.empty:
+            emp_visits = pd.DataFrame(columns=_VISIT_COLUMNS)
+        visit_weekly = _rows(visit_weeks, week_positions, employee).reset_index(drop=True)
+        if visit_weekly.empty:
+            visit_weekly = pd.DataFrame(columns=["Week", "Total Duration (hr)"])
+
+        filtered_shift = pd.DataFrame()
+        if has_shifts:
+            filtered_shift = _rows(shift_df, shift_positions, employee).copy()
+            if not filtered_shift.empty:
+                filtered_shift = filtered_shift.drop(columns=["Name"])
+
+        month_str = _month_string(emp_swipes, _rows(report, report_positions, employee))
+        yield employee, {
+            "Monthly Report": _build_monthly_report(
+                emp_swipes, emp_ot, emp_leave, emp_visits, month_str
+            ),
+            "Overtime Detail": _overtime_detail(emp_ot),
+            "Leave Details": _leave_detail(emp_leave),
+            "Duty Time Entries": _rows(duty_entries, swipe_positions, employee),
+            "Visit Entries": emp_visits,
+            "Visit Weekly Summary": visit_weekly,
+            "Shift Entries": filtered_shift,
+            "Warnings": warnings.get(employee, []),
+        }
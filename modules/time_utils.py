@@ -6,8 +6,9 @@ All functions here are pure (no side effects) and suitable for caching.
 import logging
 import re
 from datetime import datetime
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 
 logger = logging.getLogger(__name__)
@@ -19,8 +20,32 @@ logger = logging.getLogger(__name__)
 from typing import TypedDict
 
 
-class Metadata(TypedDict):
-    """Configuration dict for period times."""
+class PeriodSpec(TypedDict):
+    """One clinic period in the declarative schedule.
+
+    The period's times live in the metadata under ``<key>_start``,
+    ``<key>_end``, ``<key>_ot_start`` and ``<key>_late``.
+    """
+
+    name: str                 # label used in reports, e.g. '早診'
+    key: str                  # metadata key prefix, e.g. 'morning'
+    label: str                # sidebar label, e.g. 'Morning'
+    columns: List[int]        # [first, stop) swipe offsets in a 15-col block
+    defaults: Dict[str, str]  # default 'start'/'end'/'ot_start'/'late'
+
+
+class _OptionalMetadata(TypedDict, total=False):
+    """Optional keys of :class:`Metadata`."""
+
+    periods: List[PeriodSpec]
+
+
+class Metadata(_OptionalMetadata):
+    """Configuration dict for period times.
+
+    Custom schedules (e.g. adding 午診) put their period list under
+    ``periods`` together with the matching ``<key>_*`` times.
+    """
 
     morning_start: str
     morning_end: str
@@ -32,6 +57,60 @@ class Metadata(TypedDict):
     night_late: str
 
 
+PERIOD_TIME_FIELDS = ("start", "end", "ot_start", "late")
+
+DEFAULT_SCHEDULE: List[PeriodSpec] = [
+    {
+        "name": "早診",
+        "key": "morning",
+        "label": "Morning",
+        "columns": [1, 6],
+        "defaults": {"start": "08:00", "end": "12:00", "ot_start": "12:10", "late": "08:05"},
+    },
+    {
+        "name": "晚診",
+        "key": "night",
+        "label": "Night",
+        "columns": [6, 10],
+        "defaults": {"start": "16:00", "end": "20:00", "ot_start": "20:10", "late": "16:05"},
+    },
+]
+
+
+def get_schedule(metadata: Optional[Metadata]) -> List[PeriodSpec]:
+    """Return the period schedule carried by *metadata* (or the default).
+
+    Args:
+        metadata: Period configuration dict, or None.
+
+    Returns:
+        A list of :class:`PeriodSpec` in matching priority order.
+    """
+    if metadata and metadata.get("periods"):
+        return list(metadata["periods"])
+    return DEFAULT_SCHEDULE
+
+
+def find_period(
+    period: Any, metadata: Metadata, exact: bool = True
+) -> Optional[PeriodSpec]:
+    """Look up the schedule entry for a period label.
+
+    Args:
+        period: Period label from a record, e.g. '早診'.
+        metadata: Period configuration dict.
+        exact: Require an exact name match; otherwise the first period whose
+            name is contained in *period* wins.
+
+    Returns:
+        The matching :class:`PeriodSpec`, or None.
+    """
+    for spec in get_schedule(metadata):
+        if (period == spec["name"]) if exact else (spec["name"] in str(period)):
+            return spec
+    return None
+
+
 # ---------------------------------------------------------------------------
 # Chinese time parsing
 # ---------------------------------------------------------------------------
@@ -68,6 +147,65 @@ def parse_cht_time(t_str: Optional[str]) -> Optional[datetime]:
         return None
 
 
+# ---------------------------------------------------------------------------
+# HH:MM <-> minutes-of-day (vectorized)
+# ---------------------------------------------------------------------------
+
+_HHMM_RE = re.compile(r"^(\d{1,2}):(\d{1,2})$")
+
+
+def hhmm_to_minutes(t_str: Any) -> Optional[int]:
+    """Convert a single 'HH:MM' string to minutes after midnight.
+
+    Accepts the same inputs as ``datetime.strptime(t_str, '%H:%M')``.
+
+    Args:
+        t_str: Time string such as '08:05'.
+
+    Returns:
+        Minutes after midnight, or None if *t_str* is not a valid time.
+    """
+    match = _HHMM_RE.match(str(t_str))
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2))
+    if hour > 23 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+
+def hhmm_series_to_minutes(values: pd.Series) -> np.ndarray:
+    """Vectorized :func:`hhmm_to_minutes` over a Series of time strings.
+
+    Args:
+        values: Series of 'HH:MM' strings (other values yield NaN).
+
+    Returns:
+        A float array of minutes after midnight, NaN where invalid.
+    """
+    parts = values.astype(str).str.extract(r"^(\d{1,2}):(\d{1,2})$")
+    hours = pd.to_numeric(parts[0], errors="coerce").to_numpy(dtype=float)
+    minutes = pd.to_numeric(parts[1], errors="coerce").to_numpy(dtype=float)
+    total = hours * 60 + minutes
+    total[(hours > 23) | (minutes > 59)] = np.nan
+    return total
+
+
+def minutes_to_hhmm(minutes: np.ndarray) -> np.ndarray:
+    """Format an array of minutes after midnight as zero-padded 'HH:MM'.
+
+    Args:
+        minutes: Integer-valued array (no NaN).
+
+    Returns:
+        An object array of 'HH:MM' strings.
+    """
+    mins = np.asarray(minutes, dtype=int)
+    hours = pd.Series(mins // 60).astype(str).str.zfill(2)
+    rest = pd.Series(mins % 60).astype(str).str.zfill(2)
+    return (hours + ":" + rest).to_numpy(dtype=object)
+
+
 # ---------------------------------------------------------------------------
 # Date helpers
 # ---------------------------------------------------------------------------
@@ -133,12 +271,10 @@ def calc_late_time(row: pd.Series, metadata: Metadata) -> float:
     fmt = "%H:%M"
     try:
         dt = datetime.strptime(str(start_t), fmt)
-        if period == "早診":
-            threshold = datetime.strptime(metadata["morning_late"], fmt)
-        elif period == "晚診":
-            threshold = datetime.strptime(metadata["night_late"], fmt)
-        else:
+        spec = find_period(period, metadata, exact=True)
+        if spec is None:
             return 0.0
+        threshold = datetime.strptime(metadata[f"{spec['key']}_late"], fmt)
         if dt > threshold:
             return (dt - threshold).total_seconds() / 60.0
     except ValueError:
@@ -163,12 +299,10 @@ def calc_overtime(row: pd.Series, metadata: Metadata) -> float:
     fmt = "%H:%M"
     try:
         dt = datetime.strptime(str(end_t), fmt)
-        if "早診" in str(period):
-            threshold = datetime.strptime(metadata["morning_ot_start"], fmt)
-        elif "晚診" in str(period):
-            threshold = datetime.strptime(metadata["night_ot_start"], fmt)
-        else:
+        spec = find_period(period, metadata, exact=False)
+        if spec is None:
             return 0.0
+        threshold = datetime.strptime(metadata[f"{spec['key']}_ot_start"], fmt)
         if dt > threshold:
             return (dt - threshold).total_seconds() / 60.0
     except ValueError:
@@ -186,11 +320,10 @@ def get_ot_start(period: str, metadata: Metadata) -> str:
     Returns:
         Time string like '12:10', or '' if period is unrecognised.
     """
-    if "早診" in str(period):
-        return metadata["morning_ot_start"]
-    elif "晚診" in str(period):
-        return metadata["night_ot_start"]
-    return ""
+    spec = find_period(period, metadata, exact=False)
+    if spec is None:
+        return ""
+    return metadata.get(f"{spec['key']}_ot_start", "")
 
 
 # ---------------------------------------------------------------------------
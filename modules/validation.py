@@ -4,10 +4,12 @@ All functions here are pure (no side effects) and suitable for caching.
 """
 
 import logging
-from typing import List
+from typing import Any, Dict, List, Sequence
 
 import pandas as pd
 
+from modules.instrumentation import instrumented
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,17 +17,21 @@ logger = logging.getLogger(__name__)
 # Shared helper
 # ---------------------------------------------------------------------------
 
-def _melt_shifts(shift_df: pd.DataFrame) -> pd.DataFrame:
+_SHIFT_KEYS = ["Employee", "Date", "Period"]
+
+
+def _melt_shifts(shift_df: pd.DataFrame, id_vars: Sequence[str] = ("Date",)) -> pd.DataFrame:
     """Melt a shift DataFrame to long format (Date, Period) keeping only active shifts.
 
     Args:
         shift_df: A DataFrame with columns Date, 早診, 午診, 晚診.
+        id_vars: Columns to keep on every melted row, e.g. the employee too.
 
     Returns:
-        A DataFrame with columns Date, Period (where Attendance == 1).
+        A DataFrame with the *id_vars* columns and Period (where Attendance == 1).
     """
     melted = shift_df.melt(
-        id_vars=["Date"],
+        id_vars=list(id_vars),
         value_vars=["早診", "午診", "晚診"],
         var_name="Period",
         value_name="Attendance",
@@ -37,6 +43,7 @@ def _melt_shifts(shift_df: pd.DataFrame) -> pd.DataFrame:
 # File-level validators
 # ---------------------------------------------------------------------------
 
+@instrumented()
 def validate_attendance_report(
     df_dict: object, file_name: str
 ) -> bool:
@@ -65,6 +72,7 @@ def validate_attendance_report(
     return True
 
 
+@instrumented()
 def validate_abnormal_stats(df: pd.DataFrame, file_name: str) -> bool:
     """Validate the Abnormal Stats report has required columns.
 
@@ -88,6 +96,7 @@ def validate_abnormal_stats(df: pd.DataFrame, file_name: str) -> bool:
     return True
 
 
+@instrumented()
 def validate_overtime_report(df: pd.DataFrame, file_name: str) -> bool:
     """Validate the Overtime Report has required columns.
 
@@ -123,6 +132,93 @@ def validate_overtime_report(df: pd.DataFrame, file_name: str) -> bool:
 # Cross-reference validators
 # ---------------------------------------------------------------------------
 
+def _is_real_period(date: Any, period: Any) -> bool:
+    return pd.notna(date) and pd.notna(period) and period != 0 and str(period) != "0"
+
+
+def _duty_shift_warnings(
+    duty_df: pd.DataFrame, leave_df: pd.DataFrame, shift_melted: pd.DataFrame
+) -> Dict[Any, List[str]]:
+    # Every frame carries an Employee column; the outer merge sorts its keys,
+    # so each employee's rows come out in (Date, Period) order
+    warnings: Dict[Any, List[str]] = {}
+    if shift_melted.empty and duty_df.empty:
+        return warnings
+
+    merged = pd.merge(
+        shift_melted[_SHIFT_KEYS], duty_df[_SHIFT_KEYS], on=_SHIFT_KEYS, how="outer", indicator=True
+    )
+    leave_keys = set(leave_df[_SHIFT_KEYS].itertuples(index=False, name=None))
+
+    # Shift has entry but duty doesn't
+    missing_swipe = merged.loc[merged["_merge"] == "left_only", _SHIFT_KEYS]
+    for employee, date, period in missing_swipe.itertuples(index=False, name=None):
+        if (employee, date, period) not in leave_keys:
+            warnings.setdefault(employee, []).append(
+                f"Missing Swipe! {employee} on {date} "
+                f"{period} has shift but no swipe or leave record."
+            )
+
+    # Duty has entry but shift doesn't
+    swiped_no_shift = merged.loc[merged["_merge"] == "right_only", _SHIFT_KEYS]
+    for employee, date, period in swiped_no_shift.itertuples(index=False, name=None):
+        if _is_real_period(date, period):
+            warnings.setdefault(employee, []).append(
+                f"Swiped without Shift! {employee} on {date} "
+                f"{period} swiped but no shift found in 排班記錄表."
+            )
+
+    return warnings
+
+
+def _leave_shift_warnings(leave_df: pd.DataFrame, shift_melted: pd.DataFrame) -> Dict[Any, List[str]]:
+    # Both frames carry an Employee column; the left merge keeps leave order
+    warnings: Dict[Any, List[str]] = {}
+    merged = pd.merge(
+        leave_df[_SHIFT_KEYS], shift_melted[_SHIFT_KEYS], on=_SHIFT_KEYS, how="left", indicator=True
+    )
+    missing_shift_for_leave = merged.loc[merged["_merge"] == "left_only", _SHIFT_KEYS]
+    for employee, date, period in missing_shift_for_leave.itertuples(index=False, name=None):
+        if _is_real_period(date, period):
+            warnings.setdefault(employee, []).append(
+                f"Wrong Leave Registry! {employee} on {date} "
+                f"{period} has leave record but no shift to take leave from."
+            )
+    return warnings
+
+
+def validate_shifts_by_employee(
+    duty_df: pd.DataFrame,
+    leave_df: pd.DataFrame,
+    shift_df: pd.DataFrame,
+) -> Dict[Any, List[str]]:
+    """Cross-check duty and leave against the shift schedule for everyone at once.
+
+    Gives each employee listed in *shift_df* the warnings of
+    :func:`validate_duty_with_shifts` followed by those of
+    :func:`validate_leave_with_shifts`, in the same order, from one merge
+    over all employees instead of two per employee.
+
+    Args:
+        duty_df: Duty Time Entries of every employee, with an Employee column.
+        leave_df: Leave Details of every employee, with an Employee column.
+        shift_df: Parsed shift schedule (with its 'Name' column).
+
+    Returns:
+        A dict mapping employees with warnings to their warning strings.
+    """
+    shifts = shift_df.rename(columns={"Name": "Employee"})
+    employees = shifts["Employee"].unique()
+    shift_melted = _melt_shifts(shifts, id_vars=("Employee", "Date"))
+    duty_df = duty_df[duty_df["Employee"].isin(employees)]
+    leave_df = leave_df[leave_df["Employee"].isin(employees)]
+
+    warnings = _duty_shift_warnings(duty_df, leave_df, shift_melted)
+    for employee, leave_warnings in _leave_shift_warnings(leave_df, shift_melted).items():
+        warnings.setdefault(employee, []).extend(leave_warnings)
+    return warnings
+
+
 def validate_duty_with_shifts(
     duty_df: pd.DataFrame,
     leave_df: pd.DataFrame,
@@ -140,46 +236,14 @@ def validate_duty_with_shifts(
     Returns:
         A list of warning strings.
     """
-    warnings: List[str] = []
     if shift_df.empty:
-        return warnings
-
-    shift_melted = _melt_shifts(shift_df)
-
-    if shift_melted.empty and duty_df.empty:
-        return warnings
-
-    merged = pd.merge(
-        shift_melted, duty_df, on=["Date", "Period"], how="outer", indicator=True
+        return []
+    warnings = _duty_shift_warnings(
+        duty_df.assign(Employee=employee_name),
+        leave_df.assign(Employee=employee_name),
+        _melt_shifts(shift_df).assign(Employee=employee_name),
     )
-
-    # Shift has entry but duty doesn't
-    missing_swipe = merged[merged["_merge"] == "left_only"]
-    for _, row in missing_swipe.iterrows():
-        leave_match = leave_df[
-            (leave_df["Date"] == row["Date"]) & (leave_df["Period"] == row["Period"])
-        ]
-        if leave_match.empty:
-            warnings.append(
-                f"Missing Swipe! {employee_name} on {row['Date']} "
-                f"{row['Period']} has shift but no swipe or leave record."
-            )
-
-    # Duty has entry but shift doesn't
-    swiped_no_shift = merged[merged["_merge"] == "right_only"]
-    for _, row in swiped_no_shift.iterrows():
-        if (
-            pd.notna(row["Date"])
-            and pd.notna(row["Period"])
-            and row["Period"] != 0
-            and str(row["Period"]) != "0"
-        ):
-            warnings.append(
-                f"Swiped without Shift! {employee_name} on {row['Date']} "
-                f"{row['Period']} swiped but no shift found in 排班記錄表."
-            )
-
-    return warnings
+    return warnings.get(employee_name, [])
 
 
 def validate_leave_with_shifts(
@@ -210,22 +274,8 @@ def validate_leave_with_shifts(
                 )
         return warnings
 
-    shift_melted = _melt_shifts(shift_df)
-    merged = pd.merge(
-        leave_df, shift_melted, on=["Date", "Period"], how="left", indicator=True
+    shift_warnings = _leave_shift_warnings(
+        leave_df.assign(Employee=employee_name),
+        _melt_shifts(shift_df).assign(Employee=employee_name),
     )
-    missing_shift_for_leave = merged[merged["_merge"] == "left_only"]
-
-    for _, row in missing_shift_for_leave.iterrows():
-        if (
-            pd.notna(row["Date"])
-            and pd.notna(row["Period"])
-            and row["Period"] != 0
-            and str(row["Period"]) != "0"
-        ):
-            warnings.append(
-                f"Wrong Leave Registry! {employee_name} on {row['Date']} "
-                f"{row['Period']} has leave record but no shift to take leave from."
-            )
-
-    return warnings
+    return shift_warnings.get(employee_name, [])
@@ -0,0 +1,404 @@
+"""Watch-folder daemon: process new monthly exports as they are dropped in.
+
+The watcher polls an input folder for attendance reports (考勤報表) and
+overtime form exports.  A file counts as *changed* when its mtime or size
+moves, and as *ready* once it has stayed unchanged for the debounce window
+(so half-copied files are never read).  Ready files are content-hashed and
+dated: an attendance report by its block headers, a form export by the
+dates of its rows (an export may span several months).  Every attendance
+report is paired with the newest export covering its month, and each pair
+whose hashes were not processed before becomes a job running the batch
+pipeline (see :mod:`modules.cli`) in a worker pool.  Files whose month
+cannot be read are paired by recency, so their job reports the problem.
+
+Finished jobs publish their outputs to ``<output>/<job id>/`` and their
+monthly aggregates to the history store.  Workers never write history
+themselves; the watcher merges their rows under
+:func:`modules.history.history_lock`, which the app and the batch runner
+take too.  A JSON status file reports queue depth, running jobs and per-job
+stage timings::
+
+    python -m modules.watcher inbox/ --output out/ --config config.json
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import signal
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from modules import history
+from modules.aggregates import input_months
+from modules.cli import DEFAULT_FORMATS, OUTPUT_FORMATS, check_formats, load_metadata, load_month, write_outputs
+from modules.file_io import read_file_by_extension
+from modules.parsing import extract_raw_swipes, parse_overtime_leave_report
+from modules.time_utils import Metadata
+
+logger = logging.getLogger(__name__)
+
+ATTENDANCE_PATTERNS = ["*考勤*.xls", "*考勤*.xlsx"]
+REPORT_PATTERNS = ["*加班*", "*表單*"]
+REPORT_EXTENSIONS = (".tsv", ".txt", ".csv", ".xlsx")
+STATUS_FILE = "watcher_status.json"
+MAX_STATUS_JOBS = 50
+
+
+class FileState(NamedTuple):
+    """Last observed state of one watched file."""
+
+    mtime: float
+    size: int
+    changed_at: float
+    content_hash: Optional[str]
+    months: Optional[Tuple[str, ...]] = None
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the sha1 of a file's contents, read in chunks."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_months(path: str, kind: str) -> Optional[Tuple[str, ...]]:
+    """Return the 'YYYY-MM' months a watched file covers.
+
+    Returns:
+        The sorted months, or None when the file cannot be read or parsed.
+    """
+    try:
+        with open(path, "rb") as f:
+            contents = read_file_by_extension(f)
+        if kind == "attendance":
+            months = input_months(extract_raw_swipes(contents))
+        else:
+            months = input_months(parse_overtime_leave_report(contents))
+    except Exception as exc:  # the job for this file reports the details
+        logger.warning("Could not date %s: %s", path, exc)
+        return None
+    return tuple(months) or None
+
+
+def classify(name: str) -> Optional[str]:
+    """Return 'attendance', 'report' or None for a file name."""
+    if any(fnmatch.fnmatch(name, pattern) for pattern in ATTENDANCE_PATTERNS):
+        return "attendance"
+    if name.endswith(REPORT_EXTENSIONS) and any(
+        fnmatch.fnmatch(name, pattern) for pattern in REPORT_PATTERNS
+    ):
+        return "report"
+    return None
+
+
+def _ignore_stop_signals() -> None:
+    """Pool initializer: shutdown is driven by the watcher process alone."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+
+def run_job(
+    attendance_path: str,
+    report_path: str,
+    metadata: Metadata,
+    output_dir: str,
+    formats: List[str],
+) -> Dict[str, Any]:
+    """Run one pipeline job (in a worker process).
+
+    Returns:
+        A dict with the job's monthly 'aggregates' rows, 'written' paths and
+        per-stage 'timings' in seconds.
+    """
+    timings: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    month = load_month(attendance_path, report_path, metadata)
+    timings["parse"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    aggregate_table = history.compute_monthly_aggregates(month.attendance, month.report, metadata)
+    timings["aggregate"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    # Rendering stays in this worker: the pool already provides the parallelism
+    written = write_outputs(month, output_dir, formats, aggregate_table, workers=1)
+    timings["write"] = time.perf_counter() - t0
+
+    return {
+        "aggregates": aggregate_table,
+        "written": written,
+        "timings": {stage: round(seconds, 3) for stage, seconds in timings.items()},
+    }
+
+
+class FolderWatcher:
+    """Poll a folder and dispatch pipeline jobs for new attendance/report pairs.
+
+    Args:
+        input_dir: Folder to watch.
+        output_dir: Folder receiving one sub-folder per job.
+        metadata: Period configuration dict.
+        formats: Output formats (see ``modules.cli.OUTPUT_FORMATS``).
+        history_path: Aggregate history file to update, or None.
+        status_path: JSON status file to keep current.
+        debounce: Seconds a file must stay unchanged before it is read.
+        workers: Worker processes for jobs.
+    """
+
+    def __init__(
+        self,
+        input_dir: str,
+        output_dir: str,
+        metadata: Metadata,
+        formats: Optional[List[str]] = None,
+        history_path: Optional[str] = history.HISTORY_FILE,
+        status_path: Optional[str] = None,
+        debounce: float = 10.0,
+        workers: int = 1,
+    ) -> None:
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.metadata = metadata
+        self.formats = list(formats or DEFAULT_FORMATS)
+        check_formats(self.formats)
+        self.history_path = history_path
+        self.status_path = status_path or os.path.join(output_dir, STATUS_FILE)
+        self.debounce = debounce
+        self.pool = ProcessPoolExecutor(
+            max_workers=max(1, workers), initializer=_ignore_stop_signals
+        )
+
+        self.files: Dict[str, FileState] = {}
+        self.pending: Dict[str, Tuple[Future, Dict[str, Any]]] = {}
+        self.jobs: List[Dict[str, Any]] = []
+        self.processed = set(self._load_processed())
+
+    # -- status -----------------------------------------------------------
+
+    def _load_processed(self) -> List[str]:
+        """Job keys already handled by a previous run (from the status file)."""
+        if not os.path.exists(self.status_path):
+            return []
+        try:
+            with open(self.status_path, "r") as f:
+                return json.load(f).get("processed", [])
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable status file %s", self.status_path)
+            return []
+
+    def write_status(self) -> None:
+        """Atomically rewrite the status file."""
+        for future, job in self.pending.values():
+            job["state"] = "running" if future.running() else "queued"
+        running = sum(job["state"] == "running" for _, job in self.pending.values())
+        status = {
+            "updated": datetime.now().isoformat(timespec="seconds"),
+            "queue_depth": len(self.pending) - running,
+            "running": running,
+            "jobs": self.jobs[-MAX_STATUS_JOBS:],
+            "processed": sorted(self.processed),
+        }
+        os.makedirs(os.path.dirname(self.status_path) or ".", exist_ok=True)
+        tmp_path = f"{self.status_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(status, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.status_path)
+
+    # -- scanning ---------------------------------------------------------
+
+    def scan(self, now: Optional[float] = None) -> Dict[str, List[str]]:
+        """Update file states and return ready files by kind, newest first."""
+        now = time.time() if now is None else now
+        seen = set()
+        ready: Dict[str, List[Tuple[float, str]]] = {"attendance": [], "report": []}
+
+        for name in os.listdir(self.input_dir):
+            kind = classify(name)
+            path = os.path.join(self.input_dir, name)
+            if kind is None or not os.path.isfile(path):
+                continue
+            seen.add(path)
+            stat = os.stat(path)
+            state = self.files.get(path)
+            if state is None or (state.mtime, state.size) != (stat.st_mtime, stat.st_size):
+                # New or still being written: restart the debounce window
+                self.files[path] = FileState(stat.st_mtime, stat.st_size, now, None)
+                continue
+            if now - state.changed_at < self.debounce:
+                continue
+            if state.content_hash is None:
+                self.files[path] = state._replace(
+                    content_hash=file_hash(path), months=file_months(path, kind)
+                )
+            ready[kind].append((stat.st_mtime, path))
+
+        for path in set(self.files) - seen:
+            del self.files[path]
+        return {kind: [path for _, path in sorted(paths, reverse=True)] for kind, paths in ready.items()}
+
+    def _job_key(self, attendance_path: str, report_path: str) -> str:
+        return f"{self.files[attendance_path].content_hash}:{self.files[report_path].content_hash}"
+
+    def pair(self, ready: Dict[str, List[str]]) -> List[Tuple[str, str]]:
+        """Pair every ready attendance file with a report, oldest first.
+
+        The report is the newest one covering all of the attendance file's
+        months.  Attendance files of unknown month take the newest report,
+        and ones without a covering report take the newest report of
+        unknown month, so the job can say what is wrong.  Attendance files
+        with neither wait for their report.
+        """
+        pairs = []
+        for attendance_path in reversed(ready["attendance"]):
+            months = self.files[attendance_path].months
+            if months is None:
+                candidates = ready["report"]
+            else:
+                covering = [
+                    path for path in ready["report"]
+                    if set(months) <= set(self.files[path].months or ())
+                ]
+                candidates = covering or [
+                    path for path in ready["report"] if self.files[path].months is None
+                ]
+            if candidates:
+                pairs.append((attendance_path, candidates[0]))
+        return pairs
+
+    def dispatch(self, ready: Dict[str, List[str]]) -> List[str]:
+        """Submit a job for every ready pair not seen before; returns their keys."""
+        keys = []
+        for attendance_path, report_path in self.pair(ready):
+            key = self._job_key(attendance_path, report_path)
+            if key in self.processed or key in self.pending:
+                continue
+            self._submit(key, attendance_path, report_path)
+            keys.append(key)
+        return keys
+
+    def _submit(self, key: str, attendance_path: str, report_path: str) -> None:
+        stem = os.path.splitext(os.path.basename(attendance_path))[0]
+        job = {
+            "id": f"{datetime.now():%Y%m%d-%H%M%S}_{key[:8]}",
+            "attendance": attendance_path,
+            "report": report_path,
+            "months": list(self.files[attendance_path].months or ()),
+            "state": "queued",
+            "queued_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        job["output"] = os.path.join(self.output_dir, f"{job['id']}_{stem}")
+        future = self.pool.submit(
+            run_job, attendance_path, report_path, self.metadata, job["output"], self.formats
+        )
+        self.pending[key] = (future, job)
+        self.jobs.append(job)
+        logger.info("Queued job %s (%s + %s)", job["id"], attendance_path, report_path)
+
+    def collect(self) -> int:
+        """Publish finished jobs; returns how many finished."""
+        finished = 0
+        for key, (future, job) in list(self.pending.items()):
+            if not future.done():
+                continue
+            del self.pending[key]
+            finished += 1
+            self.processed.add(key)
+            job["finished_at"] = datetime.now().isoformat(timespec="seconds")
+            try:
+                result = future.result()
+            except Exception as exc:
+                job["state"] = "failed"
+                job["error"] = str(exc)
+                logger.error("Job %s failed: %s", job["id"], exc)
+                continue
+
+            job["state"] = "done"
+            job["timings"] = result["timings"]
+            job["files_written"] = sum(len(paths) for paths in result["written"].values())
+            if self.history_path:
+                t0 = time.perf_counter()
+                history.merge_into_history(result["aggregates"], self.history_path)
+                job["timings"]["history"] = round(time.perf_counter() - t0, 3)
+            logger.info("Job %s done in %s", job["id"], job["timings"])
+        return finished
+
+    def poll(self, now: Optional[float] = None) -> None:
+        """Run one scan → dispatch → collect cycle and refresh the status file."""
+        self.dispatch(self.scan(now))
+        self.collect()
+        self.write_status()
+
+    def run_forever(self, interval: float = 5.0) -> None:
+        """Poll every *interval* seconds until interrupted."""
+        logger.info("Watching %s (debounce %.0fs)", self.input_dir, self.debounce)
+        try:
+            while True:
+                self.poll()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            logger.info("Stopping watcher")
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Wait for running jobs, publish them and shut the pool down."""
+        self.pool.shutdown(wait=True)
+        self.collect()
+        self.write_status()
+
+
+def _raise_keyboard_interrupt(signum: int, frame: Any) -> None:
+    raise KeyboardInterrupt
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m modules.watcher",
+        description="Watch a folder and process new attendance/overtime exports automatically.",
+    )
+    parser.add_argument("input", help="Folder the exports are dropped into")
+    parser.add_argument("--output", "-o", default="output", help="Output folder (default: output)")
+    parser.add_argument("--config", default="config.json", help="Period configuration JSON (default: config.json)")
+    parser.add_argument(
+        "--format", "-f", nargs="+", dest="formats", default=DEFAULT_FORMATS,
+        choices=OUTPUT_FORMATS, help="Output formats (default: xlsx csv)",
+    )
+    parser.add_argument("--history", default=history.HISTORY_FILE, help="Aggregate history CSV to update ('' to skip)")
+    parser.add_argument("--status", help=f"Status file (default: <output>/{STATUS_FILE})")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between scans (default: 5)")
+    parser.add_argument("--debounce", type=float, default=10.0, help="Seconds a file must stay unchanged (default: 10)")
+    parser.add_argument("--workers", "-j", type=int, default=1, help="Concurrent jobs (default: 1)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
+    try:
+        if not os.path.isdir(args.input):
+            raise ValueError(f"Input folder not found: {args.input}")
+        watcher = FolderWatcher(
+            args.input, args.output, load_metadata(args.config),
+            formats=args.formats, history_path=args.history or None,
+            status_path=args.status, debounce=args.debounce, workers=args.workers,
+        )
+    except ValueError as exc:
+        logger.error("%s", exc)
+        return 1
+
+    # Let service managers stop the daemon as cleanly as Ctrl+C does
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    watcher.run_forever(args.interval)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""Unit tests for modules.aggregates."""
+
+import pytest
+import pandas as pd
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.aggregates import (
+    AGGREGATE_COLUMNS,
+    MONTHLY_REPORT_COLUMNS,
+    clinic_monthly_table,
+    compute_input_hashes,
+    empty_aggregate_table,
+    input_months,
+    lookup_monthly_report,
+    refresh_aggregates,
+    with_monthly_report,
+)
+
+METADATA = {
+    'morning_start': '08:00',
+    'morning_end': '12:00',
+    'morning_ot_start': '12:10',
+    'morning_late': '08:05',
+    'night_start': '16:00',
+    'night_end': '20:00',
+    'night_ot_start': '20:10',
+    'night_late': '16:05',
+}
+
+
+def _make_attendance(rows):
+    return pd.DataFrame([{
+        'Employee': emp,
+        'Date': date,
+        'Period': '早診',
+        'Start Time': start,
+        'Adjusted Start Time': '08:00',
+        'End Time': end,
+        'Adjusted End Time': '12:00',
+        'Total Duration (hr)': 4.0,
+        'Total Duration (min)': 240,
+    } for emp, date, start, end in rows])
+
+
+def _make_overtime(employee, date, patient):
+    return {
+        'Employee': employee,
+        'Type': 'Overtime',
+        'Date': date,
+        'Period': '早診',
+        'Start Time': '',
+        'End Time': '',
+        'Elapsed Minutes': 0.0,
+        'OT Attribute': '正常加班',
+        'Patient/Note': patient,
+    }
+
+
+@pytest.fixture()
+def inputs():
+    att = _make_attendance([
+        ('A', '2026-01-05', '08:10', '12:30'),
+        ('A', '2026-02-03', '08:00', '12:40'),
+        ('B', '2026-02-03', '08:20', '12:00'),
+    ])
+    report = pd.DataFrame([
+        _make_overtime('A', '2026-02-03', 'Patient'),
+        _make_overtime('A', '2026-02-03', '### Patient'),
+    ])
+    return att, report
+
+
+class TestRefreshAggregates:
+    def test_builds_all_rows(self, inputs):
+        att, report = inputs
+        table, refreshed = refresh_aggregates(
+            empty_aggregate_table(), att, report, METADATA
+        )
+        assert list(table.columns) == AGGREGATE_COLUMNS
+        assert len(table) == 3
+        assert set(refreshed) == {('A', '2026-01'), ('A', '2026-02'), ('B', '2026-02')}
+
+    def test_validity_counts(self, inputs):
+        att, report = inputs
+        table, _ = refresh_aggregates(empty_aggregate_table(), att, report, METADATA)
+        row = table[(table['Employee'] == 'A') & (table['Month'] == '2026-02')].iloc[0]
+        assert row['Valid Overtime Entries'] == 1
+        assert row['Invalid Overtime Entries'] == 1
+
+    def test_unchanged_inputs_not_recomputed(self, inputs):
+        att, report = inputs
+        table, _ = refresh_aggregates(empty_aggregate_table(), att, report, METADATA)
+        again, refreshed = refresh_aggregates(table, att, report, METADATA)
+        assert refreshed == []
+        pd.testing.assert_frame_equal(again, table)
+
+    def test_only_changed_month_recomputed(self, inputs):
+        att, report = inputs
+        table, _ = refresh_aggregates(empty_aggregate_table(), att, report, METADATA)
+        att.loc[0, 'Start Time'] = '08:30'
+        table, refreshed = refresh_aggregates(table, att, report, METADATA)
+        assert refreshed == [('A', '2026-01')]
+        row = lookup_monthly_report(table, 'A', '2026-01').iloc[0]
+        assert row['Total Late Mins'] == 25.0
+
+    def test_metadata_change_recomputes(self, inputs):
+        att, report = inputs
+        table, _ = refresh_aggregates(empty_aggregate_table(), att, report, METADATA)
+        changed = dict(METADATA, morning_late='08:15')
+        _, refreshed = refresh_aggregates(table, att, report, changed)
+        assert len(refreshed) == 3
+
+    def test_keeps_months_absent_from_inputs(self, inputs):
+        att, report = inputs
+        table, _ = refresh_aggregates(empty_aggregate_table(), att, report, METADATA)
+        feb_only = att[att['Date'].str.startswith('2026-02')]
+        table, _ = refresh_aggregates(table, feb_only, report, METADATA)
+        assert ('A', '2026-01') in set(zip(table['Employee'], table['Month']))
+
+
+class TestLookup:
+    def test_hashes_are_per_employee_month(self, inputs):
+        att, report = inputs
+        hashes = compute_input_hashes(att, report, METADATA)
+        assert set(hashes) == {('A', '2026-01'), ('A', '2026-02'), ('B', '2026-02')}
+        assert len(set(hashes.values())) == 3
+
+    def test_lookup_monthly_report(self, inputs):
+        att, report = inputs
+        table, _ = refresh_aggregates(empty_aggregate_table(), att, report, METADATA)
+        mr = lookup_monthly_report(table, 'A')
+        assert list(mr.columns) == MONTHLY_REPORT_COLUMNS
+        assert list(mr['Month']) == ['2026-01', '2026-02']
+
+    def test_clinic_monthly_table(self, inputs):
+        att, report = inputs
+        table, _ = refresh_aggregates(empty_aggregate_table(), att, report, METADATA)
+        clinic = clinic_monthly_table(table, '2026-02')
+        assert set(clinic['Employee']) == {'A', 'B'}
+        assert 'Input Hash' not in clinic.columns
+
+    def test_input_months(self, inputs):
+        att, _ = inputs
+        assert input_months(att) == ['2026-01', '2026-02']
+        assert input_months(att.iloc[:0]) == []
+
+
+class TestWithMonthlyReport:
+    def test_only_analyzed_month_reported(self, inputs):
+        att, report = inputs
+        jan = att[att['Date'].str.startswith('2026-01')]
+        feb = att[att['Date'].str.startswith('2026-02')]
+        # January is stored in history first, then February is analyzed
+        table, _ = refresh_aggregates(empty_aggregate_table(), jan, report.iloc[:0], METADATA)
+        table, _ = refresh_aggregates(table, feb, report, METADATA)
+        assert set(table.loc[table['Employee'] == 'A', 'Month']) == {'2026-01', '2026-02'}
+
+        summary = with_monthly_report({'Monthly Report': None}, table, 'A', input_months(feb))
+        assert list(summary['Monthly Report']['Month']) == ['2026-02']
+
+    def test_keeps_computed_report_without_table(self):
+        computed = pd.DataFrame({'Month': ['2026-02']})
+        summary = with_monthly_report({'Monthly Report': computed}, None, 'A', ['2026-02'])
+        assert summary['Monthly Report'] is computed
+
+    def test_clinic_table_restricted_to_months(self, inputs):
+        att, report = inputs
+        table, _ = refresh_aggregates(empty_aggregate_table(), att, report, METADATA)
+        clinic = clinic_monthly_table(table, ['2026-02'])
+        assert set(clinic['Month']) == {'2026-02'}
+        assert len(clinic_monthly_table(table)) == 3
@@ -0,0 +1,44 @@
+"""Unit tests for benchmarks.stages."""
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks import stages
+from benchmarks.stages import CASES, compare, run_suite
+
+
+def _timing(seconds):
+    return {'median_s': seconds, 'min_s': seconds, 'rounds': 1}
+
+
+class TestCompare:
+    def test_flags_slowdown_over_threshold(self):
+        regressions = compare({'a[small]': _timing(0.2)}, {'a[small]': _timing(0.1)}, threshold=0.25)
+        assert len(regressions) == 1 and regressions[0].startswith('a[small]')
+
+    def test_within_threshold(self):
+        assert compare({'a[small]': _timing(0.12)}, {'a[small]': _timing(0.1)}, threshold=0.25) == []
+
+    def test_ignores_noise_and_new_cases(self):
+        assert compare({'a[small]': _timing(0.0015)}, {'a[small]': _timing(0.0005)}) == []
+        assert compare({'b[small]': _timing(1.0)}, {}) == []
+
+
+class TestRunSuite:
+    def test_every_case_runs(self, monkeypatch):
+        monkeypatch.setitem(stages.SIZES, 'tiny', 2)
+        results = run_suite(['tiny'], list(CASES), repeat=1)
+        assert set(results) == {f'{case}[tiny]' for case in CASES}
+        assert all(result['median_s'] >= 0 for result in results.values())
+
+
+class TestMain:
+    def test_missing_baseline_fails(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(stages, 'run_suite', lambda *args: {})
+        assert stages.main(['--baseline', str(tmp_path / 'missing.json')]) != 0
+
+    def test_save_records_baseline(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(stages, 'run_suite', lambda *args: {'a[small]': _timing(0.1)})
+        baseline = tmp_path / 'stages.json'
+        assert stages.main(['--save', '--baseline', str(baseline)]) == 0
+        assert stages.main(['--baseline', str(baseline)]) == 0
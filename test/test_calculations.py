@@ -0,0 +1,35 @@
+"""Unit tests for the modules.calculations re-export facade."""
+
+import subprocess
+
+import pytest
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules import calculations, export, parsing, summary
+
+
+class TestFacade:
+    def test_reexports_resolve(self):
+        assert calculations.generate_employee_summary is summary.generate_employee_summary
+        assert calculations.apply_period_config is parsing.apply_period_config
+        assert calculations.generate_zip_download is export.generate_zip_download
+
+    def test_unknown_name(self):
+        with pytest.raises(AttributeError):
+            calculations.not_a_function
+
+    def test_dir_lists_exports(self):
+        assert 'generate_all_summaries' in dir(calculations)
+
+    def test_import_is_lazy(self):
+        code = (
+            "import sys; import modules.calculations, modules.export, modules.calendar_ui; "
+            "print(sorted(m for m in ('modules.summary', 'openpyxl', 'streamlit_calendar') if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True, check=True,
+            cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), '..')),
+        )
+        assert result.stdout.strip() == '[]'
@@ -0,0 +1,41 @@
+"""Unit tests for modules.calendar_ui."""
+
+import pandas as pd
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.calendar_ui import build_leave_events
+
+METADATA = {
+    'morning_start': '08:00',
+    'morning_end': '12:00',
+    'night_start': '16:00',
+    'night_end': '20:00',
+}
+
+
+class TestBuildLeaveEvents:
+    def test_leave_rows_only(self):
+        report = pd.DataFrame([
+            {'Type': 'Leave', 'Date': '2026-02-03', 'Period': '早診', 'Employee': 'A', 'Leave Type': '事假', 'Reason': '家事'},
+            {'Type': 'Overtime', 'Date': '2026-02-03', 'Period': '晚診', 'Employee': 'A', 'Leave Type': None, 'Reason': None},
+        ])
+        events = build_leave_events(report, METADATA)
+        assert events == [{
+            'title': '[早診請假] A: 家事',
+            'start': '2026-02-03T08:00:00',
+            'end': '2026-02-03T12:00:00',
+            'allDay': False,
+        }]
+
+    def test_missing_reason_falls_back_to_type(self):
+        report = pd.DataFrame([
+            {'Type': 'Leave', 'Date': '2026-02-04 00:00:00', 'Period': '全天', 'Employee': 'B', 'Leave Type': '病假', 'Reason': None},
+        ])
+        event = build_leave_events(report, METADATA)[0]
+        assert event['title'] == '[全天請假] B: 病假'
+        assert (event['start'], event['end']) == ('2026-02-04T08:00:00', '2026-02-04T20:00:00')
+
+    def test_empty_report(self):
+        assert build_leave_events(pd.DataFrame(), METADATA) == []
@@ -0,0 +1,111 @@
+"""Unit tests for modules.cli."""
+
+import json
+
+import pytest
+import pandas as pd
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.cli import load_metadata, main, run
+from modules.history import HISTORY_COLUMNS, load_history, save_history
+
+METADATA = {
+    'morning_start': '08:00',
+    'morning_end': '12:00',
+    'morning_ot_start': '12:10',
+    'morning_late': '08:05',
+    'night_start': '16:00',
+    'night_end': '20:00',
+    'night_ot_start': '20:10',
+    'night_late': '16:05',
+}
+
+
+@pytest.fixture()
+def input_files(tmp_path):
+    grid = [[None] * 15 for _ in range(12)]
+    grid[2][0] = '2026-02-01 ~ 2026-02-28'
+    grid[3][0] = '姓名'
+    grid[3][1] = 'A'
+    line = [None] * 15
+    line[0] = '02 一'
+    line[1], line[2] = '08:10', '12:05'
+    grid.append(line)
+    attendance = tmp_path / 'att.xlsx'
+    with pd.ExcelWriter(attendance) as writer:
+        pd.DataFrame(grid).to_excel(writer, sheet_name='1,2,3', header=False, index=False)
+
+    report = tmp_path / 'ot.csv'
+    pd.DataFrame([{
+        '時間戳記': '2026/2/3 上午 9:00:00',
+        '姓名': 'A',
+        '回報屬性': '加班',
+        '上班日期': '2026-02-02',
+        '加班屬性': '正常加班',
+        '時段': '早診',
+        '加班時處理的病人姓名 or 水藥編號': 'X',
+    }]).to_csv(report, index=False)
+
+    config = tmp_path / 'config.json'
+    config.write_text(json.dumps(METADATA))
+    return str(attendance), str(report), str(config)
+
+
+class TestRun:
+    def test_writes_reports_and_tables(self, input_files, tmp_path):
+        attendance, report, _ = input_files
+        out = tmp_path / 'out'
+        written = run(attendance, report, METADATA, str(out), formats=['xlsx', 'csv'], workers=1)
+        assert written['employees'] == [str(out / 'employees' / 'A.xlsx')]
+        clinic = pd.read_csv(out / 'clinic' / 'clinic_monthly.csv')
+        assert list(clinic['Employee']) == ['A']
+        assert clinic['Total Late Mins'].iloc[0] == 5
+        duty = pd.read_csv(out / 'clinic' / 'duty_time_entries.csv')
+        assert list(duty['Employee']) == ['A']
+
+    def test_history_refresh(self, input_files, tmp_path):
+        attendance, report, _ = input_files
+        history_file = tmp_path / 'history.csv'
+        run(attendance, report, METADATA, str(tmp_path / 'out'), formats=['csv'], workers=1,
+            history_path=str(history_file))
+        assert history_file.exists()
+
+    def test_history_limited_to_this_upload(self, input_files, tmp_path):
+        attendance, report, _ = input_files
+        history_file = tmp_path / 'history.csv'
+        stored = pd.DataFrame(
+            [[employee, month] + [0] * (len(HISTORY_COLUMNS) - 3) + ['']
+             for employee, month in [('A', '2026-01'), ('Z', '2026-02')]],
+            columns=HISTORY_COLUMNS,
+        )
+        save_history(stored, str(history_file))
+        out = tmp_path / 'out'
+        run(attendance, report, METADATA, str(out), formats=['xlsx', 'csv'], workers=1,
+            history_path=str(history_file))
+
+        # Same as the app: only the analyzed employees and months
+        clinic = pd.read_csv(out / 'clinic' / 'clinic_monthly.csv')
+        assert list(zip(clinic['Employee'], clinic['Month'])) == [('A', '2026-02')]
+        monthly = pd.read_excel(out / 'employees' / 'A.xlsx', sheet_name='Monthly Report')
+        assert list(monthly['Month']) == ['2026-02']
+        assert set(load_history(str(history_file))['Month']) == {'2026-01', '2026-02'}
+
+    def test_unknown_format(self, input_files, tmp_path):
+        attendance, report, _ = input_files
+        with pytest.raises(ValueError):
+            run(attendance, report, METADATA, str(tmp_path), formats=['docx'])
+
+
+class TestMain:
+    def test_exit_codes(self, input_files, tmp_path):
+        attendance, report, config = input_files
+        assert main([attendance, report, '--config', config, '-o', str(tmp_path / 'out'), '-j', '1', '-q']) == 0
+        assert main([report, report, '--config', config, '-o', str(tmp_path / 'bad'), '-q']) == 1
+
+    def test_incomplete_config(self, tmp_path):
+        config = tmp_path / 'config.json'
+        config.write_text(json.dumps(dict(METADATA, night_late='')))
+        with pytest.raises(ValueError):
+            load_metadata(str(config))
@@ -0,0 +1,62 @@
+"""Unit tests for benchmarks.equivalence."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks import equivalence
+from benchmarks.equivalence import PAIRS, Pair, check_pair, diff_frames, diff_outputs
+from benchmarks.stages import synthetic_fixture
+from benchmarks.synthetic import SyntheticConfig
+
+
+@pytest.fixture(scope='module')
+def fixture():
+    return synthetic_fixture(SyntheticConfig(employees=3, shifted_row_rate=0.3, leave_rate=0.2, visit_rate=0.2))
+
+
+class TestDiffFrames:
+    def test_equal_within_tolerance(self):
+        expected = pd.DataFrame({'a': [1.0, np.nan], 'b': ['x', None]}, index=[5, 6])
+        actual = pd.DataFrame({'a': [1.0 + 1e-12, np.nan], 'b': ['x', np.nan]})
+        assert diff_frames(expected, actual) == []
+
+    def test_reports_cell(self):
+        mismatch, = diff_frames(pd.DataFrame({'a': [1.0, 2.0]}), pd.DataFrame({'a': [1.0, 2.5]}), location='t')
+        assert mismatch == ('t[1, \'a\']', 2.0, 2.5)
+
+    def test_reports_shape_and_columns(self):
+        expected = pd.DataFrame({'a': [1, 2], 'b': [3, 4]})
+        locations = [m.location for m in diff_frames(expected, expected[['b', 'a']].head(1))]
+        assert locations == ['.columns order', '.rows']
+        missing, = diff_frames(expected, expected[['a']])
+        assert missing.expected == ['b'] and missing.actual == []
+
+
+class TestDiffOutputs:
+    def test_nested(self):
+        expected = {'Report': pd.DataFrame({'h': [1.0]}), 'Warnings': ['late'], 'n': 3}
+        actual = {'Report': pd.DataFrame({'h': [1.0]}), 'Warnings': ['early'], 'n': 3.0}
+        assert [m.location for m in diff_outputs(expected, actual)] == ["['Warnings'][0]"]
+
+    def test_series_against_array(self):
+        assert diff_outputs(pd.Series([0.0, 5.0]), np.array([0.0, 5.0])) == []
+        assert len(diff_outputs(pd.Series([0.0, 5.0]), np.array([0.0, 4.0]))) == 1
+
+
+class TestPairs:
+    @pytest.mark.parametrize('name', list(PAIRS))
+    def test_optimized_matches_reference(self, name, fixture):
+        result = check_pair(name, fixture, 'tiny', repeat=1)
+        assert result.equivalent, result.mismatches
+
+    def test_detects_divergence(self, fixture, monkeypatch):
+        reference = PAIRS['late_minutes'].reference
+        monkeypatch.setitem(equivalence.PAIRS, 'late_minutes', Pair(reference, lambda fx: reference(fx) + 1))
+        result = check_pair('late_minutes', fixture, 'tiny', repeat=1)
+        assert not result.equivalent
+        assert result.mismatch_count == len(fixture.attendance)
+        assert len(result.mismatches) <= equivalence.MAX_REPORTED
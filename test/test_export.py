@@ -2,12 +2,21 @@
 
 import pytest
 import io
+import zipfile
 import pandas as pd
 
 import sys, os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from modules.export import generate_excel_download
+from modules import export
+from modules.export import (
+    combine_detail_tables,
+    export_table,
+    generate_excel_download,
+    generate_zip_download,
+    iter_employee_workbooks,
+    select_excel_backend,
+)
 
 
 class TestGenerateExcelDownload:
@@ -48,3 +57,98 @@ class TestGenerateExcelDownload:
         result = generate_excel_download('Test', data)
         xl = pd.ExcelFile(result, engine='openpyxl')
         assert 'Warnings' not in xl.sheet_names
+
+
+class TestExcelBackends:
+    @pytest.fixture()
+    def sample_data(self):
+        return {
+            'Warnings': ['Warning 1'],
+            'Duty Time Entries': pd.DataFrame({
+                'Date': ['2026-02-01', '2026-02-02'],
+                'Period': ['早診', None],
+                'Total Duration (hr)': [4.0, float('nan')],
+                'Late Duration (min)': [0, 5],
+            }),
+        }
+
+    def test_streaming_matches_openpyxl(self, sample_data):
+        expected = pd.read_excel(generate_excel_download('Test', sample_data, 'openpyxl'), sheet_name=None)
+        result = pd.read_excel(generate_excel_download('Test', sample_data, 'streaming'), sheet_name=None)
+        assert list(result) == list(expected)
+        for name in expected:
+            pd.testing.assert_frame_equal(result[name], expected[name])
+
+    def test_auto_selects_streaming_for_large_data(self, sample_data, monkeypatch):
+        assert select_excel_backend(sample_data) == 'openpyxl'
+        monkeypatch.setattr(export, 'STREAMING_ROW_THRESHOLD', 3)
+        assert select_excel_backend(sample_data) == 'streaming'
+
+    def test_unknown_backend(self, sample_data):
+        with pytest.raises(ValueError):
+            generate_excel_download('Test', sample_data, 'xlsxwriter')
+
+
+class TestGenerateZipDownload:
+    @pytest.fixture()
+    def summaries(self):
+        return [
+            (name, {
+                'Warnings': [],
+                'Monthly Report': pd.DataFrame([{'Month': '2026-02', 'Total Late Mins': i}]),
+            })
+            for i, name in enumerate(['A', 'B/C', 'D'])
+        ]
+
+    def test_one_workbook_per_employee(self, summaries):
+        result = generate_zip_download(iter(summaries), max_workers=1)
+        with zipfile.ZipFile(result) as archive:
+            assert archive.namelist() == ['A.xlsx', 'B_C.xlsx', 'D.xlsx']
+            report = pd.read_excel(io.BytesIO(archive.read('D.xlsx')), sheet_name='Monthly Report')
+        assert report['Total Late Mins'].iloc[0] == 2
+
+    def test_progress(self, summaries):
+        calls = []
+        generate_zip_download(summaries, total=3, max_workers=1,
+                              progress=lambda done, total, emp: calls.append((done, total, emp)))
+        assert calls == [(1, 3, 'A'), (2, 3, 'B/C'), (3, 3, 'D')]
+
+    def test_process_pool_preserves_order(self, summaries):
+        names = [name for name, _ in iter_employee_workbooks(summaries * 3, max_workers=2)]
+        assert names == ['A', 'B/C', 'D'] * 3
+
+
+class TestColumnarExports:
+    @pytest.fixture()
+    def summaries(self):
+        duty = pd.DataFrame({'Date': ['2026-02-02'], 'Period': ['早診'], 'Total Duration (hr)': [4.0]})
+        return [
+            ('A', {'Duty Time Entries': duty, 'Leave Details': pd.DataFrame()}),
+            ('B', {'Duty Time Entries': duty.assign(**{'Total Duration (hr)': 3.5})}),
+        ]
+
+    def test_combine_detail_tables(self, summaries):
+        tables = combine_detail_tables(summaries)
+        duty = tables['Duty Time Entries']
+        assert list(duty.columns) == ['Employee', 'Date', 'Period', 'Total Duration (hr)']
+        assert list(duty['Employee']) == ['A', 'B']
+        assert tables['Leave Details'].empty
+
+    @pytest.mark.parametrize('fmt', ['csv', 'parquet', 'arrow'])
+    def test_round_trip(self, fmt):
+        pa = pytest.importorskip('pyarrow')
+        df = pd.DataFrame({'Employee': ['A', None], 'Late': [1.5, None], 'Mixed': [1, 'x']})
+        data = export_table(df, fmt)
+        if fmt == 'csv':
+            result = pd.read_csv(io.BytesIO(data))
+        elif fmt == 'parquet':
+            result = pd.read_parquet(io.BytesIO(data))
+        else:
+            result = pa.ipc.open_file(pa.BufferReader(data)).read_all().to_pandas()
+        assert list(result.columns) == ['Employee', 'Late', 'Mixed']
+        assert result['Late'].iloc[0] == 1.5
+        assert str(result['Mixed'].iloc[1]) == 'x'
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            export_table(pd.DataFrame(), 'json')
@@ -0,0 +1,192 @@
+"""Unit tests for modules.history."""
+
+import pytest
+import pandas as pd
+
+import sys, os
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.aggregates import clinic_monthly_table
+from modules.history import (
+    HISTORY_COLUMNS,
+    build_range_report,
+    build_year_to_date_report,
+    compute_monthly_aggregates,
+    load_history,
+    merge_history,
+    merge_into_history,
+    refresh_history,
+    save_history,
+)
+
+METADATA = {
+    'morning_start': '08:00',
+    'morning_end': '12:00',
+    'morning_ot_start': '12:10',
+    'morning_late': '08:05',
+    'night_start': '16:00',
+    'night_end': '20:00',
+    'night_ot_start': '20:10',
+    'night_late': '16:05',
+}
+
+
+def _make_attendance(rows):
+    return pd.DataFrame([{
+        'Employee': emp,
+        'Date': date,
+        'Period': '早診',
+        'Start Time': start,
+        'Adjusted Start Time': '08:00',
+        'End Time': '12:00',
+        'Adjusted End Time': '12:00',
+        'Total Duration (hr)': 4.0,
+        'Total Duration (min)': 240,
+    } for emp, date, start in rows])
+
+
+def _make_leave(employee, date, period='全天'):
+    return pd.DataFrame([{
+        'Employee': employee,
+        'Type': 'Leave',
+        'Date': date,
+        'Period': period,
+        'Leave Type': '事假',
+        'Reason': 'Personal',
+    }])
+
+
+def _history_row(employee, month, late=0.0, duty=0.0):
+    return {
+        'Employee': employee, 'Month': month,
+        'Total Late Mins': late, 'Total Overtime Mins': 0.0,
+        'Total On-Duty Hours': duty, 'Total Leave Hours': 0.0,
+        'Total Visit Hours': 0.0,
+        'Valid Overtime Entries': 0, 'Invalid Overtime Entries': 0,
+        'Input Hash': '',
+    }
+
+
+class TestComputeMonthlyAggregates:
+    def test_one_row_per_employee_month(self):
+        att = _make_attendance([
+            ('A', '2026-01-05', '08:10'),
+            ('A', '2026-02-03', '08:00'),
+            ('B', '2026-02-03', '08:20'),
+        ])
+        report = _make_leave('A', '2026-02-03')
+        agg = compute_monthly_aggregates(att, report, METADATA)
+
+        assert list(agg.columns) == HISTORY_COLUMNS
+        assert set(zip(agg['Employee'], agg['Month'])) == {
+            ('A', '2026-01'), ('A', '2026-02'), ('B', '2026-02'),
+        }
+        a_jan = agg[(agg['Employee'] == 'A') & (agg['Month'] == '2026-01')].iloc[0]
+        assert a_jan['Total Late Mins'] == 5.0
+        assert a_jan['Total Leave Hours'] == 0.0
+        a_feb = agg[(agg['Employee'] == 'A') & (agg['Month'] == '2026-02')].iloc[0]
+        assert a_feb['Total Leave Hours'] == 8.0
+
+    def test_empty_inputs(self):
+        agg = compute_monthly_aggregates(pd.DataFrame(), pd.DataFrame(), METADATA)
+        assert agg.empty
+        assert list(agg.columns) == HISTORY_COLUMNS
+
+
+class TestMergeHistory:
+    def test_upsert_replaces_same_month(self):
+        stored = pd.DataFrame([
+            _history_row('A', '2026-01', late=1.0),
+            _history_row('A', '2026-02', late=2.0),
+        ])
+        new = pd.DataFrame([_history_row('A', '2026-02', late=9.0)])
+        merged = merge_history(stored, new)
+        assert len(merged) == 2
+        assert merged.set_index('Month').loc['2026-02', 'Total Late Mins'] == 9.0
+        assert merged.set_index('Month').loc['2026-01', 'Total Late Mins'] == 1.0
+
+    def test_roundtrip(self, tmp_path):
+        path = str(tmp_path / 'history.csv')
+        assert load_history(path).empty
+        stored = pd.DataFrame([_history_row('A', '2026-01', late=1.0)])
+        save_history(stored, path)
+        loaded = load_history(path)
+        assert loaded.iloc[0]['Month'] == '2026-01'
+        assert loaded.iloc[0]['Total Late Mins'] == 1.0
+
+
+class TestConcurrentUpdates:
+    def test_threads_upserting_different_months(self, tmp_path):
+        path = str(tmp_path / 'history.csv')
+        months = [f'2026-{m:02d}' for m in range(1, 13)]
+        start = threading.Barrier(2)
+
+        def upsert(employee):
+            start.wait()
+            for month in months:
+                merge_into_history(pd.DataFrame([_history_row(employee, month)]), path)
+
+        threads = [threading.Thread(target=upsert, args=(emp,)) for emp in ('A', 'B')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stored = load_history(path)
+        assert len(stored) == 24
+        assert set(zip(stored['Employee'], stored['Month'])) == {
+            (emp, month) for emp in ('A', 'B') for month in months
+        }
+
+    def test_refresh_history_keeps_stored_months(self, tmp_path):
+        path = str(tmp_path / 'history.csv')
+        save_history(pd.DataFrame([_history_row('B', '2025-12')]), path)
+        att = _make_attendance([('A', '2026-01-05', '08:10')])
+        _, refreshed = refresh_history(att, _make_leave('A', '2026-01-05').iloc[:0], METADATA, path)
+        assert refreshed == [('A', '2026-01')]
+        assert set(zip(load_history(path)['Employee'], load_history(path)['Month'])) == {
+            ('A', '2026-01'), ('B', '2025-12'),
+        }
+
+    def test_clinic_table_skips_employees_of_other_uploads(self, tmp_path):
+        path = str(tmp_path / 'history.csv')
+        # Another upload (or a former employee) already stored the same month
+        save_history(pd.DataFrame([_history_row('Z', '2026-01')]), path)
+        att = _make_attendance([('A', '2026-01-05', '08:10')])
+        table, _ = refresh_history(att, _make_leave('A', '2026-01-05').iloc[:0], METADATA, path)
+        assert set(clinic_monthly_table(table, ['2026-01'])['Employee']) == {'A', 'Z'}
+        clinic = clinic_monthly_table(table, ['2026-01'], ['A'])
+        assert list(clinic['Employee']) == ['A']
+
+
+class TestRangeReport:
+    @pytest.fixture()
+    def stored(self):
+        return pd.DataFrame([
+            _history_row('A', '2025-12', late=100.0, duty=1.0),
+            _history_row('A', '2026-01', late=1.0, duty=10.0),
+            _history_row('A', '2026-03', late=3.0, duty=30.0),
+            _history_row('B', '2026-01', late=50.0, duty=50.0),
+        ])
+
+    def test_fills_missing_months(self, stored):
+        report = build_range_report(stored, 'A', '2026-01', '2026-03')
+        monthly = report['Monthly Report']
+        assert list(monthly['Month']) == ['2026-01', '2026-02', '2026-03']
+        assert list(monthly['Total Late Mins']) == [1.0, 0.0, 3.0]
+
+    def test_totals(self, stored):
+        report = build_range_report(stored, 'A', '2025-12', '2026-03')
+        totals = report['Totals'].iloc[0]
+        assert totals['Total Late Mins'] == 104.0
+        assert totals['Total On-Duty Hours'] == 41.0
+
+    def test_year_to_date(self, stored):
+        report = build_year_to_date_report(stored, 'A', '2026-03')
+        assert report['Monthly Report']['Month'].iloc[0] == '2026-01'
+        assert report['Totals'].iloc[0]['Total Late Mins'] == 4.0
+
+    def test_reversed_range(self, stored):
+        with pytest.raises(ValueError):
+            build_range_report(stored, 'A', '2026-03', '2026-01')
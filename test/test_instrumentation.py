@@ -0,0 +1,103 @@
+"""Unit tests for modules.instrumentation."""
+
+import io
+import json
+import logging
+import subprocess
+import tracemalloc
+
+import pandas as pd
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules import instrumentation
+from modules.instrumentation import count_rows, instrumented, records_frame, recording, stage
+
+
+@instrumented()
+def _make_frame(n):
+    return pd.DataFrame({'a': range(n)})
+
+
+@instrumented('outer')
+def _outer():
+    with stage('inner') as info:
+        data = [0] * 200_000
+        info['rows'] = len(data)
+    return _make_frame(3)
+
+
+class TestDisabled:
+    def test_no_records_outside_recording(self, monkeypatch, caplog):
+        monkeypatch.setattr(instrumentation, '_log_enabled', False)
+        with caplog.at_level(logging.INFO, logger='modules.instrumentation'):
+            assert len(_make_frame(2)) == 2
+        assert caplog.records == []
+
+    def test_log_without_recording(self, monkeypatch, caplog):
+        monkeypatch.setattr(instrumentation, '_log_enabled', False)
+        instrumentation.set_log_enabled(True)
+        with caplog.at_level(logging.INFO, logger='modules.instrumentation'):
+            _make_frame(2)
+        line = json.loads(caplog.records[-1].getMessage())
+        assert line['stage'].endswith('_make_frame') and line['rows'] == 2
+
+
+    def test_env_flag_logs_without_logging_config(self):
+        # As under Streamlit: nothing configures logging, records still reach stderr
+        code = "from modules.instrumentation import stage\nwith stage('load'):\n    pass"
+        result = subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True, check=True,
+            cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), '..')),
+            env={**os.environ, instrumentation.PERF_LOG_ENV: '1'},
+        )
+        line = json.loads(result.stderr.strip())
+        assert line['event'] == 'stage' and line['stage'] == 'load'
+
+    def test_set_log_enabled_emits_once(self, monkeypatch, caplog):
+        monkeypatch.setattr(instrumentation, '_log_enabled', False)
+        stderr = io.StringIO()
+        monkeypatch.setattr(instrumentation._fallback_handler, 'stream', stderr)
+        instrumentation.set_log_enabled(True)
+        try:
+            with caplog.at_level(logging.INFO, logger='modules.instrumentation'):
+                _make_frame(2)
+        finally:
+            instrumentation.set_log_enabled(False)
+        # caplog's root handler receives the record, so the fallback stays quiet
+        assert len(caplog.records) == 1 and stderr.getvalue() == ''
+        assert instrumentation.logger.level == logging.NOTSET
+
+
+class TestRecording:
+    def test_records_nested_stages(self):
+        with recording() as records:
+            _outer()
+        assert [r.stage for r in records] == ['inner', 'test_instrumentation._make_frame', 'outer']
+        inner, frame, outer = records
+        assert (inner.depth, frame.depth, outer.depth) == (1, 1, 0)
+        assert inner.rows == 200_000 and outer.rows == 3
+        # The inner list dominates memory and must show up in the outer peak too
+        assert inner.peak_kib > 1000 and outer.peak_kib >= inner.peak_kib
+        assert not tracemalloc.is_tracing()
+
+    def test_without_memory(self):
+        with recording(trace_memory=False) as records:
+            _make_frame(1)
+        assert records[0].peak_kib is None
+
+    def test_records_frame(self):
+        with recording(trace_memory=False) as records:
+            _outer()
+        table = records_frame(records)
+        assert list(table.columns) == ['Stage', 'Time (ms)', 'Rows', 'Peak memory (KiB)']
+        assert table['Stage'].iloc[0] == '· inner'
+
+
+class TestCountRows:
+    def test_shapes(self):
+        frame = pd.DataFrame({'a': [1, 2]})
+        assert count_rows(frame) == 2
+        assert count_rows({'x': frame, 'y': frame, 'Warnings': []}) == 4
+        assert count_rows(b'bytes') is None
@@ -0,0 +1,282 @@
+"""Unit tests for modules.jobs."""
+
+import threading
+
+import pytest
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules import instrumentation, jobs
+from modules.exceptions import QueueFullError
+from modules.instrumentation import instrumented
+from modules.jobs import BackgroundJob, JobRegistry, WorkerPool
+
+
+def _steps(n, progress, gate=None):
+    for i in range(1, n + 1):
+        if gate is not None:
+            gate.wait(5)
+        progress('Step', i, n)
+    return n * 10
+
+
+def _no_threads(monkeypatch):
+    # As under Pyodide, where starting a thread raises
+    def refuse(self):
+        raise RuntimeError("can't start new thread")
+
+    monkeypatch.setattr(threading.Thread, 'start', refuse)
+
+
+class TestBackgroundJob:
+    def test_result_and_stages(self):
+        job = BackgroundJob(_steps, 3).start()
+        assert job.wait(5)
+        assert job.state == jobs.DONE
+        assert job.result() == 30
+        assert job.stages == {'Step': (3, 3)}
+
+    def test_failure_is_reraised(self):
+        def boom(progress):
+            raise ValueError('bad file')
+
+        job = BackgroundJob(boom).start()
+        job.wait(5)
+        assert job.state == jobs.FAILED
+        assert isinstance(job.error, ValueError)
+        with pytest.raises(ValueError, match='bad file'):
+            job.result()
+
+    def test_cancel_stops_at_next_checkpoint(self):
+        gate = threading.Event()
+        job = BackgroundJob(_steps, 3, gate=gate).start()
+        job.cancel()
+        gate.set()
+        job.wait(5)
+        assert job.state == jobs.CANCELLED
+        assert job.stages == {}
+        with pytest.raises(RuntimeError):
+            job.result()
+
+    def test_records_stages_when_asked(self):
+        @instrumented('step')
+        def work(progress):
+            return 1
+
+        job = BackgroundJob(work, record=True).start()
+        job.wait(5)
+        assert [r.stage for r in job.stage_records] == ['step']
+        assert BackgroundJob(work).start().stage_records == []
+
+    def test_runs_inline_without_threads(self, monkeypatch):
+        _no_threads(monkeypatch)
+        job = BackgroundJob(_steps, 2).start()
+        assert job.state == jobs.DONE
+        assert job.result() == 20
+
+    def test_result_before_finish(self):
+        gate = threading.Event()
+        job = BackgroundJob(_steps, 1, gate=gate).start()
+        with pytest.raises(RuntimeError):
+            job.result()
+        gate.set()
+        job.wait(5)
+
+
+class TestJobRegistry:
+    def test_reuses_job_for_same_key(self):
+        registry = JobRegistry()
+        first = registry.get_or_start('a', _steps, 1)
+        first.wait(5)
+        assert registry.get_or_start('a', _steps, 1) is first
+
+    def test_replaces_cancelled_job(self):
+        registry = JobRegistry()
+        gate = threading.Event()
+        first = registry.get_or_start('a', _steps, 1, gate=gate)
+        first.cancel()
+        gate.set()
+        first.wait(5)
+        second = registry.get_or_start('a', _steps, 1)
+        assert second is not first
+        second.wait(5)
+        assert second.result() == 10
+
+    def test_release_cancels_only_for_last_subscriber(self):
+        registry = JobRegistry()
+        gate = threading.Event()
+        job = registry.get_or_start('a', _steps, 1, gate=gate, subscriber='s1')
+        assert registry.get_or_start('a', _steps, 1, subscriber='s2') is job
+        assert registry.subscribers('a') == 2
+
+        assert registry.release('a', 's1') is False
+        assert not job.cancel_requested
+        assert registry.release('a', 's2') is True
+        assert job.cancel_requested
+        gate.set()
+        job.wait(5)
+        assert job.state == jobs.CANCELLED
+
+    def test_release_of_finished_job_keeps_result(self):
+        registry = JobRegistry()
+        job = registry.get_or_start('a', _steps, 1, subscriber='s1')
+        job.wait(5)
+        assert registry.release('a', 's1') is False
+        assert registry.get_or_start('a', _steps, 1) is job
+
+    def test_cancelling_job_not_reused(self):
+        registry = JobRegistry()
+        gate = threading.Event()
+        first = registry.get_or_start('a', _steps, 1, gate=gate, subscriber='s1')
+        registry.release('a', 's1')
+        second = registry.get_or_start('a', _steps, 1, subscriber='s2')
+        assert second is not first
+        gate.set()
+        assert second.wait(5) and second.result() == 10
+
+    def test_results_of_successful_jobs(self):
+        registry = JobRegistry()
+        registry.get_or_start('a', _steps, 2).wait(5)
+        registry.get_or_start('b', _steps, 'x').wait(5)  # fails
+        assert registry.results() == [20]
+
+    def test_evicts_oldest_finished(self):
+        registry = JobRegistry(max_entries=2)
+        for key in 'abc':
+            registry.get_or_start(key, _steps, 1).wait(5)
+        assert len(registry) == 2
+        assert registry.get('a') is None
+
+    def test_keeps_running_jobs(self):
+        registry = JobRegistry(max_entries=1)
+        gate = threading.Event()
+        running = registry.get_or_start('a', _steps, 1, gate=gate)
+        registry.get_or_start('b', _steps, 1, gate=gate)
+        assert registry.get('a') is running
+        gate.set()
+        running.wait(5)
+
+    def test_ttl_expires_result(self):
+        registry = JobRegistry(ttl=0)
+        first = registry.get_or_start('a', _steps, 1)
+        first.wait(5)
+        first.finished_at -= 1
+        assert registry.get_or_start('a', _steps, 1) is not first
+
+
+def _blocked_pool(gate, max_queue=16):
+    """A one-worker pool whose worker is busy until *gate* is set."""
+    pool = WorkerPool(max_workers=1, max_queue=max_queue)
+    busy = pool.submit(BackgroundJob(_steps, 1, gate=gate))
+    while busy.state != jobs.RUNNING:
+        busy.wait(0.01)
+    return pool, busy
+
+
+class TestWorkerPool:
+    def test_limits_concurrency(self):
+        lock = threading.Lock()
+        active, peak = [0], [0]
+
+        def work(progress):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            threading.Event().wait(0.02)
+            with lock:
+                active[0] -= 1
+
+        pool = WorkerPool(max_workers=2)
+        submitted = [pool.submit(BackgroundJob(work)) for _ in range(6)]
+        assert all(job.wait(5) for job in submitted)
+        assert 1 <= peak[0] <= 2
+
+    def test_priority_order_and_positions(self):
+        gate = threading.Event()
+        pool, busy = _blocked_pool(gate)
+        order = []
+        bulk = pool.submit(BackgroundJob(lambda progress: order.append('bulk')), jobs.BULK)
+        view = pool.submit(BackgroundJob(lambda progress: order.append('view')), jobs.INTERACTIVE)
+        assert (view.queue_position, bulk.queue_position) == (1, 2)
+        assert busy.queue_position is None
+        assert pool.stats() == {
+            'running': 1, 'background_running': 1, 'queued': 2,
+            'max_workers': 1, 'max_background': 1, 'max_queue': 16,
+        }
+        gate.set()
+        assert bulk.wait(5)
+        assert order == ['view', 'bulk']
+
+    def test_rejects_when_queue_full(self):
+        gate = threading.Event()
+        pool, _ = _blocked_pool(gate, max_queue=1)
+        pool.submit(BackgroundJob(_steps, 1))
+        with pytest.raises(QueueFullError):
+            pool.submit(BackgroundJob(_steps, 1))
+        gate.set()
+
+    def test_interactive_calls_not_bounded(self):
+        gate = threading.Event()
+        pool, _ = _blocked_pool(gate, max_queue=1)
+        pool.submit(BackgroundJob(_steps, 1), jobs.BULK)
+        call = pool.submit_call(lambda: 'view')
+        gate.set()
+        assert call.wait(5)
+        assert call.result() == 'view'
+
+    def test_reserves_worker_for_interactive(self):
+        gate = threading.Event()
+        pool = WorkerPool(max_workers=2)
+        first = pool.submit(BackgroundJob(_steps, 1, gate=gate), jobs.BULK)
+        second = pool.submit(BackgroundJob(_steps, 1, gate=gate), jobs.BULK)
+        while first.state != jobs.RUNNING:
+            first.wait(0.01)
+        # The second background job waits although a worker is free...
+        assert second.queue_position == 1
+        # ...which is kept for interactive calls
+        call = pool.submit_call(lambda: 'view')
+        assert call.wait(5)
+        assert second.state == jobs.PENDING
+        gate.set()
+        assert second.wait(5)
+
+    def test_cancel_while_queued(self):
+        gate = threading.Event()
+        pool, _ = _blocked_pool(gate)
+        queued = pool.submit(BackgroundJob(_steps, 1))
+        queued.cancel()
+        assert queued.state == jobs.CANCELLED
+        assert pool.stats()['queued'] == 0
+        gate.set()
+
+    def test_submit_call_keeps_context(self):
+        @instrumented('step')
+        def add(a, b):
+            return a + b
+
+        pool = WorkerPool()
+        with instrumentation.recording(trace_memory=False) as records:
+            job = pool.submit_call(add, 1, b=2)
+            job.wait(5)
+        assert job.result() == 3
+        assert [r.stage for r in records] == ['step']
+
+    def test_registry_forgets_rejected_job(self):
+        gate = threading.Event()
+        pool, _ = _blocked_pool(gate, max_queue=1)
+        pool.submit(BackgroundJob(_steps, 1))
+        registry = JobRegistry()
+        with pytest.raises(QueueFullError):
+            registry.get_or_start('a', _steps, 1, pool=pool)
+        assert registry.get('a') is None
+        gate.set()
+
+    def test_runs_inline_without_threads(self, monkeypatch):
+        _no_threads(monkeypatch)
+        pool = WorkerPool()
+        job = pool.submit_call(lambda a, b: a + b, 1, b=2)
+        assert job.finished and job.result() == 3
+        analysis = JobRegistry().get_or_start('a', _steps, 2, pool=pool)
+        assert analysis.state == jobs.DONE and analysis.result() == 20
+        assert pool.stats()['running'] == 0 and pool.stats()['queued'] == 0
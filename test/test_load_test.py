@@ -0,0 +1,31 @@
+"""Unit tests for benchmarks.load_test."""
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.load_test import RunSample, SessionResult, current_rss_bytes, latency_table, run_load_test
+
+
+class TestLatencyTable:
+    def test_percentiles_per_action(self):
+        runs = [RunSample(0, 'switch', s / 1000) for s in range(1, 101)] + [RunSample(1, 'load', 0.5)]
+        table = latency_table([SessionResult(0, runs, 1.0, [])])
+        assert table['switch']['runs'] == 100
+        assert 50 <= table['switch']['p50_ms'] <= 51
+        assert 95 <= table['switch']['p95_ms'] <= 96
+        assert table['all']['max_ms'] == 500.0
+        assert 'poll' not in table
+
+    def test_rss_is_measured(self):
+        assert current_rss_bytes() > 0
+
+
+class TestRunLoadTest:
+    def test_two_sessions(self, tmp_path):
+        report = run_load_test(2, employees=2, switches=1, shared_files=True, workdir=str(tmp_path))
+        assert report['errors'] == {}
+        assert all(seconds is not None for seconds in report['analysis_s']['per_session'])
+        assert report['latency']['switch']['runs'] == 2
+        assert report['resources']['rss_peak_mib'] > 0
+        # The app's config and history went to the scratch directory
+        assert (tmp_path / 'history.csv').exists()
@@ -9,6 +9,9 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from modules.file_io import read_file_by_extension
 from modules.parsing import (
+    RAW_SWIPE_COLUMNS,
+    apply_period_config,
+    extract_raw_swipes,
     parse_attendance_report,
     parse_overtime_leave_report,
     parse_shift_report,
@@ -83,6 +86,66 @@ class TestParseAttendanceReport:
         assert set(self.df['Period'].unique()).issubset(valid_periods)
 
 
+# ── extract_raw_swipes / apply_period_config ───────────────────────────────
+
+def _make_block(name='Test', rows=None):
+    """Build one 15-column attendance block with daily rows from row 12."""
+    grid = [[None] * 15 for _ in range(12)]
+    grid[2][0] = '2026-02-01 ~ 2026-02-28'
+    grid[3][0] = '姓名'
+    grid[3][1] = name
+    for day, cells in (rows or []):
+        line = [None] * 15
+        line[0] = f'{day:02d} 一'
+        for offset, value in cells.items():
+            line[offset] = value
+        grid.append(line)
+    return pd.DataFrame(grid)
+
+
+class TestPeriodAdjustment:
+    @pytest.fixture()
+    def raw(self):
+        sheet = _make_block(rows=[
+            (2, {1: '07:50', 2: '12:30', 6: '16:10', 7: '19:40'}),
+            (3, {1: '08:20', 2: '11:00'}),
+        ])
+        return extract_raw_swipes({'1,2,3': sheet})
+
+    def test_raw_swipes_are_metadata_free(self, raw):
+        assert list(raw.columns) == RAW_SWIPE_COLUMNS
+        assert list(raw['Period']) == ['早診', '晚診', '早診']
+        assert list(raw['Start Time']) == ['07:50', '16:10', '08:20']
+
+    def test_matches_parse_attendance_report(self, raw):
+        sheet = _make_block(rows=[
+            (2, {1: '07:50', 2: '12:30', 6: '16:10', 7: '19:40'}),
+            (3, {1: '08:20', 2: '11:00'}),
+        ])
+        pd.testing.assert_frame_equal(
+            apply_period_config(raw, METADATA),
+            parse_attendance_report({'1,2,3': sheet}, METADATA),
+        )
+
+    def test_clamps_to_period(self, raw):
+        df = apply_period_config(raw, METADATA)
+        assert list(df['Adjusted Start Time']) == ['08:00', '16:10', '08:20']
+        assert list(df['Adjusted End Time']) == ['12:00', '19:40', '11:00']
+        assert list(df['Total Duration (min)']) == [240.0, 210.0, 160.0]
+        assert list(df['Total Duration (hr)']) == [4.0, 3.5, 2.67]
+
+    def test_metadata_change_without_reparse(self, raw):
+        df = apply_period_config(raw, dict(METADATA, night_late='16:15'))
+        assert df.iloc[1]['Adjusted Start Time'] == '16:00'
+        assert df.iloc[1]['Total Duration (min)'] == 220.0
+
+    def test_bad_metadata_zero_duration(self, raw):
+        df = apply_period_config(raw, dict(METADATA, morning_late='bad'))
+        morning = df[df['Period'] == '早診']
+        assert (morning['Total Duration (min)'] == 0.0).all()
+        assert list(morning['Adjusted Start Time']) == ['07:50', '08:20']
+
+
 # ── parse_overtime_leave_report ─────────────────────────────────────────────
 
 class TestParseOvertimeLeaveReport:
@@ -0,0 +1,38 @@
+"""Unit tests for modules.pdf_report."""
+
+import zipfile
+
+import pytest
+import pandas as pd
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.pdf_report import _render_markdown, generate_pdf_report, generate_pdf_zip_download
+
+SUMMARY = {
+    'Monthly Report': pd.DataFrame([{'Month': '2026-02', 'Total Late Mins': 10}]),
+    'Leave Details': pd.DataFrame(),
+    'Warnings': [],
+}
+
+
+class TestRenderMarkdown:
+    def test_title_once_and_one_heading_per_table(self):
+        text = _render_markdown('Test', SUMMARY)
+        assert text.count('# Test Attendance Report') == 1
+        assert text.count('## ') == 3
+        assert 'No data available.' in text
+        assert 'No warnings.' in text
+
+
+class TestGeneratePdf:
+    def test_in_memory_pdf(self):
+        pytest.importorskip('markdown_pdf')
+        assert generate_pdf_report('Test', SUMMARY).startswith(b'%PDF')
+
+    def test_zip(self):
+        pytest.importorskip('markdown_pdf')
+        result = generate_pdf_zip_download([('A', SUMMARY), ('B', SUMMARY)], max_workers=1)
+        with zipfile.ZipFile(result) as archive:
+            assert archive.namelist() == ['A.pdf', 'B.pdf']
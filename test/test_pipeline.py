@@ -0,0 +1,101 @@
+"""Unit tests for modules.pipeline."""
+
+import io
+
+import pytest
+import pandas as pd
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.exceptions import JobCancelledError
+from modules.pipeline import STAGES, content_hash, frame_hash, metadata_key, process_uploads
+
+
+def _attendance_bytes():
+    grid = [[None] * 15 for _ in range(12)]
+    grid[2][0] = '2026-02-01 ~ 2026-02-28'
+    grid[3][0] = '姓名'
+    grid[3][1] = 'A'
+    line = [None] * 15
+    line[0] = '02 一'
+    line[1], line[2] = '08:10', '12:05'
+    grid.append(line)
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        pd.DataFrame(grid).to_excel(writer, sheet_name='1,2,3', header=False, index=False)
+    return buffer.getvalue()
+
+
+def _report_bytes():
+    report = pd.DataFrame([{
+        '時間戳記': '2026/2/3 上午 9:00:00',
+        '姓名': 'B',
+        '回報屬性': '加班',
+        '上班日期': '2026-02-03',
+        '加班屬性': '正常加班',
+        '時段': '早診',
+        '加班時處理的病人姓名 or 水藥編號': 'X',
+    }])
+    return report.to_csv(index=False).encode('utf-8')
+
+
+class TestProcessUploads:
+    def test_parses_both_files(self):
+        parsed = process_uploads(_attendance_bytes(), 'att.xlsx', _report_bytes(), 'ot.csv')
+        assert list(parsed.raw_swipes['Start Time']) == ['08:10']
+        assert parsed.employees == ['A', 'B']
+        assert parsed.shifts.empty
+        assert parsed.warnings == []
+
+    def test_invalid_attendance(self):
+        with pytest.raises(ValueError):
+            process_uploads(_report_bytes(), 'att.csv', _report_bytes(), 'ot.csv')
+
+    def test_invalid_report(self):
+        bad = pd.DataFrame({'姓名': ['B']}).to_csv(index=False).encode('utf-8')
+        with pytest.raises(ValueError):
+            process_uploads(_attendance_bytes(), 'att.xlsx', bad, 'ot.csv')
+
+
+    def test_reports_every_stage(self):
+        calls = []
+        process_uploads(
+            _attendance_bytes(), 'att.xlsx', _report_bytes(), 'ot.csv',
+            progress=lambda stage, done, total: calls.append((stage, done, total)),
+        )
+        assert [stage for stage in STAGES if stage in {c[0] for c in calls}] == list(STAGES)
+        final = {stage: (done, total) for stage, done, total in calls}
+        assert all(done == total for done, total in final.values())
+        assert final['Decoding sheets'] == (2, 2)
+
+    def test_progress_can_abort(self):
+        def cancel_on_parse(stage, done, total):
+            if stage == 'Parsing attendance sheets':
+                raise JobCancelledError('stop')
+
+        with pytest.raises(JobCancelledError):
+            process_uploads(_attendance_bytes(), 'att.xlsx', _report_bytes(), 'ot.csv', progress=cancel_on_parse)
+
+    def test_cancel_while_decoding_is_not_a_format_error(self):
+        def cancel(stage, done, total):
+            if done:
+                raise JobCancelledError('stop')
+
+        with pytest.raises(JobCancelledError):
+            process_uploads(_attendance_bytes(), 'att.xlsx', _report_bytes(), 'ot.csv', progress=cancel)
+
+
+class TestCacheKeys:
+    def test_content_hash(self):
+        assert content_hash(b'abc') == content_hash(b'abc')
+        assert content_hash(b'abc') != content_hash(b'abd')
+
+    def test_metadata_key_ignores_order(self):
+        assert metadata_key({'a': '1', 'b': '2'}) == metadata_key({'b': '2', 'a': '1'})
+
+    def test_frame_hash(self):
+        df = pd.DataFrame({'a': [1, 2]})
+        assert frame_hash(df) == frame_hash(df.copy())
+        assert frame_hash(df) != frame_hash(df.rename(columns={'a': 'b'}))
+        assert frame_hash(df) != frame_hash(pd.DataFrame({'a': [2, 1]}))
@@ -0,0 +1,54 @@
+"""Unit tests for modules.profiling."""
+
+import pstats
+import threading
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules import profiling
+from modules.profiling import Profiler
+
+
+def _busy(n):
+    return sum(i * i for i in range(n))
+
+
+class TestProfiler:
+    def test_capture_writes_files(self, tmp_path):
+        profiler = Profiler(str(tmp_path), top=5)
+        with profiler.capture('summary', 'abc123' * 4):
+            _busy(50_000)
+
+        capture, = profiler.captures
+        assert capture.label == 'summary' and capture.input_hash == 'abc123' * 4
+        assert os.path.basename(capture.pstats_path).endswith('_summary_abc123abc123.pstats')
+        assert pstats.Stats(capture.pstats_path).total_calls > 0
+        with open(capture.report_path, encoding='utf-8') as f:
+            report = f.read()
+        assert 'input hash: ' + 'abc123' * 4 in report and '_busy' in report
+        assert len(capture.hotspots) <= 5
+        assert any('_busy' in name for name in capture.hotspots['Function'])
+
+    def test_wrap_profiles_other_thread(self, tmp_path):
+        profiler = Profiler(str(tmp_path))
+        results = []
+        worker = threading.Thread(target=lambda: results.append(profiler.wrap(_busy, 'analysis', 'h')(10)))
+        worker.start()
+        worker.join()
+        assert results == [_busy(10)]
+        assert [c.label for c in profiler.captures] == ['analysis']
+
+    def test_keeps_recent_captures(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(profiling, 'MAX_CAPTURES', 2)
+        profiler = Profiler(str(tmp_path))
+        for label in ('a', 'b', 'c'):
+            with profiler.capture(label, 'h'):
+                pass
+        assert [c.label for c in profiler.captures] == ['b', 'c']
+
+    def test_env_switch(self, monkeypatch):
+        monkeypatch.setenv(profiling.PROFILE_ENV, '1')
+        assert profiling.profile_enabled()
+        monkeypatch.setenv(profiling.PROFILE_ENV, '0')
+        assert not profiling.profile_enabled()
@@ -0,0 +1,98 @@
+"""Unit tests for modules.scenarios."""
+
+import pytest
+import pandas as pd
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.parsing import apply_period_config
+from modules.scenarios import (
+    build_variants,
+    parse_minutes_list,
+    run_threshold_sweep,
+)
+from modules.summary import generate_employee_summary
+
+METADATA = {
+    'morning_start': '08:00',
+    'morning_end': '12:00',
+    'morning_ot_start': '12:10',
+    'morning_late': '08:05',
+    'night_start': '16:00',
+    'night_end': '20:00',
+    'night_ot_start': '20:10',
+    'night_late': '16:05',
+}
+
+
+NO_REPORTS = pd.DataFrame(columns=[
+    'Employee', 'Type', 'Date', 'Period', 'OT Attribute', 'Patient/Note',
+])
+
+
+@pytest.fixture()
+def raw_swipes():
+    return pd.DataFrame([
+        {'Employee': 'A', 'Date': '2026-02-02', 'Period': '早診', 'Start Time': '08:12', 'End Time': '12:30'},
+        {'Employee': 'A', 'Date': '2026-02-02', 'Period': '晚診', 'Start Time': '16:03', 'End Time': '20:05'},
+        {'Employee': 'B', 'Date': '2026-02-02', 'Period': '早診', 'Start Time': '08:20', 'End Time': '12:15'},
+    ])
+
+
+class TestBuildVariants:
+    def test_grid(self):
+        variants = build_variants(METADATA, [0, 10], [5])
+        assert len(variants) == 2
+        v = list(variants.values())[1]
+        assert v['morning_late'] == '08:10'
+        assert v['night_late'] == '16:10'
+        assert v['morning_ot_start'] == '12:05'
+        assert v['morning_start'] == '08:00'
+
+    def test_bad_base_time(self):
+        with pytest.raises(ValueError):
+            build_variants(dict(METADATA, night_end='x'), [0], [0])
+
+
+class TestRunThresholdSweep:
+    def test_clinic_totals(self, raw_swipes):
+        variants = build_variants(METADATA, [0, 10], [10])
+        clinic = run_threshold_sweep(raw_swipes, variants)['Clinic']
+        # grace 0: late 12 + 3 + 20; grace 10: 2 + 0 + 10
+        assert list(clinic['Total Late Mins']) == [35.0, 12.0]
+        # OT past 12:10 / 20:10: 20 + 0 + 5
+        assert list(clinic['Total Overtime Mins']) == [25.0, 25.0]
+
+    def test_matches_employee_summary(self, raw_swipes):
+        variants = build_variants(METADATA, [0, 5, 15], [0, 10])
+        per_emp = run_threshold_sweep(raw_swipes, variants)['Per Employee']
+        for label, meta in variants.items():
+            attendance = apply_period_config(raw_swipes, meta)
+            for emp in ('A', 'B'):
+                summary = generate_employee_summary(emp, attendance, NO_REPORTS, meta)
+                expected = summary['Monthly Report'].iloc[0]
+                row = per_emp[(per_emp['Scenario'] == label) & (per_emp['Employee'] == emp)].iloc[0]
+                assert row['Total Late Mins'] == pytest.approx(expected['Total Late Mins'])
+                assert row['Total On-Duty Hours'] == pytest.approx(expected['Total On-Duty Hours'])
+                assert row['Total Overtime Mins'] == pytest.approx(
+                    summary['Duty Time Entries']['Overtime Duration (min)'].sum()
+                )
+
+    def test_empty(self):
+        result = run_threshold_sweep(pd.DataFrame(), build_variants(METADATA, [0], [0]))
+        assert result['Per Employee'].empty
+        assert result['Clinic']['Total Late Mins'].iloc[0] == 0.0
+
+
+class TestParseMinutesList:
+    def test_valid(self):
+        assert parse_minutes_list('0, 5,10,5') == [0, 5, 10]
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            parse_minutes_list('5, -1')
+
+    def test_empty(self):
+        with pytest.raises(ValueError):
+            parse_minutes_list(' , ')
@@ -0,0 +1,131 @@
+"""Unit tests for modules.schedule and custom period schedules."""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.parsing import extract_raw_swipes, parse_attendance_report
+from modules.schedule import (
+    assign_column_periods,
+    compile_metadata,
+    compile_schedule,
+    late_minutes,
+    overtime_minutes,
+    period_codes,
+)
+from modules.time_utils import DEFAULT_SCHEDULE, calc_late_time, calc_overtime, get_ot_start
+
+METADATA = {
+    'morning_start': '08:00',
+    'morning_end': '12:00',
+    'morning_ot_start': '12:10',
+    'morning_late': '08:05',
+    'night_start': '16:00',
+    'night_end': '20:00',
+    'night_ot_start': '20:10',
+    'night_late': '16:05',
+}
+
+THREE_PERIODS = [
+    {'name': '早診', 'key': 'morning', 'label': 'Morning', 'columns': [1, 4],
+     'defaults': {'start': '08:00', 'end': '12:00', 'ot_start': '12:10', 'late': '08:05'}},
+    {'name': '午診', 'key': 'afternoon', 'label': 'Afternoon', 'columns': [4, 7],
+     'defaults': {'start': '13:00', 'end': '16:00', 'ot_start': '16:10', 'late': '13:05'}},
+    {'name': '晚診', 'key': 'night', 'label': 'Night', 'columns': [7, 10],
+     'defaults': {'start': '16:00', 'end': '20:00', 'ot_start': '20:10', 'late': '16:05'}},
+]
+
+THREE_PERIOD_METADATA = dict(
+    METADATA,
+    afternoon_start='13:00', afternoon_end='16:00',
+    afternoon_ot_start='16:10', afternoon_late='13:05',
+    periods=THREE_PERIODS,
+)
+
+
+class TestCompileSchedule:
+    def test_default_bins(self):
+        compiled = compile_schedule(DEFAULT_SCHEDULE)
+        codes = assign_column_periods(np.arange(15), compiled)
+        assert list(codes) == [-1, 0, 0, 0, 0, 0, 1, 1, 1, 1, -1, -1, -1, -1, -1]
+
+    def test_thresholds(self):
+        compiled = compile_metadata(METADATA)
+        assert compiled.names == ['早診', '晚診']
+        assert list(compiled.late) == [485, 965]
+        assert list(compiled.ot_start) == [730, 1210]
+
+    def test_invalid_time_is_nan(self):
+        compiled = compile_metadata(dict(METADATA, night_late='bad'))
+        assert np.isnan(compiled.late[1])
+
+    def test_overlapping_columns(self):
+        bad = [dict(THREE_PERIODS[0], columns=[1, 5]), THREE_PERIODS[1]]
+        with pytest.raises(ValueError):
+            compile_schedule(bad)
+
+    def test_out_of_block_columns(self):
+        with pytest.raises(ValueError):
+            compile_schedule([dict(THREE_PERIODS[0], columns=[0, 16])])
+
+
+class TestVectorizedLateOvertime:
+    @pytest.fixture()
+    def rows(self):
+        return pd.DataFrame({
+            'Start Time': ['08:12', '16:03', '08:00', None, '09:00'],
+            'End Time': ['12:30', '20:25', '11:00', '12:40', '13:00'],
+            'Period': ['早診', '晚診', '早診', '早診', '早診加班'],
+        })
+
+    def test_matches_scalar_helpers(self, rows):
+        compiled = compile_metadata(METADATA)
+        late = late_minutes(rows['Start Time'], rows['Period'], compiled)
+        ot = overtime_minutes(rows['End Time'], rows['Period'], compiled)
+        for i, row in rows.iterrows():
+            assert late[i] == calc_late_time(row, METADATA)
+            assert ot[i] == calc_overtime(row, METADATA)
+
+    def test_substring_match_only_for_overtime(self, rows):
+        compiled = compile_metadata(METADATA)
+        assert list(period_codes(rows['Period'], compiled)) == [0, 1, 0, 0, -1]
+        assert period_codes(rows['Period'], compiled, exact=False)[-1] == 0
+
+
+class TestCustomSchedule:
+    @pytest.fixture()
+    def sheet(self):
+        grid = [[None] * 15 for _ in range(12)]
+        grid[2][0] = '2026-02-01 ~ 2026-02-28'
+        grid[3][0] = '姓名'
+        grid[3][1] = 'Test'
+        line = [None] * 15
+        line[0] = '02 一'
+        line[1], line[2] = '07:55', '12:05'
+        line[4], line[5] = '13:10', '16:20'
+        line[7], line[8] = '16:00', '19:50'
+        grid.append(line)
+        return {'1,2,3': pd.DataFrame(grid)}
+
+    def test_afternoon_parsed(self, sheet):
+        raw = extract_raw_swipes(sheet, THREE_PERIODS)
+        assert list(raw['Period']) == ['早診', '午診', '晚診']
+        assert list(raw['Start Time']) == ['07:55', '13:10', '16:00']
+
+    def test_default_schedule_merges_columns(self, sheet):
+        raw = extract_raw_swipes(sheet)
+        assert list(raw['Period']) == ['早診', '晚診']
+        assert raw.iloc[0]['End Time'] == '16:20'
+
+    def test_afternoon_thresholds(self, sheet):
+        df = parse_attendance_report(sheet, THREE_PERIOD_METADATA)
+        afternoon = df[df['Period'] == '午診'].iloc[0]
+        assert afternoon['Adjusted End Time'] == '16:00'
+        assert afternoon['Total Duration (min)'] == 170.0
+        row = pd.Series({'Start Time': '13:10', 'End Time': '16:20', 'Period': '午診'})
+        assert calc_late_time(row, THREE_PERIOD_METADATA) == 5.0
+        assert calc_overtime(row, THREE_PERIOD_METADATA) == 10.0
+        assert get_ot_start('午診', THREE_PERIOD_METADATA) == '16:10'
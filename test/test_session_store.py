@@ -0,0 +1,154 @@
+"""Unit tests for modules.session_store."""
+
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules import session_store
+from modules.session_store import SessionStore, Spilled, value_nbytes
+
+
+def _frame(rows=100):
+    # Mixed-type object column, as in the parsed overtime report
+    return pd.DataFrame({
+        'Employee': [f'員工{i}' for i in range(rows)],
+        'Start Time': ['08:00' if i % 2 else None for i in range(rows)],
+        'Elapsed Minutes': [float(i) if i % 3 else 0 for i in range(rows)],
+    })
+
+
+def _age(store, session_id, seconds):
+    store._sessions[session_id].last_access -= seconds
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SessionStore(str(tmp_path), budget_bytes=10 ** 9, idle_seconds=60, ttl=3600)
+
+
+class TestSessionStore:
+    def test_put_get(self, store):
+        frame = _frame()
+        store.put('a', 'report', frame)
+        assert store.get('a', 'report') is frame
+        assert store.get('a', 'missing', 'default') == 'default'
+        assert store.get('b', 'report') is None
+        assert store.stats()['resident_bytes'] == value_nbytes(frame)
+
+    def test_idle_session_spills_and_reloads(self, store, tmp_path):
+        frame = _frame()
+        store.put('a', 'report', frame)
+        store.put('b', 'report', _frame())
+        _age(store, 'a', 120)
+        store.maintain(current='b')
+
+        stats = store.stats()
+        assert stats['spilled_bytes'] == value_nbytes(frame)
+        assert stats['resident_bytes'] == value_nbytes(frame)
+        spilled = store._sessions['a'].values['report']
+        assert isinstance(spilled, Spilled) and os.path.exists(spilled.path)
+
+        assert store.has('a', 'report')
+        pd.testing.assert_frame_equal(store.get('a', 'report'), frame)
+        assert not os.path.exists(spilled.path)
+        assert store.stats()['spilled_bytes'] == 0
+
+    def test_budget_spills_least_recent_first(self, tmp_path):
+        size = value_nbytes(_frame())
+        store = SessionStore(str(tmp_path), budget_bytes=int(size * 1.5), idle_seconds=60, ttl=3600)
+        for session_id in ('old', 'new', 'current'):
+            store.put(session_id, 'report', _frame())
+        _age(store, 'old', 2)
+        _age(store, 'new', 1)
+        store.maintain(current='current')
+        resident = {sid: s.resident_bytes() for sid, s in store._sessions.items()}
+        assert resident == {'old': 0, 'new': 0, 'current': size}
+
+    def test_abandoned_session_is_dropped(self, store, tmp_path):
+        store.put('a', 'report', _frame())
+        _age(store, 'a', 120)
+        store.maintain()
+        _age(store, 'a', 3600)
+        store.maintain()
+        assert not store.has('a', 'report')
+        assert os.listdir(tmp_path) == []
+        assert store.stats()['sessions'] == 0
+
+    def test_put_replaces_spilled_value(self, store, tmp_path):
+        store.put('a', 'bulk_export', ('key', b'x' * 1000))
+        _age(store, 'a', 120)
+        store.maintain()
+        assert len(os.listdir(tmp_path)) == 1
+        store.put('a', 'bulk_export', ('key2', b'y'))
+        assert os.listdir(tmp_path) == []
+        assert store.get('a', 'bulk_export') == ('key2', b'y')
+
+    def test_concurrent_gets_reload_spilled_value_once(self, store, monkeypatch):
+        frame = _frame()
+        store.put('a', 'report', frame)
+        _age(store, 'a', 120)
+        store.maintain()
+
+        # The first reload is slow to unpickle and the second slow to open the
+        # file, so the second one opens it only after the first has finished
+        opens, loads = [], []
+        real_open, real_load = session_store.gzip.open, session_store.pickle.load
+
+        def slow_open(*args, **kwargs):
+            opens.append(1)
+            if len(opens) > 1:
+                time.sleep(0.2)
+            return real_open(*args, **kwargs)
+
+        def slow_load(f):
+            loads.append(1)
+            if len(loads) == 1:
+                time.sleep(0.1)
+            return real_load(f)
+
+        monkeypatch.setattr(session_store.gzip, 'open', slow_open)
+        monkeypatch.setattr(session_store.pickle, 'load', slow_load)
+        results, errors = [], []
+
+        def reload():
+            try:
+                results.append(store.get('a', 'report'))
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=reload) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.02)
+        for thread in threads:
+            thread.join(5)
+
+        assert errors == []
+        assert len(results) == 2 and results[0] is results[1]
+        pd.testing.assert_frame_equal(results[0], frame)
+        assert len(loads) == 1
+
+    def test_session_stats(self, store):
+        frame = _frame()
+        store.put('a', 'report', frame)
+        store.put('b', 'report', _frame(10))
+        assert store.session_stats('a') == {'resident_bytes': value_nbytes(frame), 'spilled_bytes': 0}
+        assert store.session_stats('missing') == {'resident_bytes': 0, 'spilled_bytes': 0}
+
+    def test_sessions_frame(self, store):
+        store.put('abcdef0123', 'report', _frame())
+        table = store.sessions_frame()
+        assert list(table.columns) == ['Session', 'Resident (MiB)', 'Spilled (MiB)', 'Idle (s)']
+        assert table['Session'].tolist() == ['abcdef01']
+
+
+class TestValueNbytes:
+    def test_bytes_and_tuples(self):
+        assert value_nbytes(b'abc') == 3
+        assert value_nbytes(('k', b'abcd')) == value_nbytes('k') + 4
@@ -6,7 +6,7 @@ import pandas as pd
 import sys, os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from modules.summary import generate_employee_summary
+from modules.summary import generate_all_summaries, generate_employee_summary
 
 METADATA = {
     'morning_start': '08:00',
@@ -126,3 +126,39 @@ class TestGenerateEmployeeSummary:
         result = generate_employee_summary('NoOne', att, ot, METADATA)
         assert result['Duty Time Entries'].empty
         assert result['Overtime Detail'].empty
+
+
+class TestGenerateAllSummaries:
+    def test_matches_single_employee_summaries(self):
+        att = pd.concat([_make_attendance('A'), _make_attendance('B', start='08:20')])
+        ot = pd.concat([_make_overtime('A'), _make_overtime('C')])
+        results = dict(generate_all_summaries(att, ot, METADATA))
+        assert list(results) == ['A', 'B', 'C']
+        for emp, summary in results.items():
+            expected = generate_employee_summary(emp, att, ot, METADATA)
+            pd.testing.assert_frame_equal(
+                summary['Monthly Report'], expected['Monthly Report']
+            )
+
+    def test_requested_employees_only(self):
+        att = pd.concat([_make_attendance('A'), _make_attendance('B')])
+        results = list(generate_all_summaries(att, _make_overtime('A'), METADATA, employees=['B', 'X']))
+        assert [emp for emp, _ in results] == ['B', 'X']
+        assert results[1][1]['Monthly Report']['Total Late Mins'].iloc[0] == 0
+
+    def test_shift_warnings_match_single_employee_summaries(self):
+        att = pd.concat([_make_attendance('A'), _make_attendance('B')])
+        report = _make_leave('B', period='晚診')
+        shifts = pd.DataFrame([
+            {'Name': 'A', 'Date': '2026-02-02', '早診': 1, '午診': 0, '晚診': 0},
+            {'Name': 'A', 'Date': '2026-02-03', '早診': 0, '午診': 0, '晚診': 1},
+            {'Name': 'B', 'Date': '2026-02-02', '早診': 0, '午診': 1, '晚診': 0},
+        ])
+        results = dict(generate_all_summaries(att, report, METADATA, shifts))
+        for emp, summary in results.items():
+            expected = generate_employee_summary(emp, att, report, METADATA, shifts)
+            assert summary['Warnings'] == expected['Warnings']
+            pd.testing.assert_frame_equal(summary['Shift Entries'], expected['Shift Entries'])
+        assert [w.split('!')[0] for w in results['B']['Warnings']] == [
+            'Missing Swipe', 'Swiped without Shift', 'Wrong Leave Registry',
+        ]
@@ -0,0 +1,64 @@
+"""Unit tests for benchmarks.synthetic."""
+
+import pandas as pd
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic import SyntheticConfig, employee_names, generate_dataset, month_range
+from modules.pipeline import process_uploads
+from modules.watcher import classify
+
+CONFIG = SyntheticConfig(employees=5, months=2, start_month='2026-01', shifted_row_rate=0.5, seed=3)
+
+
+def _process(pair):
+    attendance_path, report_path = pair
+    with open(attendance_path, 'rb') as f:
+        attendance = f.read()
+    with open(report_path, 'rb') as f:
+        report = f.read()
+    return process_uploads(attendance, os.path.basename(attendance_path), report, os.path.basename(report_path))
+
+
+class TestHelpers:
+    def test_month_range_crosses_year(self):
+        assert month_range('2025-11', 3) == ['2025-11', '2025-12', '2026-01']
+
+    def test_employee_names_unique(self):
+        assert len(set(employee_names(120))) == 120
+
+
+class TestGenerateDataset:
+    def test_files_parse_back(self, tmp_path):
+        pairs = generate_dataset(str(tmp_path), CONFIG)
+        assert len(pairs) == 2
+
+        parsed = _process(pairs[1])
+        assert parsed.warnings == []
+        assert parsed.employees == employee_names(5)
+        assert set(parsed.raw_swipes['Date'].str[:7]) == {'2026-02'}
+        assert set(parsed.raw_swipes['Period']) == {'早診', '晚診'}
+        assert set(parsed.shifts['Name']) == set(employee_names(5))
+        assert len(parsed.shifts) == 5 * 28
+
+    def test_shifted_rows_keep_employee_and_type(self, tmp_path):
+        attendance_path, report_path = generate_dataset(str(tmp_path), CONFIG)[0]
+        raw = pd.read_excel(report_path)
+        shifted = raw['回報屬性'].isna()
+        assert shifted.any() and (~shifted).any()
+
+        parsed = _process((attendance_path, report_path))
+        assert len(parsed.report) == len(raw)
+        assert set(parsed.report['Employee']) <= set(employee_names(5))
+        assert set(parsed.report['Type']) <= {'Overtime', 'Leave', 'Visit'}
+
+    def test_deterministic(self, tmp_path):
+        first = generate_dataset(str(tmp_path / 'a'), CONFIG)[0]
+        second = generate_dataset(str(tmp_path / 'b'), CONFIG)[0]
+        pd.testing.assert_frame_equal(_process(first).raw_swipes, _process(second).raw_swipes)
+
+    def test_names_match_watch_patterns(self, tmp_path):
+        attendance_path, report_path = generate_dataset(str(tmp_path), CONFIG._replace(months=1))[0]
+        assert classify(os.path.basename(attendance_path)) == 'attendance'
+        assert classify(os.path.basename(report_path)) == 'report'
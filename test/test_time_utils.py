@@ -14,7 +14,10 @@ from modules.time_utils import (
     calc_overtime,
     get_ot_start,
     has_column,
+    hhmm_series_to_minutes,
+    hhmm_to_minutes,
     is_time_like,
+    minutes_to_hhmm,
     is_valid_attr,
 )
 
@@ -84,6 +87,28 @@ class TestNormalizeDate:
         assert normalize_date("2026-2-6") == "2026-02-06"
 
 
+# ── hhmm_to_minutes / minutes_to_hhmm ───────────────────────────────────────
+
+class TestHhmmMinutes:
+    def test_scalar(self):
+        assert hhmm_to_minutes("08:05") == 485
+        assert hhmm_to_minutes("8:05") == 485
+
+    def test_scalar_invalid(self):
+        assert hhmm_to_minutes("24:00") is None
+        assert hhmm_to_minutes("bad") is None
+
+    def test_series(self):
+        result = hhmm_series_to_minutes(pd.Series(["00:00", "12:30", "25:00", None]))
+        assert result[0] == 0
+        assert result[1] == 750
+        assert pd.isna(result[2])
+        assert pd.isna(result[3])
+
+    def test_format(self):
+        assert list(minutes_to_hhmm([485, 0, 1439])) == ["08:05", "00:00", "23:59"]
+
+
 # ── calc_late_time ──────────────────────────────────────────────────────────
 
 class TestCalcLateTime:
@@ -11,6 +11,7 @@ from modules.validation import (
     validate_overtime_report,
     validate_duty_with_shifts,
     validate_leave_with_shifts,
+    validate_shifts_by_employee,
 )
 
 
@@ -87,3 +88,26 @@ class TestValidateLeaveWithShifts:
         shift = pd.DataFrame(columns=['Date', '早診', '午診', '晚診'])
         warnings = validate_leave_with_shifts(leave, shift, 'Test')
         assert any('Wrong Leave Registry' in w for w in warnings)
+
+
+class TestValidateShiftsByEmployee:
+    def test_matches_single_employee_validators(self):
+        shifts = pd.DataFrame([
+            {'Name': 'A', 'Date': '2026-02-02', '早診': 1, '午診': 0, '晚診': 0},
+            {'Name': 'B', 'Date': '2026-02-02', '早診': 0, '午診': 1, '晚診': 0},
+        ])
+        duty = pd.DataFrame([
+            {'Employee': 'B', 'Date': '2026-02-02', 'Period': '早診'},
+            {'Employee': 'C', 'Date': '2026-02-02', 'Period': '早診'},
+        ])
+        leave = pd.DataFrame([{'Employee': 'B', 'Date': '2026-02-02', 'Period': '晚診'}])
+        warnings = validate_shifts_by_employee(duty, leave, shifts)
+        assert set(warnings) == {'A', 'B'}
+        for emp, emp_warnings in warnings.items():
+            emp_shift = shifts[shifts['Name'] == emp].drop(columns=['Name'])
+            emp_duty = duty[duty['Employee'] == emp]
+            emp_leave = leave[leave['Employee'] == emp]
+            assert emp_warnings == (
+                validate_duty_with_shifts(emp_duty, emp_leave, emp_shift, emp)
+                + validate_leave_with_shifts(emp_leave, emp_shift, emp)
+            )
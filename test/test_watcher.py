@@ -0,0 +1,158 @@
+"""Unit tests for modules.watcher."""
+
+import json
+import shutil
+from concurrent.futures import wait
+
+import pytest
+import pandas as pd
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.history import load_history
+from modules.watcher import FolderWatcher, classify
+
+METADATA = {
+    'morning_start': '08:00',
+    'morning_end': '12:00',
+    'morning_ot_start': '12:10',
+    'morning_late': '08:05',
+    'night_start': '16:00',
+    'night_end': '20:00',
+    'night_ot_start': '20:10',
+    'night_late': '16:05',
+}
+
+
+def _write_attendance(folder, month='2026-02', start='08:10'):
+    grid = [[None] * 15 for _ in range(12)]
+    grid[2][0] = f'{month}-01 ~ {month}-28'
+    grid[3][0] = '姓名'
+    grid[3][1] = 'A'
+    line = [None] * 15
+    line[0] = '02 一'
+    line[1], line[2] = start, '12:05'
+    grid.append(line)
+    with pd.ExcelWriter(folder / f'{int(month[5:])}月考勤報表.xlsx') as writer:
+        pd.DataFrame(grid).to_excel(writer, sheet_name='1,2,3', header=False, index=False)
+
+
+def _write_report(folder, months=('2026-02',), name='上班時數表單.csv'):
+    pd.DataFrame([{
+        '時間戳記': f'{month.replace("-", "/")}/3 上午 9:00:00', '姓名': 'A', '回報屬性': '加班',
+        '上班日期': f'{month}-02', '加班屬性': '正常加班', '時段': '早診',
+        '加班時處理的病人姓名 or 水藥編號': 'X',
+    } for month in months]).to_csv(folder / name, index=False)
+
+
+def _write_inputs(folder, start='08:10'):
+    _write_attendance(folder, start=start)
+    _write_report(folder)
+
+
+@pytest.fixture()
+def watcher(tmp_path):
+    inbox = tmp_path / 'inbox'
+    inbox.mkdir()
+    w = FolderWatcher(
+        str(inbox), str(tmp_path / 'out'), METADATA, formats=['csv'],
+        history_path=str(tmp_path / 'history.csv'), debounce=5, workers=1,
+    )
+    yield w, inbox, tmp_path
+    w.pool.shutdown(wait=True)
+
+
+def _drain(w):
+    wait([future for future, _ in w.pending.values()])
+    w.collect()
+    w.write_status()
+
+
+class TestClassify:
+    def test_names(self):
+        assert classify('1_(2月)考勤報表.xls') == 'attendance'
+        assert classify('上班時數表單 (回覆).xlsx') == 'report'
+        assert classify('notes.txt') is None
+
+
+class TestFolderWatcher:
+    def test_debounce_then_process(self, watcher):
+        w, inbox, tmp_path = watcher
+        _write_inputs(inbox)
+        w.poll(now=1000)
+        assert not w.pending  # first sighting starts the debounce window
+        w.poll(now=1002)
+        assert not w.pending
+        w.poll(now=1006)
+        assert len(w.pending) == 1
+        _drain(w)
+
+        status = json.loads((tmp_path / 'out' / 'watcher_status.json').read_text())
+        job = status['jobs'][0]
+        assert job['state'] == 'done'
+        assert set(job['timings']) == {'parse', 'aggregate', 'write', 'history'}
+        assert status['queue_depth'] == 0
+        assert os.path.exists(os.path.join(job['output'], 'clinic', 'clinic_monthly.csv'))
+        assert load_history(str(tmp_path / 'history.csv'))['Total Late Mins'].iloc[0] == 5
+
+    def test_unchanged_content_not_reprocessed(self, watcher):
+        w, inbox, _ = watcher
+        _write_inputs(inbox)
+        w.poll(now=1000)
+        w.poll(now=1010)
+        _drain(w)
+        w.poll(now=1020)
+        assert not w.pending
+
+        # Rewriting identical bytes changes mtime but not the content hash
+        for path in inbox.iterdir():
+            shutil.copy(path, str(path) + '.tmp')
+            os.replace(str(path) + '.tmp', path)
+            os.utime(path, (2000, 2000))
+        w.poll(now=1030)
+        w.poll(now=1040)
+        assert not w.pending
+
+    def test_failed_job_reported(self, watcher):
+        w, inbox, tmp_path = watcher
+        _write_inputs(inbox)
+        (inbox / '上班時數表單.csv').write_text('bad,columns\n1,2\n')
+        w.poll(now=1000)
+        w.poll(now=1010)
+        _drain(w)
+        job = json.loads((tmp_path / 'out' / 'watcher_status.json').read_text())['jobs'][0]
+        assert job['state'] == 'failed'
+        assert 'missing columns' in job['error']
+
+    def test_pairs_files_by_month(self, watcher):
+        w, inbox, tmp_path = watcher
+        _write_inputs(inbox)
+        w.poll(now=1000)
+        w.poll(now=1010)
+        _drain(w)
+
+        # March attendance must not be paired with February's report
+        _write_attendance(inbox, month='2026-03')
+        w.poll(now=1020)
+        w.poll(now=1030)
+        assert not w.pending
+
+        _write_report(inbox, months=('2026-03',), name='3月加班表單.csv')
+        w.poll(now=1040)
+        w.poll(now=1050)
+        assert [job['report'] for _, job in w.pending.values()] == [str(inbox / '3月加班表單.csv')]
+        _drain(w)
+        assert list(load_history(str(tmp_path / 'history.csv'))['Month']) == ['2026-02', '2026-03']
+
+    def test_queues_every_month_dropped_at_once(self, watcher):
+        w, inbox, _ = watcher
+        for month in ('2026-01', '2026-02', '2026-03'):
+            _write_attendance(inbox, month=month)
+        _write_report(inbox, months=('2026-01', '2026-02', '2026-03'))
+        w.poll(now=1000)
+        w.poll(now=1010)
+        assert sorted(job['months'] for _, job in w.pending.values()) == [
+            ['2026-01'], ['2026-02'], ['2026-03'],
+        ]
+        _drain(w)